@@ -0,0 +1,290 @@
+"""Benchmark suite for the generation pipeline (no PyQt imports).
+
+Gera entradas sintéticas (gradientes e ruído RGBA, N máscaras aleatórias
+e paletas de 4 a 256 cores) e mede `generate_pixel_art` numa matriz de
+tamanhos de imagem, tamanhos de bloco, quantidades de assuntos e
+tamanhos de paleta. Os resultados vão para JSON; o modo de comparação
+aponta os casos mais lentos que a linha de base e sai com código 1, para
+uso em verificações antes do merge. Casos que só existem num dos lados
+são listados, e uma comparação sem nenhum caso em comum também sai com
+código 1.
+
+Uso (na raiz do repositório):
+    python -m benchmarks.bench_generation -o resultados.json
+    python -m benchmarks.bench_generation --quick --compare base.json
+    python -m benchmarks.bench_generation --input novo.json --compare base.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from src.art_processor import generate_pixel_art
+from src.color_matching import DEFAULT_METRIC
+
+DEFAULT_MATRIX = {
+    'sizes': [(512, 512), (1024, 768), (2048, 2048)],
+    'block_sizes': [4, 8, 16],
+    'subjects': [1, 4, 8],
+    'palette_sizes': [4, 32, 256],
+    'kinds': ['gradient', 'noise'],
+    'metrics': [DEFAULT_METRIC],
+}
+QUICK_MATRIX = {
+    'sizes': [(256, 256), (512, 384)],
+    'block_sizes': [4, 8],
+    'subjects': [1, 4],
+    'palette_sizes': [4, 64],
+    'kinds': ['gradient', 'noise'],
+    'metrics': [DEFAULT_METRIC],
+}
+DEFAULT_REPEAT = 3
+# Um caso é regressão se ficar mais de 15% mais lento que a linha de base.
+DEFAULT_THRESHOLD = 0.15
+
+
+def make_image(width, height, kind='gradient', seed=0):
+    """Imagem RGBA sintética: 'gradient' (suave, com alfa variável) ou 'noise' (aleatória)."""
+    if kind == 'noise':
+        rng = np.random.default_rng(seed)
+        return Image.fromarray(rng.integers(0, 256, (height, width, 4), dtype=np.uint8), 'RGBA')
+    if kind != 'gradient':
+        raise ValueError(f"Tipo de imagem desconhecido: '{kind}'. Use 'gradient' ou 'noise'.")
+    y, x = np.mgrid[0:height, 0:width].astype(np.float64)
+    x /= max(1, width - 1)
+    y /= max(1, height - 1)
+    rgba = np.stack([x, y, 1.0 - (x + y) * 0.5, 0.5 + 0.5 * np.sin(x * np.pi)], axis=-1)
+    return Image.fromarray(np.round(rgba * 255).astype(np.uint8), 'RGBA')
+
+
+def make_masks(count, out_size, seed=0):
+    """`count` mapas de segmentação com elipses aleatórias (podem se sobrepor).
+
+    Returns:
+        dict[str, PIL.Image]: {assunto: mapa RGBA (out_w x out_h)}.
+    """
+    out_w, out_h = out_size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:out_h, 0:out_w]
+    maps = {}
+    for index in range(count):
+        alpha = np.zeros((out_h, out_w), dtype=np.uint8)
+        for _ in range(3):
+            cx, cy = rng.uniform(0, out_w), rng.uniform(0, out_h)
+            rx, ry = rng.uniform(0.05, 0.3) * out_w, rng.uniform(0.05, 0.3) * out_h
+            alpha[((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 <= 1.0] = 255
+        rgba = np.zeros((out_h, out_w, 4), dtype=np.uint8)
+        rgba[..., 3] = alpha
+        maps[f"assunto_{index:02d}"] = Image.fromarray(rgba, 'RGBA')
+    return maps
+
+
+def make_palettes(subjects, size, seed=0):
+    """Uma paleta aleatória de `size` cores por assunto."""
+    rng = np.random.default_rng(seed)
+    return {subject: [f"#{int(c):06X}" for c in rng.integers(0, 1 << 24, size)] for subject in subjects}
+
+
+def case_id(case):
+    w, h = case['size']
+    base = f"{case['kind']}-{w}x{h}-b{case['block_size']}-s{case['subjects']}-p{case['palette_size']}"
+    # A métrica padrão não entra no id, para comparar com linhas de base antigas.
+    metric = case.get('metric', DEFAULT_METRIC)
+    return base if metric == DEFAULT_METRIC else f"{base}-{metric}"
+
+
+def build_cases(matrix):
+    """Combinações válidas da matriz (o tamanho da imagem precisa ser divisível pelo bloco)."""
+    cases = []
+    for size, block_size, subjects, palette_size, kind, metric in itertools.product(
+            matrix['sizes'], matrix['block_sizes'], matrix['subjects'],
+            matrix['palette_sizes'], matrix['kinds'], matrix.get('metrics', [DEFAULT_METRIC])):
+        if size[0] % block_size or size[1] % block_size:
+            continue
+        cases.append({'size': tuple(size), 'block_size': block_size, 'subjects': subjects,
+                      'palette_size': palette_size, 'kind': kind, 'metric': metric})
+    return cases
+
+
+def run_case(case, repeat=DEFAULT_REPEAT, seed=0):
+    """Mede um caso; as entradas são geradas fora do tempo medido."""
+    width, height = case['size']
+    bs = case['block_size']
+    image = make_image(width, height, case['kind'], seed=seed)
+    maps = make_masks(case['subjects'], (width // bs, height // bs), seed=seed)
+    palettes = make_palettes(maps, case['palette_size'], seed=seed)
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pixel_art(image, maps, palettes, bs, metric=case['metric'],
+                               progress=lambda fraction, stage: None)
+        times.append(time.perf_counter() - start)
+    blocks = (width // bs) * (height // bs)
+    best = min(times)
+    return {
+        'id': case_id(case),
+        **{k: (list(v) if isinstance(v, tuple) else v) for k, v in case.items()},
+        'blocks': blocks,
+        'seconds_min': round(best, 6),
+        'seconds_median': round(statistics.median(times), 6),
+        'blocks_per_second': round(blocks / best, 1) if best > 0 else None,
+    }
+
+
+def environment_info():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run_suite(matrix, repeat=DEFAULT_REPEAT, seed=0, log=None):
+    cases = build_cases(matrix)
+    results = []
+    for index, case in enumerate(cases, 1):
+        result = run_case(case, repeat=repeat, seed=seed)
+        results.append(result)
+        if log is not None:
+            log(f"[{index}/{len(cases)}] {result['id']}: {result['seconds_min']:.4f} s")
+    return {'environment': environment_info(), 'repeat': repeat, 'results': results}
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Compara dois resultados por id de caso (usando o menor tempo de cada).
+
+    Returns:
+        list[dict]: Um registro por caso em comum, com 'ratio' (atual / base) e
+            'regression' (True se ratio > 1 + threshold).
+    """
+    base_by_id = {r['id']: r for r in baseline.get('results', [])}
+    report = []
+    for result in current.get('results', []):
+        base = base_by_id.get(result['id'])
+        if base is None or not base.get('seconds_min'):
+            continue
+        ratio = result['seconds_min'] / base['seconds_min']
+        report.append({
+            'id': result['id'],
+            'baseline': base['seconds_min'],
+            'current': result['seconds_min'],
+            'ratio': round(ratio, 4),
+            'regression': ratio > 1.0 + threshold,
+        })
+    return report
+
+
+def unmatched_cases(current, baseline):
+    """Casos que `compare_results` não compara.
+
+    Returns:
+        tuple[list[str], list[str]]: (ids só do resultado atual, ou sem tempo válido na
+            linha de base; ids só da linha de base).
+    """
+    base_by_id = {r['id']: r for r in baseline.get('results', [])}
+    current_ids = {r['id'] for r in current.get('results', [])}
+    only_current = [r['id'] for r in current.get('results', [])
+                    if not base_by_id.get(r['id'], {}).get('seconds_min')]
+    only_baseline = [case for case in base_by_id if case not in current_ids]
+    return only_current, only_baseline
+
+
+def _parse_list(text, convert=int):
+    return [convert(item) for item in text.split(',') if item.strip()]
+
+
+def _parse_size(text):
+    w, sep, h = text.lower().partition('x')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"tamanho inválido: '{text}' (use LARGURAxALTURA)")
+    return int(w), int(h)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_generation',
+                                     description="Benchmark de generate_pixel_art com entradas sintéticas.")
+    parser.add_argument('-o', '--output', help="Grava os resultados JSON neste arquivo.")
+    parser.add_argument('--quick', action='store_true', help="Matriz reduzida (verificação rápida).")
+    parser.add_argument('--sizes', help="Tamanhos de imagem, ex: 512x512,2048x2048.")
+    parser.add_argument('--block-sizes', help="Tamanhos de bloco, ex: 4,8,16.")
+    parser.add_argument('--subjects', help="Quantidades de assuntos, ex: 1,4,8.")
+    parser.add_argument('--palette-sizes', help="Tamanhos de paleta, ex: 4,32,256.")
+    parser.add_argument('--kinds', help="Tipos de imagem: gradient,noise.")
+    parser.add_argument('--metrics', help="Métricas de cor, ex: ciede2000,oklab.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Execuções por caso (vale o menor tempo).")
+    parser.add_argument('--seed', type=int, default=0, help="Semente das entradas sintéticas.")
+    parser.add_argument('--input', help="Usa resultados já gravados em vez de executar.")
+    parser.add_argument('--compare', help="Linha de base JSON para detectar regressões.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Lentidão relativa tolerada antes de acusar regressão (0.15 = 15%%).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    log = lambda message: print(message, file=sys.stderr)
+
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        matrix = dict(QUICK_MATRIX if args.quick else DEFAULT_MATRIX)
+        if args.sizes:
+            matrix['sizes'] = _parse_list(args.sizes, _parse_size)
+        if args.block_sizes:
+            matrix['block_sizes'] = _parse_list(args.block_sizes)
+        if args.subjects:
+            matrix['subjects'] = _parse_list(args.subjects)
+        if args.palette_sizes:
+            matrix['palette_sizes'] = _parse_list(args.palette_sizes)
+        if args.kinds:
+            matrix['kinds'] = _parse_list(args.kinds, str.strip)
+        if args.metrics:
+            matrix['metrics'] = _parse_list(args.metrics, str.strip)
+        current = run_suite(matrix, repeat=args.repeat, seed=args.seed, log=log)
+        text = json.dumps(current, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+        elif not args.compare:
+            print(text)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    report = compare_results(current, baseline, threshold=args.threshold)
+    regressions = [r for r in report if r['regression']]
+    for r in report:
+        flag = "REGRESSÃO" if r['regression'] else "ok"
+        print(f"{flag:9s} {r['id']}: {r['baseline']:.4f} s -> {r['current']:.4f} s (x{r['ratio']:.2f})")
+    only_current, only_baseline = unmatched_cases(current, baseline)
+    for case in only_current:
+        print(f"sem base  {case}: ausente da linha de base (não comparado)")
+    for case in only_baseline:
+        print(f"ausente   {case}: está na linha de base, mas não foi executado")
+    print(f"{len(report)} casos comparados, {len(regressions)} regressões "
+          f"(tolerância {args.threshold:.0%}); {len(only_current)} sem base, "
+          f"{len(only_baseline)} ausentes.")
+    if not report:
+        # Matrizes diferentes (ex: --quick contra uma base completa): nada foi verificado.
+        print("Erro: nenhum caso em comum com a linha de base.", file=sys.stderr)
+        return 1
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
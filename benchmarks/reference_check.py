@@ -0,0 +1,139 @@
+"""Self-check of the vectorized color math against colormath (no PyQt imports).
+
+O colormath é só a implementação de referência (requirements-dev.txt).
+Compara `color_space.srgb_to_lab` com a conversão do colormath em cores
+sRGB aleatórias, nos cinzas e nos cantos do cubo, e
+`color_matching.ciede2000_matrix` e `cie94_matrix` em pares Lab
+aleatórios e nos casos de borda do CIEDE2000: Δh' = ±180° exato (o ramo
+em que o sinal de ΔH' depende da ordem dos matizes), cores acromáticas e
+cores iguais. Sai com código 1 se alguma diferença passar da tolerância,
+para uso em verificações antes do merge.
+
+Uso (na raiz do repositório, com `pip install -r requirements-dev.txt`):
+    python -m benchmarks.reference_check
+    python -m benchmarks.reference_check --pairs 20000 --seed 3
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from src.color_matching import ciede2000_matrix, cie94_matrix
+from src.color_space import srgb_to_lab
+
+DEFAULT_PAIRS = 5000
+DEFAULT_COLORS = 5000
+# Diferença absoluta máxima aceita (unidades de Delta E / de Lab).
+DEFAULT_TOLERANCE = 1e-9
+
+
+def _colormath():
+    """Importa o colormath (só a verificação depende dele)."""
+    # O colormath 3.0 usa numpy.asscalar, removido nas versões recentes do NumPy.
+    if not hasattr(np, 'asscalar'):
+        np.asscalar = lambda x: x.item()
+    import colormath.color_objects
+    import colormath.color_conversions
+    import colormath.color_diff
+    return colormath
+
+
+def rgb_to_lab(rgb_tuple):
+    """Converte uma tupla (R, G, B) (0-255) para um objeto LabColor do colormath (D65)."""
+    colormath = _colormath()
+    r, g, b = (float(c) / 255.0 for c in rgb_tuple)
+    srgb = colormath.color_objects.sRGBColor(r, g, b)
+    return colormath.color_conversions.convert_color(srgb, colormath.color_objects.LabColor)
+
+
+def get_color_diff(lab1, lab2):
+    """Delta E 2000 entre dois objetos LabColor, pelo colormath."""
+    return _colormath().color_diff.delta_e_cie2000(lab1, lab2)
+
+
+def sample_colors(count, seed=0):
+    """Cores sRGB uint8 (N, 3): aleatórias, os 256 cinzas e os 8 cantos do cubo."""
+    rng = np.random.default_rng(seed)
+    gray = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    corners = np.array([[r, g, b] for r in (0, 255) for g in (0, 255) for b in (0, 255)], dtype=np.uint8)
+    return np.concatenate([rng.integers(0, 256, (count, 3), dtype=np.uint8), gray, corners])
+
+
+def check_lab_conversion(count=DEFAULT_COLORS, seed=0):
+    """Maior diferença absoluta (por canal) entre `srgb_to_lab` e o colormath."""
+    rgb = sample_colors(count, seed)
+    reference = np.array([rgb_to_lab(c).get_value_tuple() for c in rgb], dtype=np.float64)
+    return float(np.max(np.abs(srgb_to_lab(rgb) - reference)))
+
+
+def random_lab_pairs(count, seed=0):
+    """Pares Lab aleatórios (dentro e um pouco além da gama sRGB) mais os casos de borda.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (lab1 (N, 3), lab2 (N, 3)) float64.
+    """
+    rng = np.random.default_rng(seed)
+    lab1 = np.column_stack([rng.uniform(0, 100, count), rng.uniform(-128, 128, count), rng.uniform(-128, 128, count)])
+    lab2 = np.column_stack([rng.uniform(0, 100, count), rng.uniform(-128, 128, count), rng.uniform(-128, 128, count)])
+    # Δh' = ±180° exato: b = 0 com a' de sinais opostos (h' = 0 e h' = 180°), nas duas ordens.
+    a = rng.uniform(1, 100, 64)
+    opposite1 = np.column_stack([rng.uniform(0, 100, 64), a, np.zeros(64)])
+    opposite2 = np.column_stack([rng.uniform(0, 100, 64), -rng.uniform(1, 100, 64), np.zeros(64)])
+    # Acromáticas (a = b = 0) e cores iguais.
+    gray = np.column_stack([rng.uniform(0, 100, 16), np.zeros(16), np.zeros(16)])
+    same = lab1[:16]
+    lab1 = np.concatenate([lab1, opposite1, opposite2, gray, same, gray])
+    lab2 = np.concatenate([lab2, opposite2, opposite1, gray[::-1], same, lab2[:16]])
+    return lab1, lab2
+
+
+def reference_delta_e(lab1, lab2, metric):
+    """Delta E de cada par pelo colormath ('ciede2000' ou 'cie94')."""
+    colormath = _colormath()
+    LabColor = colormath.color_objects.LabColor
+    diff = {
+        'ciede2000': get_color_diff,
+        'cie94': colormath.color_diff.delta_e_cie1994,
+    }[metric]
+    return np.array([diff(LabColor(*c1), LabColor(*c2)) for c1, c2 in zip(lab1, lab2)], dtype=np.float64)
+
+
+def check_delta_e(pairs=DEFAULT_PAIRS, seed=0):
+    """Compara as matrizes vetorizadas com o colormath, par a par.
+
+    Returns:
+        dict[str, float]: {métrica: maior diferença absoluta}; o par i de `lab1` é
+            comparado só com o par i de `lab2` (a diagonal da matriz).
+    """
+    lab1, lab2 = random_lab_pairs(pairs, seed)
+    errors = {}
+    for metric, matrix in (('ciede2000', ciede2000_matrix), ('cie94', cie94_matrix)):
+        # Candidatos por linha (N, 1, 3): só a diagonal, sem montar a matriz N x N.
+        ours = matrix(lab1, lab2[:, None, :])[:, 0]
+        errors[metric] = float(np.max(np.abs(ours - reference_delta_e(lab1, lab2, metric))))
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.reference_check',
+                                     description="Confere as métricas vetorizadas contra o colormath.")
+    parser.add_argument('--pairs', type=int, default=DEFAULT_PAIRS, help="Pares Lab aleatórios.")
+    parser.add_argument('--colors', type=int, default=DEFAULT_COLORS, help="Cores sRGB aleatórias (conversão Lab).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Diferença máxima aceita.")
+    args = parser.parse_args(argv)
+
+    errors = {'srgb_to_lab': check_lab_conversion(args.colors, args.seed)}
+    errors.update(check_delta_e(args.pairs, args.seed))
+    failed = False
+    for metric, error in errors.items():
+        ok = error <= args.tolerance
+        failed |= not ok
+        print(f"{metric}: diferença máxima {error:.3g} ({'ok' if ok else 'FALHOU'})")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,5 +2,23 @@ __all__ = [
     'main_window',
     'stylesheet',
     'palette_processor',
+    'palette_extraction',
+    'sprite_export',
+    'project_file',
     'art_processor',
+    'block_reduction',
+    'color_space',
+    'color_matching',
+    'dithering',
+    'indexed_output',
+    'label_map',
+    'map_loading',
+    'palette_lut',
+    'tiled_render',
+    'block_cache',
+    'disk_cache',
+    'image_strips',
+    'instrumentation',
+    'cancellation',
+    'cli',
 ]
@@ -0,0 +1,8 @@
+"""Entry point for `python -m src` (headless CLI, no PyQt)."""
+
+import sys
+
+from src.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
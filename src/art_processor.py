@@ -1,24 +1,36 @@
 """Pixel art generation routines (pure processing code).
 
 Este módulo implementa o algoritmo de processamento principal.
-Depende de: PIL, numpy, colormath
+Depende de: numpy (o colormath é só a referência de `benchmarks.reference_check`)
 """
 
+import os
+import threading
+
 import numpy as np
-from PIL import Image
-from colormath.color_objects import sRGBColor, LabColor
-from colormath.color_conversions import convert_color
-from colormath.color_diff import delta_e_cie2000
-
-# Compatibility shim: older colormath versions expect numpy.asscalar which
-# was removed in recent NumPy. Provide a small fallback.
-if not hasattr(np, 'asscalar'):
-    def _asscalar(x):
-        try:
-            return x.item()
-        except Exception:
-            return x
-    np.asscalar = _asscalar
+
+from src.block_cache import compute_block_stats
+from src.cancellation import check_cancelled
+from src.color_space import hex_list_to_rgb_array
+from src.color_matching import (
+    nearest_palette_indices, metric_coordinates, block_coordinates, check_metric,
+    DEFAULT_CHUNK_SIZE, DEFAULT_METRIC,
+)
+from src.dithering import apply_dithering, dither_label, label_dither_modes, check_dither_mode, DEFAULT_DITHER
+from src.image_strips import ImageStripReader
+from src.indexed_output import IndexedPixelArt, build_global_palette
+from src.instrumentation import stage
+from src.label_map import build_label_map, group_by_label, FALLBACK_LABEL
+from src.palette_lut import apply_palette_lut
+from src.tiled_render import render_band, render_bands_parallel
+
+# Linhas de saída processadas por faixa (granularidade de progresso/cancelamento).
+DEFAULT_BAND_ROWS = 32
+# No modo streaming cada faixa tem poucas linhas de blocos (4 * block_size linhas da
+# fonte): memória proporcional a largura × block_size sem pagar o custo fixo por faixa.
+STREAM_BAND_ROWS = 4
+# Lado máximo (em blocos) da pré-visualização rápida de um assunto.
+PREVIEW_MAX_SIDE = 96
 
 
 def hex_to_rgb(hex_str):
@@ -27,134 +39,510 @@ def hex_to_rgb(hex_str):
     return tuple(int(hex_str[i:i+2], 16) for i in (0, 2, 4))
 
 
-def rgb_to_lab(rgb_tuple):
-    """Converte uma tupla (R, G, B) (0-255) ou floats para um objeto LabColor."""
-    r, g, b = rgb_tuple
-    try:
-        rn = float(r) / 255.0
-        gn = float(g) / 255.0
-        bn = float(b) / 255.0
-    except Exception:
-        rn, gn, bn = r, g, b
-    srgb = sRGBColor(rn, gn, bn)
-    return convert_color(srgb, LabColor)
-
-
-def get_color_diff(lab1, lab2):
-    """Calcula a diferença perceptual (Delta E 2000) entre duas cores Lab."""
-    return delta_e_cie2000(lab1, lab2)
-
-
-def generate_pixel_art(original_image, segmentation_maps, palettes, block_size):
-    """Gera a imagem de pixel art com base nos dados fornecidos.
-
-    Args:
-        original_image: PIL.Image (RGBA) - A imagem original.
-        segmentation_maps: dict[str, PIL.Image] - Dicionário de {assunto: PIL.Image (mapa)}.
-        palettes: dict[str, list[str]] - Dicionário de {assunto -> ["#RRGGBB", ...]}.
-        block_size: int - O tamanho do "super pixel" (ex: 10).
+def _prepare_palettes(palettes, metric=DEFAULT_METRIC):
+    """Converte as paletas hex em pares (rgb uint8 (K, 3), coordenadas (K, 3) de `metric`).
 
     Returns:
-        PIL.Image: A imagem de pixel art gerada.
+        tuple[dict, tuple]: ({assunto: (rgb, coords)}, (rgb, coords) da paleta combinada).
     """
-    print(f"Iniciando geração: block_size={block_size}")
-    lab_palettes = {}
+    subject_palettes = {}
     for subject, hex_colors in palettes.items():
         if not hex_colors:
             continue
         try:
-            lab_palettes[subject] = [rgb_to_lab(hex_to_rgb(h)) for h in hex_colors]
+            rgb = hex_list_to_rgb_array(hex_colors)
+            subject_palettes[subject] = (rgb, metric_coordinates(rgb, metric))
         except Exception as e:
             print(f"Aviso: Falha ao processar paleta para '{subject}': {e}")
 
-    if not lab_palettes:
+    if not subject_palettes:
         raise ValueError("Nenhuma paleta válida foi processada. Abortando.")
 
-    combined_lab_list = []
     combined_hex_list = []
     for subject, hex_colors in palettes.items():
         if not hex_colors:
             continue
         for h in hex_colors:
             try:
-                combined_lab_list.append(rgb_to_lab(hex_to_rgb(h)))
+                hex_list_to_rgb_array([h])
                 combined_hex_list.append(h)
             except Exception:
                 # ignora entradas inválidas
                 pass
 
-    if not combined_lab_list:
+    if not combined_hex_list:
         raise ValueError("Nenhuma cor disponível nas paletas para fallback.")
+    combined_rgb = hex_list_to_rgb_array(combined_hex_list)
+    return subject_palettes, (combined_rgb, metric_coordinates(combined_rgb, metric))
 
-    original_array = np.array(original_image.convert('RGBA'))
-    orig_h, orig_w, _ = original_array.shape
 
-    seg_arrays = {}
-    for subject, img in segmentation_maps.items():
-        map_w, map_h = img.size
-        if map_w != (orig_w // block_size) or map_h != (orig_h // block_size):
-            raise ValueError(f"Mapa '{subject}' tem dimensões erradas ({map_w}x{map_h}). Esperado ({orig_w // block_size}x{orig_h // block_size})")
-        seg_arrays[subject] = np.array(img.convert('RGBA'))[:, :, 3]
+def _label_palettes(subjects, subject_palettes, combined):
+    """Monta a paleta de cada rótulo e o remapeamento dos assuntos sem paleta.
 
-    out_w = orig_w // block_size
-    out_h = orig_h // block_size
-    output_image = Image.new('RGBA', (out_w, out_h))
-    output_pixels = output_image.load()
+    Returns:
+        tuple[list, np.ndarray]: (paleta (rgb, lab) por rótulo, tabela rótulo -> rótulo efetivo).
+    """
+    label_palettes = [combined]
+    label_remap = np.arange(len(subjects) + 1)
+    for index, subject in enumerate(subjects):
+        if subject in subject_palettes:
+            label_palettes.append(subject_palettes[subject])
+        else:
+            # Assuntos sem paleta válida caem no rótulo da paleta combinada.
+            label_palettes.append(combined)
+            label_remap[index + 1] = FALLBACK_LABEL
+    return label_palettes, label_remap
 
-    print(f"Dimensões de saída: {out_w} x {out_h}")
 
-    for y in range(out_h):
-        for x in range(out_w):
-            current_subject = None
-            for subject, alpha_arr in seg_arrays.items():
-                if alpha_arr[y, x] > 128:
-                    current_subject = subject
-                    break
+def generate_pixel_art(original_image, segmentation_maps, palettes, block_size, reduction='mean',
+                       chunk_size=DEFAULT_CHUNK_SIZE, lut_cache=None, band_rows=None,
+                       progress=None, workers=1, block_cache=None, streaming=False, observer=None,
+                       cancel_token=None, metric=DEFAULT_METRIC, dither=None, indexed=False, prune=False):
+    """Gera a imagem de pixel art com base nos dados fornecidos.
 
-            use_combined = False
-            if current_subject is None or current_subject not in lab_palettes:
-                use_combined = True
+    O motor grava o índice de cada bloco numa paleta global (a união das
+    paletas, sem cores repetidas); a imagem RGBA é montada no fim com uma
+    única consulta a essa paleta.
 
-            y_start, x_start = y * block_size, x * block_size
-            y_end, x_end = y_start + block_size, x_start + block_size
-            block_array = original_array[y_start:y_end, x_start:x_end]
+    Args:
+        original_image: PIL.Image | str - A imagem original (ou o caminho do arquivo).
+        segmentation_maps: dict[str, PIL.Image] - Dicionário de {assunto: PIL.Image (mapa)}.
+        palettes: dict[str, list[str]] - Dicionário de {assunto -> ["#RRGGBB", ...]}.
+        block_size: int - O tamanho do "super pixel" (ex: 10).
+        reduction: str - Modo de redução dos blocos (ver `block_reduction.REDUCTION_MODES`).
+        chunk_size: int - Blocos por lote na matriz de distâncias (limita o pico de memória).
+        lut_cache: palette_lut.PaletteLUTCache | None - Se fornecido, casa as cores
+            pelas LUTs RGB -> índice da paleta (aproximação quantizada, reutilizável).
+        band_rows: int | None - Linhas de saída processadas por faixa (padrão:
+            DEFAULT_BAND_ROWS, ou STREAM_BAND_ROWS no modo streaming).
+        progress: callable(float, str) | None - Chamado entre faixas com (fração, etapa).
+            Pode levantar `GenerationCancelled` para interromper a geração.
+        workers: int | None - Processos usados na renderização por faixas. 1 (padrão)
+            roda no processo atual; None usa todos os núcleos. A saída é idêntica.
+        block_cache: block_cache.BlockStatsCache | None - Se fornecido, as cores
+            reduzidas dos blocos vêm do cache (chave: conteúdo da imagem, block_size e
+            modo) e só o casamento é refeito, no processo atual.
+        streaming: bool - Lê a fonte faixa por faixa (`ImageStripReader`) em vez de
+            convertê-la inteira para RGBA; o pico de memória passa a ser proporcional a
+            largura × band_rows × block_size. Implícito quando `original_image` é um
+            caminho. Roda sempre no processo atual.
+        observer: instrumentation.GenerationObserver | None - Recebe o início e o fim
+            de cada etapa (ver `instrumentation.STAGES`); None não mede nada.
+        cancel_token: cancellation.CancellationToken | None - Verificado entre faixas;
+            se cancelado, levanta `GenerationCancelled` e descarta os buffers.
+        metric: str - Métrica de distância de cor (ver `color_matching.METRICS`);
+            o padrão 'ciede2000' reproduz o resultado original.
+        dither: str | dict[str, str] | None - Pontilhado (ver `dithering.DITHER_MODES`):
+            um modo para todos os blocos ou {assunto: modo}. Com pontilhado, as cores
+            dos blocos são reduzidas antes, no processo atual.
+        indexed: bool - Devolve o `IndexedPixelArt` (índices + paleta global) em vez
+            da imagem RGBA (ex: para gravar PNG indexado).
+        prune: bool - Nas métricas não euclidianas, reavalia só os vizinhos
+            euclidianos mais próximos em paletas grandes (mais rápido, mas aproximado;
+            ver `color_matching.PaletteIndex`). O padrão é o casamento exato.
 
-            try:
-                block_image = Image.fromarray(block_array, 'RGBA').convert('RGB')
-            except Exception as e:
-                print(f"Aviso: Falha ao criar imagem do bloco (x={x}, y={y}): {e}")
-                output_pixels[x, y] = (0, 0, 0, 0)
-                continue
+    Returns:
+        PIL.Image | indexed_output.IndexedPixelArt: A imagem de pixel art gerada.
 
-            quantized_block = block_image.quantize(colors=1)
-            palette = quantized_block.getpalette()
-            if not palette:
-                output_pixels[x, y] = (0, 0, 0, 0)
-                continue
+    Raises:
+        GenerationCancelled: Se `cancel_token` for cancelado durante a geração.
+    """
+    print(f"Iniciando geração: block_size={block_size}")
+    check_metric(metric)
+    with stage(observer, 'palette_prep', len(palettes)):
+        subject_palettes, combined = _prepare_palettes(palettes, metric)
 
-            dominant_rgb_tuple = tuple(palette[0:3])
-            target_lab_color = rgb_to_lab(dominant_rgb_tuple)
+    streaming = streaming or isinstance(original_image, (str, os.PathLike))
+    if streaming:
+        source = ImageStripReader(original_image)
+        orig_w, orig_h = source.size
+        if workers != 1:
+            print("Aviso: o modo streaming roda em um único processo; 'workers' foi ignorado.")
+            workers = 1
+    else:
+        with stage(observer, 'decode'):
+            source = np.array(original_image.convert('RGBA'))
+        orig_h, orig_w, _ = source.shape
+    try:
+        out_w = orig_w // block_size
+        out_h = orig_h // block_size
 
-            if use_combined:
-                target_palette_lab = combined_lab_list
-                original_palette_hex = combined_hex_list
-            else:
-                target_palette_lab = lab_palettes[current_subject]
-                original_palette_hex = palettes[current_subject]
+        print(f"Dimensões de saída: {out_w} x {out_h}")
 
-            min_diff = float('inf')
-            best_color_hex = "#000000"
-            for i, pal_lab in enumerate(target_palette_lab):
-                diff = get_color_diff(target_lab_color, pal_lab)
-                if diff < min_diff:
-                    min_diff = diff
-                    best_color_hex = original_palette_hex[i]
+        with stage(observer, 'label_build', out_w * out_h):
+            raw_labels, subjects = build_label_map(segmentation_maps, (out_w, out_h))
+            label_palettes, label_remap = _label_palettes(subjects, subject_palettes, combined)
+            labels = label_remap.astype(raw_labels.dtype)[raw_labels]
+            global_rgb, palette_maps = build_global_palette(label_palettes)
+        label_modes = label_dither_modes(dither, subjects)
+        dithered = any(mode != DEFAULT_DITHER for mode in label_modes)
 
-            best_rgb_tuple = hex_to_rgb(best_color_hex)
-            output_pixels[x, y] = (int(best_rgb_tuple[0]), int(best_rgb_tuple[1]), int(best_rgb_tuple[2]), 255)
+        label_luts = None
+        if lut_cache is not None:
+            label_luts = [lut_cache.get(palette_rgb, metric) for palette_rgb, _ in label_palettes]
 
-        if out_h > 0 and y % max(1, (out_h // 10)) == 0:
-            print(f"Progresso: {int((y / out_h) * 100)}%")
+        block_stats = None
+        if block_cache is not None:
+            block_stats = block_cache.get_or_compute(source, block_size, reduction, progress=progress,
+                                                     observer=observer, cancel_token=cancel_token)
 
+        if band_rows is None:
+            band_rows = STREAM_BAND_ROWS if streaming else DEFAULT_BAND_ROWS
+        band_rows = max(1, int(band_rows))
+        band_labels, band_palettes = labels, label_palettes
+        if dithered:
+            # A difusão de erro percorre a grade inteira: reduz os blocos antes de casar.
+            if block_stats is None:
+                block_stats = compute_block_stats(source, block_size, reduction, progress=progress,
+                                                  observer=observer, cancel_token=cancel_token)
+            # Rótulos brutos: o erro não atravessa assuntos que dividem a paleta combinada.
+            band_labels = raw_labels
+            band_palettes = [palette if mode == DEFAULT_DITHER else None
+                             for palette, mode in zip(label_palettes, label_modes)]
+        if block_stats is None and workers != 1 and out_h > band_rows:
+            with stage(observer, 'parallel_render', out_w * out_h):
+                output_indices = render_bands_parallel(
+                    source, labels, block_size, label_palettes, palette_maps, reduction=reduction,
+                    chunk_size=chunk_size, label_luts=label_luts, band_rows=band_rows,
+                    workers=workers, progress=progress, cancel_token=cancel_token, metric=metric,
+                    prune=prune,
+                )
+        else:
+            output_indices = np.zeros((out_h, out_w), dtype=palette_maps[0].dtype)
+            next_report = 0.0
+            for y0 in range(0, out_h, band_rows):
+                y1 = min(out_h, y0 + band_rows)
+                check_cancelled(cancel_token)
+                if block_stats is not None:
+                    rgba_band = None
+                elif streaming:
+                    with stage(observer, 'decode', (y1 - y0) * out_w):
+                        rgba_band = source.read_rows(y0 * block_size, y1 * block_size)
+                else:
+                    rgba_band = source[y0 * block_size:y1 * block_size]
+                output_indices[y0:y1] = render_band(
+                    rgba_band, band_labels[y0:y1], block_size,
+                    band_palettes, palette_maps, reduction=reduction, chunk_size=chunk_size, label_luts=label_luts,
+                    block_stats=None if block_stats is None else (block_stats[0][y0:y1], block_stats[1][y0:y1]),
+                    observer=observer, metric=metric, prune=prune,
+                )
+                fraction = y1 / out_h
+                if progress is not None:
+                    progress(fraction, 'matching')
+                elif fraction >= next_report:
+                    print(f"Progresso: {int(fraction * 100)}%")
+                    next_report = fraction + 0.1
+        if dithered:
+            with stage(observer, 'dithering', out_w * out_h):
+                apply_dithering(output_indices, block_stats[0], raw_labels, label_palettes, palette_maps,
+                                label_modes, metric=metric, chunk_size=chunk_size, progress=progress, cancel_token=cancel_token,
+                                prune=prune)
+    finally:
+        if streaming:
+            source.close()
+
+    art = IndexedPixelArt(output_indices, global_rgb)
+    with stage(observer, 'assembly', out_w * out_h):
+        result = art if indexed else art.to_image()
     print("Geração concluída.")
-    return output_image
+    return result
+
+
+class RenderSession:
+    """Sessão de geração incremental para uma imagem, mapas e block_size fixos.
+
+    Guarda as cores dominantes dos blocos (RGB e Lab), o mapa de rótulos e o
+    resultado do casamento de cada bloco (índice na paleta do seu rótulo, que
+    vira índice global na montagem). Ao chamar `render` com paletas
+    editadas, apenas os blocos dos rótulos cuja paleta efetiva mudou são
+    recalculados (ex: só o assunto editado e os blocos sem assunto, já que a
+    paleta combinada concatena todas as paletas).
+    """
+
+    def __init__(self, original_image, segmentation_maps, block_size, reduction='mean', block_cache=None):
+        self.block_cache = block_cache  # block_cache.BlockStatsCache | None
+        self.original_image = original_image
+        self.segmentation_maps = dict(segmentation_maps)
+        self.block_size = block_size
+        self.reduction = reduction
+        self.last_recomputed_blocks = 0
+        self._block_rgb = None  # (N, 3) uint8
+        self._block_lab = None  # (N, 3) float64
+        self._block_coords = {}  # métrica -> coordenadas (N, 3) dos blocos
+        self._label_groups = None  # índices planos dos blocos de cada rótulo
+        self._subjects = None
+        self._out_size = None  # (out_w, out_h)
+        self._local_indices = None  # (N,) índice de cada bloco na paleta do seu rótulo
+        self._label_signatures = {}  # rótulo -> assinatura da paleta usada
+        self._labels = None  # (out_h, out_w) rótulos brutos
+        self._blocks_lock = threading.Lock()
+
+    def is_valid_for(self, original_image, segmentation_maps, block_size, reduction='mean'):
+        """True se a sessão ainda corresponde às mesmas entradas (por identidade)."""
+        if original_image is not self.original_image or block_size != self.block_size:
+            return False
+        if reduction != self.reduction or list(segmentation_maps) != list(self.segmentation_maps):
+            return False
+        return all(segmentation_maps[k] is self.segmentation_maps[k] for k in segmentation_maps)
+
+    @property
+    def blocks_ready(self):
+        """True se as estatísticas dos blocos já foram calculadas."""
+        return self._block_rgb is not None
+
+    def ensure_blocks(self, progress=None, observer=None, cancel_token=None):
+        """Calcula (uma única vez, com segurança entre threads) blocos e rótulos."""
+        with self._blocks_lock:
+            self._ensure_blocks(progress, observer, cancel_token)
+
+    def _ensure_blocks(self, progress=None, observer=None, cancel_token=None):
+        if self._block_rgb is not None:
+            return
+        # Lida por faixas: não mantém uma segunda cópia RGBA da imagem inteira, e uma
+        # imagem ainda não carregada (`image_strips.open_image`) é lida do arquivo.
+        with ImageStripReader(self.original_image) as source:
+            orig_w, orig_h = source.size
+            bs = self.block_size
+            out_w, out_h = orig_w // bs, orig_h // bs
+            with stage(observer, 'label_build', out_w * out_h):
+                labels, subjects = build_label_map(self.segmentation_maps, (out_w, out_h))
+            if self.block_cache is not None:
+                block_rgb, block_lab = self.block_cache.get_or_compute(source, bs, self.reduction, progress=progress,
+                                                                       observer=observer, cancel_token=cancel_token)
+            else:
+                block_rgb, block_lab = compute_block_stats(source, bs, self.reduction, progress=progress,
+                                                           observer=observer, cancel_token=cancel_token)
+        self._block_lab = block_lab.reshape(-1, 3)
+        self._block_coords = {}
+        self._labels = labels
+        self._label_groups = group_by_label(labels, len(subjects) + 1)
+        self._subjects = subjects
+        self._out_size = (out_w, out_h)
+        self._local_indices = np.zeros(out_w * out_h, dtype=np.int32)
+        self._label_signatures = {}
+        # Atribuído por último: `blocks_ready` só fica True com tudo pronto.
+        self._block_rgb = block_rgb.reshape(-1, 3)
+
+    def state(self):
+        """Estado calculado da sessão, para gravar num projeto (ver `project_file`).
+
+        Returns:
+            dict | None: Arrays (estatísticas dos blocos, rótulos, índices locais) e
+                metadados serializáveis em JSON; None se os blocos ainda não foram calculados.
+        """
+        if not self.blocks_ready:
+            return None
+        return {
+            'block_rgb': self._block_rgb,
+            'block_lab': self._block_lab,
+            'labels': self._labels,
+            'local_indices': self._local_indices,
+            'subjects': list(self._subjects),
+            'out_size': list(self._out_size),
+            'label_signatures': [[label, mode, metric, palette.hex(), dither]
+                                 for label, (mode, metric, palette, dither) in self._label_signatures.items()],
+        }
+
+    @classmethod
+    def from_state(cls, original_image, segmentation_maps, block_size, state, reduction='mean', block_cache=None):
+        """Recria uma sessão a partir de `state()` sem recalcular blocos nem casamentos.
+
+        Os arrays são usados como recebidos (ex: mapeados em memória); `local_indices`
+        precisa ser gravável, pois as próximas gerações o atualizam no lugar.
+
+        Raises:
+            ValueError: Se o estado não corresponder à imagem, aos mapas ou ao block_size.
+        """
+        session = cls(original_image, segmentation_maps, block_size, reduction=reduction, block_cache=block_cache)
+        out_w, out_h = state['out_size']
+        orig_w, orig_h = original_image.size
+        n_blocks = out_w * out_h
+        if (orig_w // block_size, orig_h // block_size) != (out_w, out_h):
+            raise ValueError(f"Estado da sessão para {out_w}x{out_h} blocos não corresponde à imagem "
+                             f"{orig_w}x{orig_h} com block_size={block_size}.")
+        if list(state['subjects']) != list(segmentation_maps):
+            raise ValueError("Estado da sessão não corresponde aos mapas de segmentação.")
+        labels = state['labels']
+        if labels.shape != (out_h, out_w) or {len(state['block_rgb']), len(state['local_indices'])} != {n_blocks}:
+            raise ValueError("Estado da sessão com arrays de tamanho inconsistente.")
+        session._block_lab = state['block_lab'].reshape(-1, 3)
+        session._labels = labels
+        session._label_groups = group_by_label(labels, len(state['subjects']) + 1)
+        session._subjects = list(state['subjects'])
+        session._out_size = (out_w, out_h)
+        session._local_indices = state['local_indices']
+        session._label_signatures = {label: (mode, metric, bytes.fromhex(palette), dither)
+                                     for label, mode, metric, palette, dither in state['label_signatures']}
+        session._block_rgb = state['block_rgb'].reshape(-1, 3)
+        return session
+
+    def render(self, palettes, chunk_size=DEFAULT_CHUNK_SIZE, lut_cache=None, progress=None, observer=None,
+               cancel_token=None, metric=DEFAULT_METRIC, dither=None, indexed=False, prune=False):
+        """Gera a pixel art, recalculando só os rótulos cuja paleta (ou pontilhado) mudou.
+
+        Args:
+            palettes: dict[str, list[str]] - {assunto -> ["#RRGGBB", ...]}.
+            chunk_size, lut_cache, observer, cancel_token, metric, dither, indexed, prune: como em
+                `generate_pixel_art` (o token é verificado entre lotes de blocos).
+            progress: callable(float, str) | None - Chamado entre lotes de blocos.
+
+        Returns:
+            PIL.Image | indexed_output.IndexedPixelArt: A imagem de pixel art gerada.
+        """
+        check_metric(metric)
+        with stage(observer, 'palette_prep', len(palettes)):
+            subject_palettes, combined = _prepare_palettes(palettes, metric)
+        self.ensure_blocks(progress, observer, cancel_token)
+        label_palettes, _ = _label_palettes(self._subjects, subject_palettes, combined)
+        label_modes = label_dither_modes(dither, self._subjects)
+
+        if lut_cache is not None:
+            mode = f"lut{lut_cache.bits}"
+        else:
+            mode = 'pruned' if prune else 'exact'
+        pending = []
+        for label, (palette_rgb, palette_coords) in enumerate(label_palettes):
+            signature = (mode, metric, palette_rgb.tobytes(), label_modes[label])
+            if self._label_signatures.get(label) != signature:
+                pending.append((label, signature, palette_rgb, palette_coords, label_modes[label]))
+
+        total = sum(len(self._label_groups[label]) for label, *_ in pending)
+        with stage(observer, 'matching', total):
+            self._match_pending(pending, total, chunk_size, lut_cache, progress, cancel_token, metric, prune)
+
+        self.last_recomputed_blocks = total
+        out_w, out_h = self._out_size
+        print(f"Geração incremental: {total} de {len(self._block_rgb)} blocos recalculados.")
+        with stage(observer, 'assembly', out_w * out_h):
+            global_rgb, global_indices = self._global_indices(label_palettes)
+            art = IndexedPixelArt(global_indices.reshape(out_h, out_w), global_rgb)
+            return art if indexed else art.to_image()
+
+    def _global_indices(self, label_palettes):
+        """Paleta global e índice global de cada bloco (uma consulta às tabelas local -> global concatenadas)."""
+        global_rgb, palette_maps = build_global_palette(label_palettes)
+        offsets = np.cumsum([0] + [len(m) for m in palette_maps[:-1]])
+        table = np.concatenate(palette_maps)
+        return global_rgb, table[offsets[self._labels.reshape(-1)] + self._local_indices]
+
+    def _coordinates(self, metric):
+        """Coordenadas dos blocos para `metric` (calculadas uma vez por métrica)."""
+        coords = self._block_coords.get(metric)
+        if coords is None:
+            coords = block_coordinates(self._block_rgb, self._block_lab, metric)
+            self._block_coords[metric] = coords
+        return coords
+
+    def _match_pending(self, pending, total, chunk_size, lut_cache, progress, cancel_token, metric, prune):
+        done = 0
+        chunk_size = max(1, int(chunk_size))
+        block_coords = self._coordinates(metric) if lut_cache is None else None
+        for label, signature, palette_rgb, palette_coords, dither_mode in pending:
+            block_indices = self._label_groups[label]
+            # Invalida antes de escrever: um cancelamento no meio deixa o rótulo pendente.
+            self._label_signatures.pop(label, None)
+            if dither_mode != DEFAULT_DITHER:
+                self._dither_label(label, dither_mode, palette_rgb, palette_coords, chunk_size, cancel_token, metric,
+                                   prune)
+                done += len(block_indices)
+                if progress is not None:
+                    progress(done / total, 'matching')
+                self._label_signatures[label] = signature
+                continue
+            lut = lut_cache.get(palette_rgb, metric) if lut_cache is not None else None
+            for start in range(0, len(block_indices), chunk_size):
+                check_cancelled(cancel_token)
+                chunk = block_indices[start:start + chunk_size]
+                if lut is not None:
+                    indices = apply_palette_lut(lut, self._block_rgb[chunk])
+                else:
+                    indices = nearest_palette_indices(block_coords[chunk], palette_coords,
+                                                      chunk_size=chunk_size, metric=metric, prune=prune)
+                self._local_indices[chunk] = indices
+                done += len(chunk)
+                if progress is not None:
+                    progress(done / total, 'matching')
+            self._label_signatures[label] = signature
+
+    def _dither_label(self, label, dither_mode, palette_rgb, palette_coords, chunk_size, cancel_token, metric,
+                      prune):
+        out_w, out_h = self._out_size
+        flat, indices = dither_label(self._block_rgb.reshape(out_h, out_w, 3), self._labels, label, dither_mode,
+                                     palette_rgb, palette_coords, metric=metric, chunk_size=chunk_size,
+                                     cancel_token=cancel_token, prune=prune)
+        self._local_indices[flat] = indices
+
+    def preview_subject(self, subject, hex_colors, max_side=PREVIEW_MAX_SIDE,
+                        chunk_size=DEFAULT_CHUNK_SIZE, progress=None, cancel_token=None,
+                        metric=DEFAULT_METRIC, dither=None, prune=False, lut_cache=None):
+        """Renderiza só os blocos de um assunto com uma paleta candidata.
+
+        Usado pela pré-visualização ao vivo dos editores de paleta: recorta a
+        região do assunto e, se `max_side` for dado, amostra a grade com passo
+        fixo para que o maior lado tenha no máximo `max_side` blocos.
+
+        Args:
+            subject: str - Nome do assunto (mapa de segmentação).
+            hex_colors: list[str] - Paleta candidata ["#RRGGBB", ...].
+            max_side: int | None - Lado máximo da grade; None = resolução completa.
+            progress: callable(float, str) | None - Chamado entre lotes; pode levantar
+                `GenerationCancelled` para descartar a pré-visualização.
+            cancel_token: cancellation.CancellationToken | None - Verificado entre lotes.
+            metric: str - Métrica de distância (ver `color_matching.METRICS`).
+            dither: str | None - Modo de pontilhado do assunto (ver `dithering.DITHER_MODES`).
+            prune: bool - Poda aproximada no casamento (ver `generate_pixel_art`).
+            lut_cache: palette_lut.PaletteLUTCache | None - Casa pelas LUTs, como em
+                `render` (os blocos com pontilhado continuam no casamento direto).
+
+        Returns:
+            np.ndarray | None: RGBA (h, w, 4) uint8 da região (fora do assunto fica
+            transparente), ou None se o assunto não tiver blocos.
+        """
+        palette_rgb = hex_list_to_rgb_array(hex_colors)
+        if len(palette_rgb) == 0:
+            raise ValueError("A paleta está vazia ou em formato inválido.")
+        palette_coords = metric_coordinates(palette_rgb, metric)
+        dither = check_dither_mode(dither or DEFAULT_DITHER)
+        self.ensure_blocks(cancel_token=cancel_token)
+        if subject not in self._subjects:
+            raise ValueError(f"Assunto desconhecido: '{subject}'")
+        mask = self._labels == self._subjects.index(subject) + 1
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if len(rows) == 0:
+            return None
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        step = 1
+        if max_side:
+            step = max(1, -(-max(y1 - y0, x1 - x0) // int(max_side)))
+
+        out_w, out_h = self._out_size
+        region_mask = mask[y0:y1:step, x0:x1:step]
+        chunk_size = max(1, int(chunk_size))
+        if dither != DEFAULT_DITHER:
+            region_rgb = self._block_rgb.reshape(out_h, out_w, 3)[y0:y1:step, x0:x1:step]
+            _, indices = dither_label(region_rgb, region_mask, True, dither, palette_rgb, palette_coords,
+                                      metric=metric, chunk_size=chunk_size, origin=(y0, x0),
+                                      progress=progress, cancel_token=cancel_token, prune=prune)
+        else:
+            if lut_cache is not None:
+                lut = lut_cache.get(palette_rgb, metric)
+                region = self._block_rgb.reshape(out_h, out_w, 3)[y0:y1:step, x0:x1:step][region_mask]
+            else:
+                region = self._coordinates(metric).reshape(out_h, out_w, 3)[y0:y1:step, x0:x1:step][region_mask]
+            indices = np.empty(len(region), dtype=np.intp)
+            for start in range(0, len(region), chunk_size):
+                check_cancelled(cancel_token)
+                stop = start + chunk_size
+                if lut_cache is not None:
+                    indices[start:stop] = apply_palette_lut(lut, region[start:stop])
+                else:
+                    indices[start:stop] = nearest_palette_indices(region[start:stop], palette_coords,
+                                                                  chunk_size=chunk_size, metric=metric, prune=prune)
+                if progress is not None:
+                    progress(min(1.0, stop / len(region)), 'preview')
+
+        preview = np.zeros(region_mask.shape + (4,), dtype=np.uint8)
+        preview[region_mask, :3] = palette_rgb[indices]
+        preview[region_mask, 3] = 255
+        return preview
@@ -0,0 +1,223 @@
+"""Content-addressed cache of block statistics (no PyQt imports).
+
+Guarda as cores reduzidas (out_h, out_w, 3) e seus valores Lab para cada
+combinação (hash do conteúdo da imagem, block_size, modo de redução).
+Trocar o fator de escala e voltar, ou recarregar a mesma imagem, reutiliza
+o resultado em vez de recalcular. O cache em memória é LRU com limite de
+bytes; opcionalmente as entradas removidas da memória vão para o disco.
+O mesmo cache (`default_block_cache`) é usado pela GUI e pela CLI.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.block_reduction import reduce_blocks
+from src.cancellation import check_cancelled
+from src.color_space import srgb_to_lab
+from src.disk_cache import default_cache_root, write_atomic, evict_lru_files, remove_quietly
+from src.image_strips import ImageStripReader
+from src.instrumentation import stage
+
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+
+# Linhas lidas por vez ao calcular o hash de uma fonte em faixas.
+_HASH_STRIP_ROWS = 256
+
+
+def image_content_hash(rgba_array):
+    """Hash do conteúdo (formato + pixels) de um array RGBA.
+
+    Também aceita um `ImageStripReader`: arquivos são identificados pelos
+    bytes do arquivo; imagens em memória, pelos pixels RGBA lidos por faixas
+    (mesmo hash do array completo).
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(rgba_array, ImageStripReader):
+        reader = rgba_array
+        if reader.path is not None:
+            digest.update(b"file:")
+            with open(reader.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        width, height = reader.size
+        digest.update(f"{(height, width, 4)}:{np.dtype(np.uint8).str}:".encode('ascii'))
+        for _, strip in reader.iter_strips(_HASH_STRIP_ROWS):
+            digest.update(memoryview(np.ascontiguousarray(strip)).cast('B'))
+        return digest.hexdigest()
+    rgba_array = np.ascontiguousarray(rgba_array)
+    digest.update(f"{rgba_array.shape}:{rgba_array.dtype.str}:".encode('ascii'))
+    digest.update(memoryview(rgba_array).cast('B'))
+    return digest.hexdigest()
+
+
+def block_stats_key(image_hash, block_size, reduction):
+    return f"{image_hash}-{int(block_size)}-{reduction}"
+
+
+def compute_block_stats(rgba_array, block_size, reduction='mean', band_rows=32, progress=None, observer=None,
+                        cancel_token=None):
+    """Reduz a imagem por faixas e converte para Lab.
+
+    Args:
+        rgba_array: np.ndarray (H, W, 4) | ImageStripReader - A imagem original; com um
+            leitor, só uma faixa de `band_rows * block_size` linhas fica em memória.
+        observer: instrumentation.GenerationObserver | None - Recebe as etapas
+            'decode' (só com leitor), 'reduction' e 'color_conversion'.
+        cancel_token: cancellation.CancellationToken | None - Verificado antes de cada faixa.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (rgb (out_h, out_w, 3) uint8, lab (out_h, out_w, 3) float64).
+    """
+    if isinstance(rgba_array, ImageStripReader):
+        width, height = rgba_array.size
+        read_rows = rgba_array.read_rows
+    else:
+        height, width = rgba_array.shape[:2]
+        read_rows = lambda r0, r1: rgba_array[r0:r1]
+    out_h, out_w = height // block_size, width // block_size
+    rgb = np.empty((out_h, out_w, 3), dtype=np.uint8)
+    streaming = isinstance(rgba_array, ImageStripReader)
+    for y0 in range(0, out_h, band_rows):
+        y1 = min(out_h, y0 + band_rows)
+        check_cancelled(cancel_token)
+        with stage(observer if streaming else None, 'decode', (y1 - y0) * out_w):
+            band = read_rows(y0 * block_size, y1 * block_size)
+        with stage(observer, 'reduction', (y1 - y0) * out_w):
+            rgb[y0:y1] = reduce_blocks(band, block_size, mode=reduction)
+        if progress is not None:
+            progress(y1 / out_h, 'reduction')
+    with stage(observer, 'color_conversion', out_h * out_w):
+        lab = srgb_to_lab(rgb)
+    return rgb, lab
+
+
+class BlockStatsCache:
+    """Cache LRU de (rgb, lab) reduzidos, com spill opcional para disco."""
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BYTES, spill_dir=None, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # chave -> (rgb, lab)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self):
+        return self._bytes
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.npz")
+
+    def _spill(self, key, rgb, lab):
+        if not self.spill_dir or os.path.exists(self._spill_path(key)):
+            return
+        try:
+            write_atomic(self.spill_dir, f"{key}.npz", lambda f: np.savez(f, rgb=rgb, lab=lab))
+            evict_lru_files(self.spill_dir, self.max_disk_bytes, '.npz')
+        except Exception as e:
+            print(f"Aviso: não foi possível gravar estatísticas de blocos em disco: {e}")
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with np.load(path) as data:
+                entry = (data['rgb'], data['lab'])
+            os.utime(path, None)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Aviso: estatísticas de blocos corrompidas em cache ('{path}'): {e}")
+            remove_quietly(path)
+            return None
+
+    def get(self, key):
+        """Retorna (rgb, lab) ou None; entradas do disco voltam para a memória."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._load_spilled(key)
+        if entry is not None:
+            self.put(key, *entry)
+        return entry
+
+    def put(self, key, rgb, lab):
+        """Armazena uma entrada, removendo as menos usadas além do limite de memória."""
+        # Entradas são compartilhadas entre chamadores: protege contra escrita acidental.
+        rgb.flags.writeable = False
+        lab.flags.writeable = False
+        spilled = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes + old[1].nbytes
+            self._entries[key] = (rgb, lab)
+            self._bytes += rgb.nbytes + lab.nbytes
+            # A entrada recém-inserida nunca é removida, mesmo acima do limite.
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_rgb, old_lab) = self._entries.popitem(last=False)
+                self._bytes -= old_rgb.nbytes + old_lab.nbytes
+                spilled.append((old_key, old_rgb, old_lab))
+        for old_key, old_rgb, old_lab in spilled:
+            self._spill(old_key, old_rgb, old_lab)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_or_compute(self, rgba_array, block_size, reduction='mean', progress=None, image_hash=None,
+                       observer=None, cancel_token=None):
+        """Retorna as estatísticas dos blocos, calculando e guardando se necessário.
+
+        Args:
+            rgba_array: np.ndarray (H, W, 4) uint8 | ImageStripReader - A imagem original.
+            image_hash: str | None - Hash já calculado de `rgba_array` (evita refazer).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (rgb (out_h, out_w, 3), lab (out_h, out_w, 3)).
+        """
+        key = block_stats_key(image_hash or image_content_hash(rgba_array), block_size, reduction)
+        entry = self.get(key)
+        if entry is None:
+            entry = compute_block_stats(rgba_array, block_size, reduction, progress=progress, observer=observer,
+                                        cancel_token=cancel_token)
+            self.put(key, *entry)
+        return entry
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_block_cache():
+    """Cache compartilhado do processo (GUI e CLI).
+
+    Com `PIXELMAKER_BLOCK_SPILL=1` as entradas removidas da memória são
+    gravadas em `<cache>/blocks`.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            spill_dir = None
+            if os.environ.get('PIXELMAKER_BLOCK_SPILL') == '1':
+                spill_dir = os.path.join(default_cache_root(), 'blocks')
+            _default_cache = BlockStatsCache(spill_dir=spill_dir)
+        return _default_cache
@@ -0,0 +1,101 @@
+"""Block reduction stage (pure NumPy, no PyQt imports).
+
+Calcula a cor representativa de cada bloco `block_size x block_size` da
+imagem original em uma única passada vetorizada, substituindo o antigo
+`Image.fromarray(...).quantize(colors=1)` executado por bloco.
+"""
+
+import numpy as np
+
+REDUCTION_MODES = ('mean', 'median', 'alpha_weighted', 'mode')
+
+
+def _round_half_up(values):
+    """Arredonda como o median cut do PIL (x.5 -> para cima) e converte para uint8."""
+    return np.clip(np.floor(values + 0.5), 0, 255).astype(np.uint8)
+
+
+def _block_view(rgba_array, block_size):
+    """Retorna uma view (out_h, out_w, bs*bs, 4) dos blocos, descartando as bordas."""
+    h, w = rgba_array.shape[:2]
+    out_h, out_w = h // block_size, w // block_size
+    cropped = rgba_array[:out_h * block_size, :out_w * block_size]
+    blocks = cropped.reshape(out_h, block_size, out_w, block_size, rgba_array.shape[2])
+    return blocks.transpose(0, 2, 1, 3, 4).reshape(out_h, out_w, block_size * block_size, rgba_array.shape[2])
+
+
+def _mean(blocks):
+    return _round_half_up(blocks[..., :3].mean(axis=2, dtype=np.float64))
+
+
+def _median(blocks):
+    return _round_half_up(np.median(blocks[..., :3], axis=2))
+
+
+def _alpha_weighted(blocks):
+    rgb = blocks[..., :3].astype(np.float64)
+    alpha = blocks[..., 3].astype(np.float64)
+    weight_sum = alpha.sum(axis=2)
+    weighted = (rgb * alpha[..., None]).sum(axis=2)
+    # Blocos totalmente transparentes caem para a média simples.
+    empty = weight_sum == 0
+    safe_sum = np.where(empty, 1.0, weight_sum)
+    result = weighted / safe_sum[..., None]
+    if empty.any():
+        result[empty] = rgb[empty].mean(axis=1)
+    return _round_half_up(result)
+
+
+def _mode(blocks):
+    rgb = blocks[..., :3].astype(np.uint32)
+    keys = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    keys = np.sort(keys, axis=2)
+    n = keys.shape[2]
+    positions = np.arange(n)
+    # Início de cada sequência de valores iguais; o comprimento da sequência
+    # em cada posição é (posição - início + 1).
+    new_run = np.ones(keys.shape, dtype=bool)
+    new_run[..., 1:] = keys[..., 1:] != keys[..., :-1]
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0), axis=2)
+    run_length = positions - run_start + 1
+    # Empates ficam com a menor cor (primeira sequência de maior comprimento).
+    best = np.argmax(run_length, axis=2)
+    winner = np.take_along_axis(keys, best[..., None], axis=2)[..., 0]
+    out = np.empty(winner.shape + (3,), dtype=np.uint8)
+    out[..., 0] = (winner >> 16) & 0xFF
+    out[..., 1] = (winner >> 8) & 0xFF
+    out[..., 2] = winner & 0xFF
+    return out
+
+
+_REDUCERS = {
+    'mean': _mean,
+    'median': _median,
+    'alpha_weighted': _alpha_weighted,
+    'mode': _mode,
+}
+
+
+def reduce_blocks(rgba_array, block_size, mode='mean'):
+    """Calcula a cor representativa de cada bloco da imagem.
+
+    Args:
+        rgba_array: np.ndarray (H, W, 4) uint8 - A imagem original em RGBA.
+        block_size: int - O tamanho do "super pixel".
+        mode: str - Um de REDUCTION_MODES:
+            'mean' - média por canal (equivale ao `quantize(colors=1)` antigo);
+            'median' - mediana por canal;
+            'alpha_weighted' - média ponderada pelo canal alfa;
+            'mode' - cor RGB mais frequente do bloco.
+
+    Returns:
+        np.ndarray: Array (H // block_size, W // block_size, 3) uint8 com as cores RGB.
+    """
+    if mode not in _REDUCERS:
+        raise ValueError(f"Modo de redução desconhecido: '{mode}'. Use um de {REDUCTION_MODES}.")
+    if block_size < 1:
+        raise ValueError(f"block_size inválido: {block_size}")
+    rgba_array = np.asarray(rgba_array)
+    if rgba_array.ndim != 3 or rgba_array.shape[2] != 4:
+        raise ValueError(f"Esperado array RGBA (H, W, 4), recebido {rgba_array.shape}")
+    return _REDUCERS[mode](_block_view(rgba_array, block_size))
@@ -0,0 +1,38 @@
+"""Cooperative cancellation for the generation engine (no PyQt imports).
+
+Quem chama cria um `CancellationToken` e o passa ao motor
+(`cancel_token=`); o motor verifica o token entre faixas de linhas e
+lotes de blocos e, se cancelado, levanta `GenerationCancelled`. Os
+buffers da geração interrompida são liberados ao desempilhar a exceção.
+"""
+
+import threading
+
+
+class GenerationCancelled(Exception):
+    """Levantada quando a geração é interrompida antes de terminar."""
+
+
+class CancellationToken:
+    """Sinalizador de cancelamento seguro entre threads."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Levanta `GenerationCancelled` se o cancelamento foi pedido."""
+        if self._event.is_set():
+            raise GenerationCancelled()
+
+
+def check_cancelled(token):
+    """Atalho para os laços do motor: não faz nada quando `token` é None."""
+    if token is not None and token.cancelled:
+        raise GenerationCancelled()
@@ -0,0 +1,309 @@
+"""Headless command line interface for PixelMaker (no PyQt imports).
+
+Uso:
+    python -m src IMAGEM --maps DIR --palette ARQUIVO --block-size N -o SAIDA.png
+    python -m src --manifest jobs.json --jobs 4 [--summary resumo.json]
+
+O arquivo de paleta pode ser JSON ({"assunto": ["#RRGGBB", ...]} ou
+{"assunto": "#RRGGBB, #RRGGBB"}) ou texto com uma linha por assunto no
+formato `assunto: #RRGGBB, #RRGGBB` (mesmo formato lido por
+`parse_palette_line`). O manifesto é uma lista JSON de jobs (ou um
+objeto com a chave "jobs") com as chaves image, maps, palette,
+block_size e output; caminhos relativos partem da pasta do manifesto.
+
+Com `--stream` (ou "stream": true no job) a imagem é lida faixa por faixa
+direto do arquivo, sem carregá-la inteira em RGBA. `--dither MODO` aplica
+pontilhado à imagem inteira; no manifesto, "dither" também aceita
+{"assunto": "modo"}. `--indexed` (ou "indexed": true) grava PNG indexado
+(modo 'P') direto dos índices do motor. `--sprites PASTA` (ou "sprites")
+fatia o resultado em sprites (componentes conexos, ou a grade de
+`--sprite-grid LxA` / "sprite_grid") e grava os PNGs, a sprite sheet e o
+JSON de posições nessa pasta. `--lut` (ou "lut": true, com "lut_bits")
+casa as cores pelas LUTs de `palette_lut`, guardadas no cache em disco e
+reaproveitadas entre jobs e execuções com as mesmas paletas. `--prune`
+(ou "prune": true) troca o casamento exato pela poda aproximada em
+paletas grandes (ver `color_matching.PaletteIndex`).
+
+O resumo (JSON) com tempo e erro de cada job vai para stdout ou para
+`--summary`; as mensagens do motor vão para stderr.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from src.art_processor import generate_pixel_art
+from src.block_cache import default_block_cache
+from src.block_reduction import REDUCTION_MODES
+from src.color_matching import METRICS, DEFAULT_METRIC
+from src.dithering import DITHER_MODES, DEFAULT_DITHER
+from src.instrumentation import StageRecorder
+from src.map_loading import load_map_alphas, map_subject
+from src.palette_lut import default_lut_cache, DEFAULT_LUT_BITS
+from src.palette_processor import parse_palette_line
+from src.sprite_export import export_sprites
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def load_palette_file(path):
+    """Lê um arquivo de paleta (JSON ou texto `assunto: #hex, ...`).
+
+    Returns:
+        dict[str, list[str]]: {assunto: ["#RRGGBB", ...]}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if path.lower().endswith('.json') or text.lstrip().startswith('{'):
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: esperado um objeto JSON {{assunto: paleta}}.")
+        palettes = {}
+        for subject, value in data.items():
+            colors = parse_palette_line(value if isinstance(value, str) else ", ".join(value))
+            if not colors:
+                raise ValueError(f"{path}: paleta vazia ou inválida para '{subject}'.")
+            palettes[subject] = colors
+        return palettes
+
+    palettes = {}
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        subject, sep, colors_text = line.partition(':')
+        if not sep or not subject.strip():
+            raise ValueError(f"{path}:{line_no}: esperado 'assunto: #RRGGBB, ...'.")
+        colors = parse_palette_line(colors_text)
+        if not colors:
+            raise ValueError(f"{path}:{line_no}: paleta vazia ou inválida para '{subject.strip()}'.")
+        palettes[subject.strip()] = colors
+    return palettes
+
+
+def load_segmentation_maps(maps_dir):
+    """Carrega os mapas de uma pasta, em ordem alfabética (nome do arquivo = assunto).
+
+    Só o canal alfa de cada mapa é decodificado e guardado (ver `map_loading`).
+    """
+    paths = {}
+    for name in sorted(os.listdir(maps_dir)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        subject = map_subject(name)
+        if subject in paths:
+            raise ValueError(f"{name}: Nome duplicado ('{subject}').")
+        paths[subject] = os.path.join(maps_dir, name)
+    if not paths:
+        raise ValueError(f"Nenhum mapa de segmentação encontrado em '{maps_dir}'.")
+    maps, errors = load_map_alphas(paths)
+    if errors:
+        raise ValueError("\n".join(errors))
+    return maps
+
+
+def run_job(job):
+    """Executa um job e devolve o registro do resumo (nunca levanta exceção)."""
+    record = {
+        'name': job.get('name') or os.path.basename(job.get('image', '')),
+        'image': job.get('image'),
+        'output': job.get('output'),
+        'status': 'ok',
+        'error': None,
+    }
+    recorder = None
+    start = time.perf_counter()
+    try:
+        for key in ('image', 'maps', 'palette', 'block_size', 'output'):
+            if job.get(key) in (None, ''):
+                raise ValueError(f"Campo obrigatório ausente: '{key}'.")
+        # As mensagens do motor vão para stderr para não misturar com o resumo JSON.
+        with contextlib.redirect_stdout(sys.stderr):
+            streaming = bool(job.get('stream'))
+            if streaming:
+                original = job['image']
+            else:
+                with Image.open(job['image']) as img:
+                    original = img.convert('RGBA')
+            maps = load_segmentation_maps(job['maps'])
+            palettes = load_palette_file(job['palette'])
+            workers = job.get('workers', 1)
+            if job.get('timings') or job.get('trace_memory'):
+                recorder = StageRecorder(trace_memory=bool(job.get('trace_memory')))
+            art = generate_pixel_art(
+                original, maps, palettes, int(job['block_size']),
+                reduction=job.get('reduction', 'mean'),
+                metric=job.get('metric', DEFAULT_METRIC),
+                dither=job.get('dither'),
+                prune=bool(job.get('prune')),
+                workers=workers,
+                streaming=streaming,
+                observer=recorder,
+                progress=lambda fraction, stage: None,
+                # O cache de blocos vale para o caminho de um processo.
+                block_cache=default_block_cache() if workers == 1 else None,
+                lut_cache=default_lut_cache(int(job.get('lut_bits') or DEFAULT_LUT_BITS)) if job.get('lut') else None,
+                indexed=True,
+            )
+            out_dir = os.path.dirname(os.path.abspath(job['output']))
+            os.makedirs(out_dir, exist_ok=True)
+            art.save_png(job['output'], indexed=bool(job.get('indexed')))
+            if job.get('sprites'):
+                grid = job.get('sprite_grid')
+                if isinstance(grid, str):
+                    grid = _parse_grid(grid)
+                sprites = export_sprites(art, job['sprites'], mode='grid' if grid else 'components',
+                                         cell_size=grid)
+                record['sprites'] = len(sprites['frames'])
+        record['size'] = list(art.size)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    if recorder is not None:
+        recorder.close()
+        record['stages'] = recorder.summary()
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def _parse_grid(text):
+    """'LxA' -> (largura, altura) das células da grade de sprites."""
+    w, sep, h = str(text).lower().partition('x')
+    if not sep or not w.strip().isdigit() or not h.strip().isdigit():
+        raise ValueError(f"Grade inválida: '{text}' (use LARGURAxALTURA, ex: 16x16).")
+    return int(w), int(h)
+
+
+def load_manifest(path):
+    """Lê o manifesto e resolve caminhos relativos à pasta do arquivo."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    jobs = data.get('jobs') if isinstance(data, dict) else data
+    if not isinstance(jobs, list):
+        raise ValueError(f"{path}: esperado uma lista de jobs ou {{\"jobs\": [...]}}.")
+    base = os.path.dirname(os.path.abspath(path))
+    resolved = []
+    for job in jobs:
+        job = dict(job)
+        for key in ('image', 'maps', 'palette', 'output', 'sprites'):
+            if isinstance(job.get(key), str) and not os.path.isabs(job[key]):
+                job[key] = os.path.join(base, job[key])
+        resolved.append(job)
+    return resolved
+
+
+def run_jobs(jobs, max_jobs=1):
+    """Executa os jobs (em paralelo se max_jobs > 1), preservando a ordem no resumo."""
+    if max_jobs <= 1 or len(jobs) <= 1:
+        return [run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(max_jobs, len(jobs))) as executor:
+        return list(executor.map(run_job, jobs))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src', description="PixelMaker sem interface gráfica.")
+    parser.add_argument('image', nargs='?', help="Imagem original.")
+    parser.add_argument('--maps', help="Pasta com os mapas de segmentação.")
+    parser.add_argument('--palette', help="Arquivo de paletas (JSON ou texto 'assunto: #hex, ...').")
+    parser.add_argument('--block-size', type=int, help="Tamanho do bloco (fator de escala).")
+    parser.add_argument('-o', '--output', help="PNG de saída.")
+    parser.add_argument('--reduction', choices=REDUCTION_MODES, default='mean', help="Modo de redução dos blocos.")
+    parser.add_argument('--metric', choices=METRICS, default=DEFAULT_METRIC,
+                        help="Métrica de distância de cor.")
+    parser.add_argument('--dither', choices=DITHER_MODES, default=DEFAULT_DITHER,
+                        help="Pontilhado aplicado à imagem inteira.")
+    parser.add_argument('--lut', action='store_true',
+                        help="Casa as cores por LUTs RGB -> paleta em cache no disco (mais rápido para "
+                             "paletas reutilizadas, resultado aproximado).")
+    parser.add_argument('--lut-bits', type=int, choices=range(1, 9), default=DEFAULT_LUT_BITS, metavar='1-8',
+                        help=f"Bits por canal do cubo da LUT com --lut (padrão {DEFAULT_LUT_BITS} = 32³).")
+    parser.add_argument('--prune', action='store_true',
+                        help="Em paletas grandes, reavalia só os vizinhos euclidianos mais próximos pela "
+                             "métrica (mais rápido, resultado aproximado).")
+    parser.add_argument('--indexed', action='store_true',
+                        help="Grava PNG indexado (paleta de até 256 cores) em vez de RGBA.")
+    parser.add_argument('--sprites', help="Fatia o resultado em sprites e grava PNGs, sheet e JSON nesta pasta.")
+    parser.add_argument('--sprite-grid', help="Fatia por grade de células LxA (ex: 16x16) em vez de "
+                                              "componentes conexos.")
+    parser.add_argument('--workers', type=int, default=1, help="Processos por job na renderização por faixas.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Lê a imagem em faixas (pouca memória para imagens enormes).")
+    parser.add_argument('--timings', action='store_true',
+                        help="Inclui no resumo o tempo de cada etapa do motor.")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Como --timings, com o pico de memória de cada etapa (tracemalloc).")
+    parser.add_argument('--manifest', help="Manifesto JSON com vários jobs.")
+    parser.add_argument('--jobs', type=int, default=1, help="Jobs executados em paralelo.")
+    parser.add_argument('--summary', help="Grava o resumo JSON neste arquivo em vez de stdout.")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.manifest:
+        if args.image:
+            parser.error("use a imagem posicional ou --manifest, não ambos.")
+        if args.sprites:
+            # Uma pasta única faria os jobs sobrescreverem os sprites uns dos outros.
+            parser.error("--sprites não vale para --manifest; use a chave \"sprites\" em cada job.")
+        try:
+            jobs = load_manifest(args.manifest)
+        except Exception as e:
+            parser.error(f"manifesto inválido: {e}")
+        defaults = {'reduction': args.reduction, 'metric': args.metric, 'dither': args.dither,
+                    'indexed': args.indexed, 'lut': args.lut, 'lut_bits': args.lut_bits,
+                    'prune': args.prune, 'sprite_grid': args.sprite_grid,
+                    'workers': args.workers, 'stream': args.stream,
+                    'timings': args.timings, 'trace_memory': args.trace_memory}
+        jobs = [{**defaults, **job} for job in jobs]
+    else:
+        missing = [flag for flag, value in (('image', args.image), ('--maps', args.maps),
+                                            ('--palette', args.palette), ('--block-size', args.block_size),
+                                            ('--output', args.output)) if value in (None, '')]
+        if missing:
+            parser.error(f"argumentos obrigatórios ausentes: {', '.join(missing)}")
+        jobs = [{
+            'image': args.image,
+            'maps': args.maps,
+            'palette': args.palette,
+            'block_size': args.block_size,
+            'output': args.output,
+            'reduction': args.reduction,
+            'metric': args.metric,
+            'dither': args.dither,
+            'lut': args.lut,
+            'lut_bits': args.lut_bits,
+            'prune': args.prune,
+            'indexed': args.indexed,
+            'sprites': args.sprites,
+            'sprite_grid': args.sprite_grid,
+            'workers': args.workers,
+            'stream': args.stream,
+            'timings': args.timings,
+            'trace_memory': args.trace_memory,
+        }]
+
+    start = time.perf_counter()
+    records = run_jobs(jobs, max_jobs=args.jobs)
+    failed = sum(1 for r in records if r['status'] != 'ok')
+    summary = {
+        'jobs': records,
+        'total': len(records),
+        'failed': failed,
+        'seconds': round(time.perf_counter() - start, 4),
+    }
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if failed else 0
@@ -0,0 +1,484 @@
+"""Batched nearest-palette matching (pure NumPy, no PyQt imports).
+
+Implementa o CIEDE2000 vetorizado com a mesma formulação de
+`colormath.color_diff_matrix.delta_e_cie2000`, calculando a matriz de
+distâncias (N_blocos, K_paleta) em pedaços para limitar o uso de memória.
+
+Outras métricas (parâmetro `metric`):
+    'ciede2000' - Delta E 2000 em Lab (padrão, resultado original);
+    'cie94' - Delta E 94 (artes gráficas) em Lab;
+    'cie76' - distância euclidiana em Lab;
+    'oklab' - distância euclidiana em OKLab;
+    'redmean' - aproximação "redmean" ponderada em RGB.
+As métricas euclidianas usam um índice de vizinho mais próximo (uma
+grade com os candidatos de cada célula, em NumPy puro) em vez da matriz
+de distâncias completa. Nas demais, a poda opcional (`prune=True`) usa o
+mesmo índice para reavaliar só os vizinhos euclidianos de cada cor em
+paletas grandes (ver `PaletteIndex`); sem ela, o resultado é exato.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.color_space import srgb_to_lab, srgb_to_oklab
+
+METRICS = ('ciede2000', 'cie94', 'cie76', 'oklab', 'redmean')
+DEFAULT_METRIC = 'ciede2000'
+# Espaço de coordenadas de cada métrica ('lab', 'oklab' ou 'rgb').
+METRIC_SPACES = {
+    'ciede2000': 'lab',
+    'cie94': 'lab',
+    'cie76': 'lab',
+    'oklab': 'oklab',
+    'redmean': 'rgb',
+}
+EUCLIDEAN_METRICS = ('cie76', 'oklab')
+
+# Com a poda (opcional, `prune=True`), nas métricas não euclidianas, paletas
+# com mais de PRUNE_MIN_COLORS cores distintas reavaliam só os
+# PRUNE_CANDIDATES vizinhos euclidianos de cada cor pela métrica exata (ver
+# `PaletteIndex`).
+PRUNE_MIN_COLORS = 128
+PRUNE_CANDIDATES = 32
+# Paletas com até GRID_MIN_COLORS cores distintas são comparadas com todas as cores.
+GRID_MIN_COLORS = 32
+# Limite de pares (célula, cor) avaliados ao montar a grade do índice.
+_GRID_PAIRS = 1 << 24
+_GRID_MAX_SIDE = 64
+
+# Número máximo de linhas (blocos) processadas por vez na matriz de distâncias.
+DEFAULT_CHUNK_SIZE = 16384
+# Elementos por lote que cabem bem em cache; lotes maiores ficam limitados pela memória.
+_CACHE_ELEMENTS = 16384
+
+_POW25_7 = 25.0 ** 7
+_TWO_PI = 2.0 * np.pi
+_COS30, _SIN30 = np.cos(np.radians(30.0)), np.sin(np.radians(30.0))
+_COS6, _SIN6 = np.cos(np.radians(6.0)), np.sin(np.radians(6.0))
+_COS63, _SIN63 = np.cos(np.radians(63.0)), np.sin(np.radians(63.0))
+# sin(2 * radians(30 * exp(...))) -> sin(_RO_SCALE * exp(...))
+_RO_SCALE = 2.0 * np.radians(30.0)
+
+
+def _pow7(x):
+    x2 = x * x
+    return x2 * x2 * x2 * x
+
+
+def _channels(coords1, coords2):
+    """Separa os canais de `coords1` (N, 3) e `coords2` em formas que se combinam em (N, K).
+
+    `coords2` pode ser uma paleta (K, 3), comparada com todas as linhas, ou
+    candidatos por linha (N, K, 3).
+    """
+    coords1 = np.asarray(coords1, dtype=np.float64)
+    coords2 = np.asarray(coords2, dtype=np.float64)
+    if coords2.ndim == 2:
+        coords2 = coords2[None, :, :]
+    first = tuple(coords1[:, c:c + 1] for c in range(3))
+    return first, tuple(coords2[..., c] for c in range(3))
+
+
+def ciede2000_matrix(lab1, lab2, kl=1.0, kc=1.0, kh=1.0):
+    """Calcula o Delta E 2000 entre todas as cores de `lab1` e `lab2`.
+
+    Segue a formulação do colormath; para reduzir chamadas trigonométricas,
+    os termos de T saem de cos/sen do matiz médio por identidades de ângulo
+    múltiplo e ΔH' é obtido por 2(C1'C2' - a1'a2' - b1b2), com o sinal de Δh'.
+
+    Args:
+        lab1: array (N, 3) - Cores Lab (ex: blocos da imagem).
+        lab2: array (K, 3) - Cores Lab (ex: paleta), ou (N, K, 3) com
+            candidatos próprios para cada linha de `lab1`.
+
+    Returns:
+        np.ndarray: Matriz float64 (N, K) de distâncias.
+    """
+    (L1, a1, b1), (L2, a2, b2) = _channels(lab1, lab2)
+
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
+    avg_C = (C1 + C2) * 0.5
+    avg_C7 = _pow7(avg_C)
+    G1 = 1.0 + 0.5 * (1.0 - np.sqrt(avg_C7 / (avg_C7 + _POW25_7)))  # (1 + G)
+    del avg_C, avg_C7
+
+    a1p = G1 * a1
+    a2p = G1 * a2
+    del G1
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    avg_Cp = (C1p + C2p) * 0.5
+
+    h1p = np.arctan2(b1, a1p)
+    h1p += (h1p < 0) * _TWO_PI
+    h2p = np.arctan2(b2, a2p)
+    h2p += (h2p < 0) * _TWO_PI
+    diff_hp = h2p - h1p
+    avg_Hp = h1p + h2p
+    avg_Hp += (np.fabs(diff_hp) > np.pi) * _TWO_PI
+    avg_Hp *= 0.5
+    del h1p, h2p
+
+    # ΔH' = 2 sqrt(C1'C2') sin(Δh'/2); o quadrado sai sem trigonometria como
+    # 2(C1'C2' - a1'a2' - b1b2). Com matizes próximos (produto escalar > 0) a
+    # subtração perde precisão, então usa-se a forma equivalente
+    # 2 (a1'b2 - b1a2')² / (C1'C2' + a1'a2' + b1b2). O sinal de sin(Δh'/2) é
+    # o de Δh' normalizado para (-180°, 180°].
+    prod_Cp = C1p * C2p
+    dot = a1p * a2p + b1 * b2
+    cross = a1p * b2 - b1 * a2p
+    close = dot > 0.0
+    delta_Hp = np.where(close, cross * cross / np.where(close, prod_Cp + dot, 1.0), prod_Cp - dot)
+    delta_Hp *= 2.0
+    del a1p, a2p, prod_Cp, dot, cross, close
+    np.maximum(delta_Hp, 0.0, out=delta_Hp)
+    np.sqrt(delta_Hp, out=delta_Hp)
+    wrapped = diff_hp - (diff_hp > np.pi) * _TWO_PI + (diff_hp < -np.pi) * _TWO_PI
+    delta_Hp *= np.where(wrapped < 0, -1.0, 1.0)
+    # Δh' = ±180° exato: o colormath dá sinal + quando h2' > h1' e - caso contrário.
+    exact = np.fabs(diff_hp) == np.pi
+    if exact.any():
+        delta_Hp[exact] = np.fabs(delta_Hp[exact]) * np.where(diff_hp[exact] > 0, 1.0, -1.0)
+    del diff_hp, wrapped
+
+    cos_h = np.cos(avg_Hp)
+    sin_h = np.sin(avg_Hp)
+    cos_2h = 2.0 * cos_h * cos_h - 1.0
+    sin_2h = 2.0 * sin_h * cos_h
+    cos_3h = cos_h * (4.0 * cos_h * cos_h - 3.0)
+    sin_3h = sin_h * (3.0 - 4.0 * sin_h * sin_h)
+    cos_4h = 2.0 * cos_2h * cos_2h - 1.0
+    sin_4h = 2.0 * sin_2h * cos_2h
+    T = (1.0
+         - 0.17 * (cos_h * _COS30 + sin_h * _SIN30)
+         + 0.24 * cos_2h
+         + 0.32 * (cos_3h * _COS6 - sin_3h * _SIN6)
+         - 0.2 * (cos_4h * _COS63 + sin_4h * _SIN63))
+    del cos_h, sin_h, cos_2h, sin_2h, cos_3h, sin_3h, cos_4h, sin_4h
+
+    avg_Lp_50_2 = (L1 + L2) * 0.5 - 50.0
+    avg_Lp_50_2 *= avg_Lp_50_2
+    S_L = 1.0 + (0.015 * avg_Lp_50_2) / np.sqrt(20.0 + avg_Lp_50_2)
+    S_C = 1.0 + 0.045 * avg_Cp
+    S_H = 1.0 + 0.015 * avg_Cp * T
+
+    delta_ro = np.exp(-(((np.degrees(avg_Hp) - 275.0) / 25.0) ** 2)) * _RO_SCALE
+    avg_Cp7 = _pow7(avg_Cp)
+    R_T = -2.0 * np.sqrt(avg_Cp7 / (avg_Cp7 + _POW25_7)) * np.sin(delta_ro)
+
+    term_L = (L2 - L1) / (S_L * kl)
+    term_C = (C2p - C1p) / (S_C * kc)
+    term_H = delta_Hp / (S_H * kh)
+    return np.sqrt(term_L * term_L + term_C * term_C + term_H * term_H + R_T * term_C * term_H)
+
+
+def cie94_matrix(lab1, lab2, kl=1.0, k1=0.045, k2=0.015):
+    """Delta E 94 (artes gráficas) entre `lab1` (referência) e `lab2`, como o colormath.
+
+    Returns:
+        np.ndarray: Matriz float64 (N, K).
+    """
+    (L1, a1, b1), (L2, a2, b2) = _channels(lab1, lab2)
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
+    delta_L = L1 - L2
+    delta_C = C1 - C2
+    delta_a = a1 - a2
+    delta_b = b1 - b2
+    delta_H2 = np.maximum(delta_a * delta_a + delta_b * delta_b - delta_C * delta_C, 0.0)
+    S_C = 1.0 + k1 * C1
+    S_H = 1.0 + k2 * C1
+    term_L = delta_L / kl
+    term_C = delta_C / S_C
+    return np.sqrt(term_L * term_L + term_C * term_C + delta_H2 / (S_H * S_H))
+
+
+def redmean_matrix(rgb1, rgb2):
+    """Distância "redmean" (RGB ponderado pela média do vermelho) entre `rgb1` e `rgb2`.
+
+    Returns:
+        np.ndarray: Matriz float64 (N, K).
+    """
+    (r1, g1, b1), (r2, g2, b2) = _channels(rgb1, rgb2)
+    r_mean = (r1 + r2) * 0.5
+    dr = r1 - r2
+    dg = g1 - g2
+    db = b1 - b2
+    return np.sqrt((2.0 + r_mean / 256.0) * dr * dr + 4.0 * dg * dg
+                   + (2.0 + (255.0 - r_mean) / 256.0) * db * db)
+
+
+def euclidean_matrix(c1, c2):
+    """Distância euclidiana entre todas as cores de `c1` e `c2` (CIE76 em Lab, OKLab)."""
+    c2 = np.asarray(c2, dtype=np.float64)
+    if c2.ndim == 2:
+        c2 = c2[None, :, :]
+    diff = np.asarray(c1, dtype=np.float64)[:, None, :] - c2
+    return np.sqrt(np.einsum('nkc,nkc->nk', diff, diff))
+
+
+_MATRIX_FUNCTIONS = {
+    'ciede2000': ciede2000_matrix,
+    'cie94': cie94_matrix,
+    'cie76': euclidean_matrix,
+    'oklab': euclidean_matrix,
+    'redmean': redmean_matrix,
+}
+
+
+def check_metric(metric):
+    if metric not in METRICS:
+        raise ValueError(f"Métrica desconhecida: '{metric}'. Use uma de {METRICS}.")
+    return metric
+
+
+def metric_coordinates(rgb, metric=DEFAULT_METRIC):
+    """Converte cores sRGB (..., 3) para o espaço em que `metric` mede distâncias.
+
+    Returns:
+        np.ndarray: float64 (..., 3) em Lab, OKLab ou RGB (0-255).
+    """
+    space = METRIC_SPACES[check_metric(metric)]
+    if space == 'lab':
+        return srgb_to_lab(rgb)
+    if space == 'oklab':
+        return srgb_to_oklab(rgb)
+    return np.asarray(rgb, dtype=np.float64)
+
+
+def block_coordinates(block_rgb, block_lab, metric=DEFAULT_METRIC):
+    """Coordenadas dos blocos para `metric`, reaproveitando o Lab já calculado quando possível."""
+    if block_lab is not None and METRIC_SPACES[check_metric(metric)] == 'lab':
+        return block_lab
+    return metric_coordinates(block_rgb, metric)
+
+
+def distance_matrix(coords1, coords2, metric=DEFAULT_METRIC):
+    """Matriz (N, K) de distâncias entre coordenadas já convertidas por `metric_coordinates`."""
+    return _MATRIX_FUNCTIONS[check_metric(metric)](coords1, coords2)
+
+
+def _squared_distances(coords, points):
+    """|q - p|² (N, K) pela diferença, como `euclidean_matrix` (mesmos empates)."""
+    diff = coords[:, None, :] - points
+    return np.einsum('nkc,nkc->nk', diff, diff)
+
+
+def _squared_distances_rows(coords, candidates):
+    """|q - p|² (N, M) de cada consulta com os seus próprios candidatos (N, M, 3)."""
+    diff = coords[:, None, :] - candidates
+    return np.einsum('nmc,nmc->nm', diff, diff)
+
+
+class _CellGrid:
+    """Grade uniforme sobre a paleta com os candidatos a k vizinhos de cada célula.
+
+    Para cada célula, U é a k-ésima menor distância entre uma cor e o ponto
+    mais distante da célula: qualquer consulta dentro dela tem k cores a no
+    máximo U. Só as cores a no máximo U da célula podem estar entre os k
+    vizinhos, então a busca nesses candidatos é exata. A grade cobre a caixa
+    da paleta com uma margem de metade do seu tamanho; consultas fora dela
+    ficam para a busca completa.
+    """
+
+    def __init__(self, points, k):
+        n_points = len(points)
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        extent = np.maximum(hi - lo, max(float((hi - lo).max()) * 1e-3, 1e-6))
+        self.lo = lo - extent * 0.5
+        side = int(np.ceil(2.0 * (n_points / k) ** (1.0 / 3.0)))
+        side = max(1, min(side, _GRID_MAX_SIDE, int((_GRID_PAIRS / n_points) ** (1.0 / 3.0))))
+        self.side = side
+        self.cell_size = extent * 2.0 / side
+        self.k = k
+        # Cor sentinela (índice n_points) no fim: distância infinita, preenche as linhas.
+        self.points = np.vstack([points, np.full((1, 3), np.inf)])
+
+        # As distâncias² de uma cor a uma célula são somas por eixo: basta somar
+        # os termos de cada eixo (lado, K), uma fatia x da grade por vez.
+        box_lo = self.lo + np.arange(side)[:, None] * self.cell_size
+        below = box_lo[:, None, :] - points
+        above = points - (box_lo + self.cell_size)[:, None, :]
+        near = np.maximum(np.maximum(below, above), 0.0) ** 2
+        far = np.maximum(np.fabs(below), np.fabs(above)) ** 2
+        near_yz = (near[:, None, :, 1] + near[None, :, :, 2]).reshape(-1, n_points)
+        far_yz = (far[:, None, :, 1] + far[None, :, :, 2]).reshape(-1, n_points)
+        masks = []
+        for x in range(side):
+            bound = np.partition(far_yz + far[x, :, 0], k - 1, axis=1)[:, k - 1]
+            # Folga relativa: arredondamentos no cálculo da célula da consulta.
+            masks.append(near_yz + near[x, :, 0] <= bound[:, None] * (1.0 + 1e-9))
+        mask = np.concatenate(masks)
+        counts = mask.sum(axis=1)
+        self.width = int(counts.max())
+        cell, color = np.nonzero(mask)
+        column = np.arange(len(cell)) - (np.cumsum(counts) - counts)[cell]
+        self.table = np.full((len(mask), self.width), n_points, dtype=np.int32)
+        self.table[cell, column] = color
+
+    def cells(self, coords):
+        """Célula (índice plano) de cada consulta, ou -1 fora da grade."""
+        idx = np.floor((coords - self.lo) / self.cell_size).astype(np.intp)
+        inside = np.all((idx >= 0) & (idx < self.side), axis=1)
+        flat = (idx[:, 0] * self.side + idx[:, 1]) * self.side + idx[:, 2]
+        return np.where(inside, flat, -1)
+
+    def query(self, coords, cells):
+        """Os k vizinhos (posições em `points`) de consultas dentro da grade (`cells` >= 0)."""
+        candidates = self.table[cells]
+        distances = np.sqrt(_squared_distances_rows(coords, self.points[candidates]))
+        if self.k == 1:
+            return candidates[np.arange(len(coords)), np.argmin(distances, axis=1)]
+        best = np.argpartition(distances, self.k - 1, axis=1)[:, :self.k]
+        return np.take_along_axis(candidates, best, axis=1)
+
+
+class PaletteIndex:
+    """Índice de vizinho mais próximo de uma paleta, construído uma vez por paleta.
+
+    Cores repetidas são removidas (fica a primeira ocorrência, preservando o
+    desempate pelo menor índice). A busca euclidiana usa uma grade com os
+    candidatos de cada célula (`_CellGrid`, exata) em paletas com mais de
+    GRID_MIN_COLORS cores, e a comparação com todas as cores nas demais.
+    Nas métricas não euclidianas, a busca é exata por padrão; com a poda
+    (`min_colors` dado), paletas com mais de `min_colors` cores distintas
+    reavaliam pela métrica exata só os `candidates` vizinhos euclidianos nas
+    coordenadas da métrica (Lab para o ΔE2000). A poda é uma aproximação: em
+    cores aleatórias, cerca de 0,1% das consultas ficam com uma cor até ~2 ΔE
+    mais distante que a da matriz completa.
+
+    Args:
+        palette_coords: array (K, 3) - Paleta nas coordenadas de `metric`.
+        metric: str - Uma de METRICS.
+        candidates: int - Vizinhos euclidianos reavaliados por consulta (poda).
+        min_colors: int | None - Cores distintas a partir das quais a poda é
+            usada (None, o padrão, desativa a poda).
+    """
+
+    def __init__(self, palette_coords, metric=DEFAULT_METRIC, candidates=PRUNE_CANDIDATES, min_colors=None):
+        palette_coords = np.asarray(palette_coords, dtype=np.float64).reshape(-1, 3)
+        if len(palette_coords) == 0:
+            raise ValueError("Paleta vazia: não há cores para casar.")
+        self.metric = check_metric(metric)
+        _, first = np.unique(palette_coords, axis=0, return_index=True)
+        self.original_indices = np.sort(first)
+        self.points = np.ascontiguousarray(palette_coords[self.original_indices])
+        if self.metric in EUCLIDEAN_METRICS:
+            self.candidates = 1
+        else:
+            self.candidates = max(1, int(candidates))
+        self.pruned = (self.metric not in EUCLIDEAN_METRICS and min_colors is not None
+                       and len(self.points) > max(int(min_colors), self.candidates))
+        self._grid = None
+        if (self.metric in EUCLIDEAN_METRICS or self.pruned) and len(self.points) > GRID_MIN_COLORS:
+            grid = _CellGrid(self.points, self.candidates)
+            # Candidatos demais por célula: a grade não economiza nada.
+            if grid.width * 2 <= len(self.points):
+                self._grid = grid
+
+    def __len__(self):
+        return len(self.points)
+
+    def _euclidean_nearest(self, coords, k):
+        """Posições (em `points`) dos `k` vizinhos euclidianos (k > 1: em ordem crescente de índice)."""
+        if self._grid is not None:
+            cells = self._grid.cells(coords)
+            inside = cells >= 0
+            if inside.all():
+                nearest = self._grid.query(coords, cells)
+            else:
+                nearest = np.empty((len(coords), k) if k > 1 else len(coords), dtype=np.intp)
+                nearest[inside] = self._grid.query(coords[inside], cells[inside])
+                nearest[~inside] = self._brute_nearest(coords[~inside], k)
+        else:
+            nearest = self._brute_nearest(coords, k)
+        if k == 1:
+            return nearest
+        return np.sort(nearest, axis=1)
+
+    def _brute_nearest(self, coords, k):
+        distances = np.sqrt(_squared_distances(coords, self.points))
+        if k == 1:
+            return np.argmin(distances, axis=1)
+        return np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+    def _match_chunk(self, coords):
+        if self.metric in EUCLIDEAN_METRICS:
+            return self._euclidean_nearest(coords, 1)
+        if not self.pruned:
+            return np.argmin(_MATRIX_FUNCTIONS[self.metric](coords, self.points), axis=1)
+        candidates = self._euclidean_nearest(coords, self.candidates)
+        distances = _MATRIX_FUNCTIONS[self.metric](coords, self.points[candidates])
+        # Candidatos em ordem de índice: no empate, argmin mantém o primeiro.
+        return np.take_along_axis(candidates, np.argmin(distances, axis=1)[:, None], axis=1)[:, 0]
+
+    def query(self, coords, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Índices (na paleta original) das cores mais próximas de `coords` (N, 3)."""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        if self._grid is not None:
+            width = self._grid.width + (self.candidates if self.pruned else 0)
+        elif self.pruned:
+            width = len(self.points) + self.candidates
+        else:
+            width = len(self.points)
+        # Lotes do tamanho do cache são mais rápidos que lotes enormes; `chunk_size`
+        # continua sendo o limite superior de linhas (e portanto de memória).
+        chunk_size = max(1, min(int(chunk_size), max(64, _CACHE_ELEMENTS // width)))
+        nearest = np.empty(len(coords), dtype=np.intp)
+        for start in range(0, len(coords), chunk_size):
+            stop = start + chunk_size
+            nearest[start:stop] = self._match_chunk(coords[start:stop])
+        return self.original_indices[nearest]
+
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+_INDEX_CACHE_ENTRIES = 64
+
+
+def palette_index(palette_coords, metric=DEFAULT_METRIC, prune=False):
+    """Índice da paleta para `metric`, reaproveitado entre chamadas (cache LRU pelo conteúdo).
+
+    Com `prune`, paletas grandes usam a poda aproximada (ver `PaletteIndex`).
+    """
+    palette_coords = np.ascontiguousarray(palette_coords, dtype=np.float64)
+    key = (check_metric(metric), bool(prune), palette_coords.tobytes())
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+    index = PaletteIndex(palette_coords, metric, min_colors=PRUNE_MIN_COLORS if prune else None)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > _INDEX_CACHE_ENTRIES:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def nearest_palette_indices(lab, palette_lab, chunk_size=DEFAULT_CHUNK_SIZE, metric=DEFAULT_METRIC, prune=False):
+    """Retorna, para cada cor de `lab`, o índice da cor mais próxima da paleta.
+
+    Em caso de empate vence o primeiro índice, como no laço original. O
+    casamento passa pelo `PaletteIndex` da paleta (ver `palette_index`) e é
+    exato, a menos que `prune` seja pedido.
+
+    Args:
+        lab: array (N, 3) - Cores a serem casadas, nas coordenadas de `metric`
+            (Lab para 'ciede2000', 'cie94' e 'cie76'; ver `metric_coordinates`).
+        palette_lab: array (K, 3) - Paleta nas mesmas coordenadas.
+        chunk_size: int - Linhas da matriz de distâncias calculadas por vez.
+        metric: str - Uma de METRICS.
+        prune: bool - Poda aproximada em paletas grandes nas métricas não
+            euclidianas (mais rápida; ver `PaletteIndex`).
+
+    Returns:
+        np.ndarray: Array (N,) intp com índices em `palette_lab`.
+    """
+    palette_lab = np.asarray(palette_lab, dtype=np.float64).reshape(-1, 3)
+    if len(palette_lab) == 0:
+        raise ValueError("Paleta vazia: não há cores para casar.")
+    return palette_index(palette_lab, metric, prune).query(lab, chunk_size=chunk_size)
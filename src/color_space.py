@@ -0,0 +1,147 @@
+"""Array-based color space conversions (pure NumPy, no PyQt imports).
+
+Reproduz as mesmas constantes do colormath (sRGB/D65, companding sRGB e
+o ramo linear 7.787 da conversão XYZ -> Lab), mas operando sobre arrays
+inteiros em vez de um objeto `sRGBColor` por cor.
+"""
+
+import numpy as np
+
+# Matriz sRGB -> XYZ e ponto branco D65 (2°) usados pelo colormath.
+SRGB_TO_XYZ = np.array((
+    (0.412424, 0.357579, 0.180464),
+    (0.212656, 0.715158, 0.0721856),
+    (0.0193324, 0.119193, 0.950444),
+))
+D65_WHITE = np.array((0.95047, 1.00000, 1.08883))
+CIE_E = 216.0 / 24389.0
+
+# OKLab (Björn Ottosson): RGB linear -> LMS e LMS^(1/3) -> Lab.
+LINEAR_SRGB_TO_LMS = np.array((
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+))
+LMS_TO_OKLAB = np.array((
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+))
+
+
+def _linearize(values):
+    """Remove o companding sRGB de valores normalizados (0-1)."""
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+# Tabela de linearização para entradas uint8 (evita a potência por pixel).
+_LINEAR_LUT = _linearize(np.arange(256, dtype=np.float64) / 255.0)
+
+
+def _lab_f(t):
+    return np.where(t > CIE_E, np.cbrt(t), (7.787 * t) + (16.0 / 116.0))
+
+
+def srgb_to_linear(rgb):
+    """Converte cores sRGB (0-255) em RGB linear (0-1).
+
+    Args:
+        rgb: array (..., 3) - uint8 (usa tabela) ou floats em 0-255.
+
+    Returns:
+        np.ndarray: Array float64 (..., 3).
+    """
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        return _LINEAR_LUT[rgb]
+    return _linearize(rgb.astype(np.float64) / 255.0)
+
+
+def srgb_to_lab(rgb):
+    """Converte cores sRGB (0-255) para CIE Lab (D65), como o colormath.
+
+    Args:
+        rgb: array (N, 3) (ou qualquer (..., 3)) - uint8 ou floats em 0-255.
+
+    Returns:
+        np.ndarray: Array float64 com o mesmo formato, canais (L, a, b).
+    """
+    rgb = np.asarray(rgb)
+    if rgb.shape[-1:] != (3,):
+        raise ValueError(f"Esperado array (..., 3), recebido {rgb.shape}")
+    xyz = srgb_to_linear(rgb) @ SRGB_TO_XYZ.T
+    f = _lab_f(xyz / D65_WHITE)
+    lab = np.empty(f.shape, dtype=np.float64)
+    lab[..., 0] = 116.0 * f[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200.0 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def _lab_f_inverse(f):
+    cube = f * f * f
+    return np.where(cube > CIE_E, cube, (f - 16.0 / 116.0) / 7.787)
+
+
+def _compand(values):
+    """Aplica o companding sRGB a valores lineares (0-1)."""
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(np.maximum(values, 0.0), 1.0 / 2.4) - 0.055)
+
+
+def lab_to_srgb(lab):
+    """Converte cores CIE Lab (D65) para sRGB uint8 (inverso de `srgb_to_lab`).
+
+    Cores fora do gamut sRGB são cortadas em 0-255.
+
+    Args:
+        lab: array (..., 3) - Canais (L, a, b).
+
+    Returns:
+        np.ndarray: Array uint8 com o mesmo formato.
+    """
+    lab = np.asarray(lab, dtype=np.float64)
+    if lab.shape[-1:] != (3,):
+        raise ValueError(f"Esperado array (..., 3), recebido {lab.shape}")
+    fy = (lab[..., 0] + 16.0) / 116.0
+    f = np.stack([fy + lab[..., 1] / 500.0, fy, fy - lab[..., 2] / 200.0], axis=-1)
+    xyz = _lab_f_inverse(f) * D65_WHITE
+    linear = xyz @ np.linalg.inv(SRGB_TO_XYZ).T
+    rgb = _compand(np.clip(linear, 0.0, 1.0)) * 255.0
+    return np.clip(np.floor(rgb + 0.5), 0, 255).astype(np.uint8)
+
+
+def srgb_to_oklab(rgb):
+    """Converte cores sRGB (0-255) para OKLab.
+
+    Args:
+        rgb: array (..., 3) - uint8 ou floats em 0-255.
+
+    Returns:
+        np.ndarray: Array float64 com o mesmo formato, canais (L, a, b); L em 0-1.
+    """
+    rgb = np.asarray(rgb)
+    if rgb.shape[-1:] != (3,):
+        raise ValueError(f"Esperado array (..., 3), recebido {rgb.shape}")
+    lms = np.cbrt(srgb_to_linear(rgb) @ LINEAR_SRGB_TO_LMS.T)
+    return lms @ LMS_TO_OKLAB.T
+
+
+def hex_list_to_rgb_array(hex_colors):
+    """Converte uma lista ["#RRGGBB", ...] em um array (K, 3) uint8.
+
+    Raises:
+        ValueError: se alguma entrada não for um hexadecimal de 6 dígitos.
+    """
+    digits = [h.lstrip('#') for h in hex_colors]
+    for h, d in zip(hex_colors, digits):
+        if len(d) != 6:
+            raise ValueError(f"Cor hexadecimal inválida: '{h}'")
+    packed = np.array([int(d, 16) for d in digits], dtype=np.uint32)
+    rgb = np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1)
+    return rgb.astype(np.uint8).reshape(-1, 3)
+
+
+def rgb_array_to_hex_list(rgb):
+    """Converte um array (K, 3) de cores 0-255 em ["#RRGGBB", ...] (inverso de `hex_list_to_rgb_array`)."""
+    rgb = np.asarray(rgb).reshape(-1, 3)
+    return [f"#{int(r):02X}{int(g):02X}{int(b):02X}" for r, g, b in rgb]
@@ -0,0 +1,65 @@
+"""Small helpers shared by the on-disk caches (no PyQt imports).
+
+Gravação atômica de arquivos e remoção LRU (por mtime) quando o total
+de uma pasta de cache passa do limite configurado.
+"""
+
+import os
+import tempfile
+
+
+def default_cache_root():
+    """Pasta raiz dos caches em disco (`PIXELMAKER_CACHE_DIR` ou ~/.cache/pixelmaker)."""
+    return os.environ.get('PIXELMAKER_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'pixelmaker')
+
+
+def write_atomic(directory, filename, write_fn):
+    """Grava `directory/filename` via arquivo temporário + `os.replace`.
+
+    Args:
+        write_fn: callable(file) - Escreve o conteúdo no arquivo binário aberto.
+
+    Raises:
+        OSError e exceções de `write_fn`; o temporário é removido em caso de erro.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_fn(f)
+        os.replace(tmp_path, os.path.join(directory, filename))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def evict_lru_files(directory, max_bytes, suffix):
+    """Remove os arquivos `*suffix` usados há mais tempo até o total caber em `max_bytes`."""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,182 @@
+"""Ordered and error-diffusion dithering over the block grid (no PyQt imports).
+
+O pontilhado trabalha na grade de blocos (uma cor reduzida por pixel de
+saída) e respeita os rótulos de segmentação: cada assunto usa só a
+própria paleta e o erro da difusão nunca passa para blocos de outro
+assunto (nem do fundo).
+
+Modos (ver DITHER_MODES):
+    'none' - casamento direto, sem pontilhado;
+    'bayer2', 'bayer4', 'bayer8' - pontilhado ordenado com matriz de Bayer,
+        vetorizado sobre todos os blocos do rótulo;
+    'floyd_steinberg', 'atkinson' - difusão de erro. Cada bloco só recebe
+        erro de vizinhos à esquerda e das linhas de cima, então os blocos com
+        o mesmo 2·y + x são independentes: cada diagonal é processada de uma
+        vez, com o mesmo resultado da varredura linha a linha.
+"""
+
+import numpy as np
+
+from src.cancellation import check_cancelled
+from src.color_matching import metric_coordinates, palette_index, DEFAULT_CHUNK_SIZE, DEFAULT_METRIC
+
+DITHER_MODES = ('none', 'bayer2', 'bayer4', 'bayer8', 'floyd_steinberg', 'atkinson')
+DEFAULT_DITHER = 'none'
+
+# (dy, dx, peso) de cada kernel de difusão de erro.
+DIFFUSION_KERNELS = {
+    'floyd_steinberg': ((0, 1, 7 / 16), (1, -1, 3 / 16), (1, 0, 5 / 16), (1, 1, 1 / 16)),
+    'atkinson': ((0, 1, 1 / 8), (0, 2, 1 / 8), (1, -1, 1 / 8), (1, 0, 1 / 8), (1, 1, 1 / 8), (2, 0, 1 / 8)),
+}
+_BAYER_SIZES = {'bayer2': 2, 'bayer4': 4, 'bayer8': 8}
+# Diagonais processadas entre verificações de cancelamento / progresso.
+_DIAGONALS_PER_CHECK = 64
+
+
+def check_dither_mode(mode):
+    if mode not in DITHER_MODES:
+        raise ValueError(f"Modo de pontilhado desconhecido: '{mode}'. Use um de {DITHER_MODES}.")
+    return mode
+
+
+def label_dither_modes(dither, subjects):
+    """Modo de pontilhado de cada rótulo (0 = blocos sem assunto, i + 1 = subjects[i]).
+
+    Args:
+        dither: str | dict[str, str] | None - Um modo para todos os rótulos, ou
+            {assunto: modo} (assuntos ausentes e o fundo ficam sem pontilhado).
+        subjects: list[str] - Assuntos na ordem dos rótulos.
+
+    Returns:
+        list[str]: Um modo por rótulo.
+    """
+    if dither is None:
+        return [DEFAULT_DITHER] * (len(subjects) + 1)
+    if isinstance(dither, str):
+        return [check_dither_mode(dither)] * (len(subjects) + 1)
+    unknown = [subject for subject in dither if subject not in subjects]
+    if unknown:
+        print(f"Aviso: pontilhado definido para assuntos sem mapa: {', '.join(map(str, unknown))}")
+    return [DEFAULT_DITHER] + [check_dither_mode(dither.get(subject) or DEFAULT_DITHER) for subject in subjects]
+
+
+def bayer_matrix(size):
+    """Limiares da matriz de Bayer `size` x `size` (potência de 2), centrados em zero.
+
+    Returns:
+        np.ndarray: float64 (size, size) com valores em (-0.5, 0.5).
+    """
+    if size < 1 or size & (size - 1):
+        raise ValueError(f"O tamanho da matriz de Bayer deve ser potência de 2, recebido {size}.")
+    matrix = np.zeros((1, 1))
+    while matrix.shape[0] < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+    return (matrix + 0.5) / matrix.size - 0.5
+
+
+def palette_spread(palette_rgb):
+    """Amplitude do pontilhado ordenado: mediana da distância RGB de cada cor à vizinha mais próxima.
+
+    Returns:
+        float: 0.0 para paletas de uma cor (sem pontilhado).
+    """
+    rgb = np.unique(np.asarray(palette_rgb, dtype=np.float64).reshape(-1, 3), axis=0)
+    if len(rgb) < 2:
+        return 0.0
+    diff = rgb[:, None, :] - rgb[None, :, :]
+    distances = np.sqrt(np.einsum('ijc,ijc->ij', diff, diff))
+    np.fill_diagonal(distances, np.inf)
+    return float(np.median(distances.min(axis=1)))
+
+
+def _diffuse(rgb, ys, xs, kernel, palette_rgb, index, metric, chunk_size, progress, cancel_token):
+    """Difusão de erro nos blocos (ys, xs) de um rótulo; devolve os índices na paleta."""
+    ys = ys - ys.min()
+    xs = xs - xs.min()
+    # Margens para os deslocamentos do kernel (até 2 linhas abaixo e 2 colunas de cada lado).
+    error = np.zeros((ys.max() + 3, xs.max() + 5, 3), dtype=np.float64)
+    diagonal = 2 * ys + xs
+    order = np.argsort(diagonal, kind='stable')
+    groups = np.split(order, np.flatnonzero(np.diff(diagonal[order])) + 1)
+    palette_rgb = palette_rgb.astype(np.float64)
+    indices = np.empty(len(rgb), dtype=np.intp)
+    for step, group in enumerate(groups):
+        if step % _DIAGONALS_PER_CHECK == 0:
+            check_cancelled(cancel_token)
+            if progress is not None:
+                progress(step / len(groups), 'dithering')
+        gy, gx = ys[group], xs[group] + 2
+        value = np.clip(rgb[group] + error[gy, gx], 0.0, 255.0)
+        chosen = index.query(metric_coordinates(value, metric), chunk_size=chunk_size)
+        indices[group] = chosen
+        residual = value - palette_rgb[chosen]
+        # Blocos de outros rótulos nunca leem `error`: o erro que cairia neles é descartado.
+        for dy, dx, weight in kernel:
+            error[gy + dy, gx + dx] += weight * residual
+    return indices
+
+
+def dither_label(block_rgb, labels, label, mode, palette_rgb, palette_coords, metric=DEFAULT_METRIC,
+                 chunk_size=DEFAULT_CHUNK_SIZE, origin=(0, 0), progress=None, cancel_token=None, prune=False):
+    """Casa os blocos de um rótulo com a paleta aplicando o pontilhado `mode`.
+
+    Args:
+        block_rgb: np.ndarray (H, W, 3) - Cores reduzidas dos blocos.
+        labels: np.ndarray (H, W) - Rótulos brutos (um por assunto, sem remapeamento).
+        label: int - Rótulo a pontilhar.
+        mode: str - Uma de DITHER_MODES.
+        palette_rgb: np.ndarray (K, 3) uint8 - Paleta do rótulo.
+        palette_coords: np.ndarray (K, 3) - A mesma paleta nas coordenadas de `metric`.
+        origin: tuple[int, int] - Posição (y, x) da grade na imagem completa; mantém a
+            fase da matriz de Bayer igual em recortes (ex: pré-visualizações).
+        progress: callable(float, str) | None - Chamado entre lotes de diagonais.
+        cancel_token: cancellation.CancellationToken | None - Verificado entre lotes.
+        prune: bool - Poda aproximada no casamento (ver `color_matching.PaletteIndex`).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (índices planos dos blocos do rótulo em `labels`,
+            índice na paleta de cada um).
+    """
+    check_dither_mode(mode)
+    height, width = labels.shape
+    flat = np.flatnonzero(labels.reshape(-1) == label)
+    if len(flat) == 0:
+        return flat, np.empty(0, dtype=np.intp)
+    ys, xs = np.divmod(flat, width)
+    rgb = np.asarray(block_rgb).reshape(-1, 3)[flat].astype(np.float64)
+    index = palette_index(palette_coords, metric, prune)
+
+    if mode in DIFFUSION_KERNELS:
+        indices = _diffuse(rgb, ys, xs, DIFFUSION_KERNELS[mode], palette_rgb, index, metric, chunk_size,
+                           progress, cancel_token)
+        return flat, indices
+    if mode in _BAYER_SIZES:
+        size = _BAYER_SIZES[mode]
+        thresholds = bayer_matrix(size)[(ys + origin[0]) % size, (xs + origin[1]) % size]
+        rgb += palette_spread(palette_rgb) * thresholds[:, None]
+        np.clip(rgb, 0.0, 255.0, out=rgb)
+    check_cancelled(cancel_token)
+    return flat, index.query(metric_coordinates(rgb, metric), chunk_size=chunk_size)
+
+
+def apply_dithering(output, block_rgb, labels, label_palettes, palette_maps, label_modes, metric=DEFAULT_METRIC,
+                    chunk_size=DEFAULT_CHUNK_SIZE, progress=None, cancel_token=None, prune=False):
+    """Escreve em `output` (H, W) os índices globais dos blocos dos rótulos com pontilhado.
+
+    Args:
+        label_palettes: list[tuple] - Paleta (rgb, coordenadas de `metric`) de cada rótulo.
+        palette_maps: list[np.ndarray] - Tabela índice local -> índice na paleta global
+            de cada rótulo (ver `indexed_output.build_global_palette`).
+        label_modes: list[str] - Modo de cada rótulo (ver `label_dither_modes`);
+            rótulos 'none' não são alterados.
+    """
+    flat_output = output.reshape(-1)
+    for label, mode in enumerate(label_modes):
+        if mode == 'none':
+            continue
+        palette_rgb, palette_coords = label_palettes[label]
+        flat, indices = dither_label(block_rgb, labels, label, mode, palette_rgb, palette_coords, metric=metric,
+                                     chunk_size=chunk_size, progress=progress, cancel_token=cancel_token,
+                                     prune=prune)
+        flat_output[flat] = palette_maps[label][indices]
+    return output
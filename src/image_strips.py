@@ -0,0 +1,250 @@
+"""Strip-by-strip access to a source image (no PyQt imports).
+
+`ImageStripReader` entrega faixas horizontais RGBA de uma imagem sem
+materializar a imagem inteira em RGBA. Quando a fonte é um arquivo cujos
+dados ficam sem compressão (BMP, PPM, TIFF sem compressão), cada faixa é
+decodificada diretamente do arquivo, e o pico de memória passa a ser
+proporcional a largura × linhas da faixa. Nos demais formatos (PNG, JPEG,
+TIFF comprimido) o Pillow só decodifica o arquivo inteiro: a imagem é
+carregada uma vez no modo original e cada faixa é convertida para RGBA
+separadamente.
+
+A decodificação parcial ajusta atributos internos do Pillow (`tile`,
+`_size`, `_tile_size`). Antes de usá-la, o leitor confere se esses
+atributos existem e se uma faixa de teste sai com o tamanho e o modo
+esperados; se não (ex: uma versão do Pillow que mudou esses detalhes), ou
+se uma faixa falhar depois, volta a ler as faixas com `crop` da imagem
+inteira.
+
+A interface abre a imagem original com `open_image` (só o cabeçalho) e
+nunca a decodifica inteira: um `ImageStripReader` criado a partir dessa
+imagem ainda não carregada lê o próprio arquivo, e `read_thumbnail`
+monta a miniatura exibida a partir de faixas.
+"""
+
+import os
+import threading
+
+import numpy as np
+from PIL import Image, ImageFile
+
+_open_lock = threading.Lock()
+
+
+def _open_unbounded(path):
+    """Abre a imagem sem o limite de pixels do Pillow (fontes enormes são esperadas aqui)."""
+    with _open_lock:
+        previous = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = previous
+
+
+def open_image(path):
+    """Abre a imagem sem decodificar os pixels (só o cabeçalho) e sem o limite de pixels do Pillow.
+
+    A imagem devolvida não deve ser carregada (`load`, `convert`, `np.asarray`): leia-a
+    com `ImageStripReader` ou `read_thumbnail`, que decodificam por faixas.
+    """
+    return _open_unbounded(path)
+
+
+def unloaded_file_path(image):
+    """Caminho do arquivo de uma imagem aberta e ainda não carregada, senão None."""
+    if not isinstance(image, ImageFile.ImageFile) or not getattr(image, 'tile', None):
+        return None
+    path = getattr(image, 'filename', None)
+    return path if isinstance(path, str) and path else None
+
+
+def _raw_stride(mode, width, rawmode):
+    try:
+        return len(Image.new(mode, (width, 1)).tobytes('raw', rawmode))
+    except Exception:
+        return None
+
+
+def _raw_tiles(image):
+    """Descreve os tiles 'raw' de largura total como (y0, y1, offset, rawmode, stride, orientação).
+
+    Returns:
+        list[tuple] | None: None se algum tile não puder ser lido por partes.
+    """
+    width = image.size[0]
+    if getattr(image, '_tile_size', image.size) != image.size:
+        return None  # TIFF com orientação que transpõe a imagem ao carregar
+    tiles = []
+    for tile in image.tile:
+        codec, extents, offset, args = tile[0], tile[1], tile[2], tile[3]
+        if codec != 'raw' or extents[0] != 0 or extents[2] != width:
+            return None
+        if isinstance(args, str):
+            args = (args,)
+        rawmode = args[0]
+        stride = args[1] if len(args) > 1 else 0
+        orientation = args[2] if len(args) > 2 else 1
+        if not stride:
+            stride = _raw_stride(image.mode, width, rawmode)
+            if stride is None:
+                return None
+        tiles.append((extents[1], extents[3], offset, rawmode, stride, orientation))
+    return tiles or None
+
+
+class ImageStripReader:
+    """Lê faixas RGBA (linhas y0..y1) de um arquivo ou de uma PIL.Image.
+
+    Args:
+        source: str | os.PathLike | PIL.Image - Caminho da imagem ou imagem já aberta. Uma
+            imagem de `open_image` ainda não carregada é lida do próprio arquivo, sem
+            carregar a imagem recebida.
+
+    Raises:
+        ValueError: Se o arquivo de uma imagem aberta mudou de dimensões desde a abertura.
+    """
+
+    def __init__(self, source):
+        expected_size = None
+        if not isinstance(source, (str, os.PathLike)) and unloaded_file_path(source):
+            expected_size = source.size
+            source = unloaded_file_path(source)
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            self._image = _open_unbounded(self.path)
+            self.size = self._image.size
+            if expected_size is not None and self.size != expected_size:
+                self._image.close()
+                raise ValueError(f"'{os.path.basename(self.path)}' mudou no disco: {self.size[0]}x{self.size[1]}, "
+                                 f"esperado {expected_size[0]}x{expected_size[1]}.")
+            self._tiles = _raw_tiles(self._image)
+            if self._tiles is not None and not self._partial_decoding_works():
+                self._tiles = None
+                print(f"Aviso: a decodificação parcial não funciona com esta versão do Pillow; "
+                      f"'{os.path.basename(self.path)}' será decodificada inteira.")
+            elif self._tiles is None:
+                print(f"Aviso: '{os.path.basename(self.path)}' ({self._image.format}) não permite "
+                      f"decodificação parcial; a imagem será decodificada inteira no modo {self._image.mode}.")
+        else:
+            self.path = None
+            self._image = source
+            self._tiles = None
+            self.size = self._image.size
+
+    @property
+    def partial(self):
+        """True se as faixas são decodificadas diretamente do arquivo."""
+        return self._tiles is not None
+
+    def read_rows(self, y0, y1, mode='RGBA'):
+        """Retorna as linhas [y0, y1) como array (y1 - y0, W, 4) uint8 (ou no `mode` pedido, ex: 'L')."""
+        width, height = self.size
+        y0, y1 = max(0, y0), min(height, y1)
+        if y1 <= y0:
+            return np.asarray(Image.new(mode, (width, 0)))
+        strip = None
+        if self._tiles is not None:
+            try:
+                strip = self._decode_rows(y0, y1, mode)
+            except Exception as e:
+                print(f"Aviso: falha na decodificação parcial ({e}); lendo a imagem inteira.")
+                self._tiles = None
+            else:
+                if strip.size != (width, y1 - y0):
+                    print(f"Aviso: faixa decodificada com tamanho {strip.size}, esperado "
+                          f"{(width, y1 - y0)}; lendo a imagem inteira.")
+                    self._tiles = None
+                    strip = None
+        if strip is None:
+            strip = self._image.crop((0, y0, width, y1))
+        if strip.mode != mode:
+            strip = strip.convert(mode)
+        return np.asarray(strip)
+
+    def _partial_decoding_works(self):
+        """Confere os atributos internos do Pillow e decodifica a primeira linha como teste."""
+        if not hasattr(self._image, '_size') or not isinstance(getattr(self._image, 'tile', None), list):
+            return False
+        try:
+            strip = self._decode_rows(0, 1)
+        except Exception:
+            return False
+        return strip.size == (self.size[0], 1) and strip.mode == 'RGBA'
+
+    def _decode_rows(self, y0, y1, mode='RGBA'):
+        width = self.size[0]
+        tiles = []
+        for ty0, ty1, offset, rawmode, stride, orientation in self._tiles:
+            a, b = max(y0, ty0), min(y1, ty1)
+            if a >= b:
+                continue
+            if orientation < 0:
+                # Linhas gravadas de baixo para cima (ex: BMP).
+                start = offset + (ty1 - b) * stride
+            else:
+                start = offset + (a - ty0) * stride
+            tiles.append(('raw', (0, a - y0, width, b - y0), start, (rawmode, stride, orientation)))
+        strip = _open_unbounded(self.path)
+        try:
+            strip.tile = tiles
+            strip._size = (width, y1 - y0)
+            if hasattr(strip, '_tile_size'):
+                strip._tile_size = strip._size
+            strip.load()
+            # Cópia (ou conversão) antes do `close` abaixo.
+            return strip.convert(mode) if strip.mode != mode else strip.copy()
+        finally:
+            strip.close()
+
+    def iter_strips(self, rows):
+        """Itera (y0, faixa RGBA) em faixas de `rows` linhas."""
+        height = self.size[1]
+        rows = max(1, int(rows))
+        for y0 in range(0, height, rows):
+            yield y0, self.read_rows(y0, y0 + rows)
+
+    def close(self):
+        if self.path is not None:
+            self._image.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_thumbnail(source, max_side, band_rows=256):
+    """Miniatura RGBA com o maior lado de no máximo ~`max_side`, decodificada por faixas.
+
+    Reduz cada faixa com `Image.reduce` (média de caixas) sem montar a imagem inteira;
+    o pico de memória é proporcional a largura × `band_rows`. JPEGs usam `draft`,
+    que já decodifica o arquivo em escala reduzida.
+
+    Args:
+        source: str | os.PathLike | PIL.Image - Como em `ImageStripReader`.
+        max_side: int - Lado máximo desejado.
+
+    Returns:
+        PIL.Image: Miniatura RGBA.
+    """
+    path = unloaded_file_path(source) if isinstance(source, Image.Image) else os.fspath(source)
+    if path is not None:
+        image = _open_unbounded(path)
+        try:
+            if image.format == 'JPEG':
+                image.draft('RGB', (max_side, max_side))
+                thumbnail = image.convert('RGBA')
+                thumbnail.thumbnail((max_side, max_side))
+                return thumbnail
+        finally:
+            image.close()
+    with ImageStripReader(source) as reader:
+        width, height = reader.size
+        factor = max(1, -(-max(width, height) // int(max_side)))
+        band_rows = max(1, int(band_rows) // factor) * factor
+        rows = []
+        for _, strip in reader.iter_strips(band_rows):
+            rows.append(np.asarray(Image.fromarray(strip, 'RGBA').reduce(factor)))
+    return Image.fromarray(np.concatenate(rows), 'RGBA')
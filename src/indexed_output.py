@@ -0,0 +1,121 @@
+"""Indexed pixel art output: index array plus a global palette (no PyQt imports).
+
+O motor produz, para cada bloco, o índice da sua cor numa paleta global
+(a união das paletas dos rótulos, sem cores repetidas). A imagem RGBA sai
+de uma única consulta vetorizada nessa paleta, e o PNG indexado (modo 'P')
+é gravado direto do array de índices, sem requantizar a imagem.
+"""
+
+import numpy as np
+from PIL import Image
+
+# Limite de cores de um PNG indexado (modo 'P').
+MAX_INDEXED_COLORS = 256
+
+
+def index_dtype(n_colors):
+    """Menor dtype inteiro sem sinal que indexa `n_colors` cores."""
+    if n_colors <= 1 << 8:
+        return np.uint8
+    if n_colors <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+def build_global_palette(label_palettes):
+    """Une as paletas dos rótulos numa paleta global sem cores repetidas.
+
+    As cores ficam na ordem em que aparecem pela primeira vez (a paleta
+    combinada do rótulo 0 vem primeiro).
+
+    Args:
+        label_palettes: list[tuple] - Paleta (rgb (K, 3) uint8, coordenadas) de cada rótulo.
+
+    Returns:
+        tuple[np.ndarray, list[np.ndarray]]: (paleta global (G, 3) uint8, tabela
+            índice local -> índice global de cada rótulo, no dtype de `index_dtype(G)`).
+    """
+    rgb_list = [np.asarray(rgb, dtype=np.uint8).reshape(-1, 3) for rgb, _ in label_palettes]
+    stacked = np.concatenate(rgb_list) if rgb_list else np.empty((0, 3), dtype=np.uint8)
+    packed = (stacked[:, 0].astype(np.uint32) << 16) | (stacked[:, 1].astype(np.uint32) << 8) | stacked[:, 2]
+    _, first, inverse = np.unique(packed, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    global_rgb = stacked[first[order]]
+    global_indices = rank[inverse.reshape(-1)].astype(index_dtype(len(global_rgb)))
+    bounds = np.cumsum([len(rgb) for rgb in rgb_list])[:-1]
+    return global_rgb, np.split(global_indices, bounds)
+
+
+class IndexedPixelArt:
+    """Pixel art como array de índices (H, W) numa paleta global (G, 3) uint8.
+
+    Todos os pixels são opacos: o motor sempre atribui uma cor a cada bloco.
+    """
+
+    def __init__(self, indices, palette):
+        self.indices = np.asarray(indices)
+        self.palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        if self.indices.ndim != 2:
+            raise ValueError(f"Esperado array de índices (H, W), recebido {self.indices.shape}")
+
+    @property
+    def size(self):
+        """(largura, altura), como `PIL.Image.size`."""
+        height, width = self.indices.shape
+        return width, height
+
+    def to_rgba(self):
+        """Array RGBA (H, W, 4) uint8 montado com uma única consulta à paleta."""
+        lut = np.empty((len(self.palette), 4), dtype=np.uint8)
+        lut[:, :3] = self.palette
+        lut[:, 3] = 255
+        return lut[self.indices]
+
+    def to_image(self):
+        """Imagem RGBA (PIL)."""
+        return Image.fromarray(self.to_rgba(), 'RGBA')
+
+    def compact(self):
+        """Cópia só com as cores usadas, na ordem da paleta global.
+
+        Returns:
+            IndexedPixelArt: Paleta reduzida e índices remapeados.
+        """
+        used = np.zeros(len(self.palette), dtype=bool)
+        used[np.unique(self.indices)] = True
+        remap = (np.cumsum(used) - 1).astype(index_dtype(int(used.sum())))
+        return IndexedPixelArt(remap[self.indices], self.palette[used])
+
+    def to_indexed_image(self):
+        """Imagem indexada (modo 'P') com a paleta das cores usadas.
+
+        Raises:
+            ValueError: Se a imagem usar mais de MAX_INDEXED_COLORS cores.
+        """
+        art = self.compact()
+        if len(art.palette) > MAX_INDEXED_COLORS:
+            raise ValueError(f"A imagem usa {len(art.palette)} cores; o PNG indexado aceita até "
+                             f"{MAX_INDEXED_COLORS}.")
+        image = Image.fromarray(art.indices.astype(np.uint8), 'P')
+        image.putpalette(art.palette.tobytes())
+        return image
+
+    def save_png(self, path, indexed=True):
+        """Grava a pixel art em PNG.
+
+        Args:
+            path: str - Caminho do arquivo.
+            indexed: bool - Grava PNG indexado (modo 'P'); se a imagem usar mais de
+                MAX_INDEXED_COLORS cores, grava RGBA com um aviso.
+        """
+        if indexed:
+            try:
+                image = self.to_indexed_image()
+            except ValueError as e:
+                print(f"Aviso: {e} Gravando PNG RGBA.")
+            else:
+                image.save(path, 'PNG', optimize=True)
+                return
+        self.to_image().save(path, 'PNG')
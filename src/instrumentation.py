@@ -0,0 +1,143 @@
+"""Per-stage timing and memory instrumentation (no PyQt imports).
+
+O motor aceita um `observer` opcional que recebe eventos de início e fim
+de cada etapa (tempo de parede e quantidade de itens). Sem observer, as
+etapas usam um contexto nulo compartilhado e nada é medido.
+
+`StageRecorder` é o observer padrão: acumula tempos por etapa e, com
+`trace_memory=True`, o pico de memória alocada (tracemalloc) em cada uma.
+"""
+
+import contextlib
+import time
+import tracemalloc
+
+# Etapas reportadas pelo motor, na ordem em que costumam ocorrer.
+STAGES = (
+    'palette_prep',  # paletas hex -> RGB/Lab
+    'decode',  # leitura/conversão da imagem original para RGBA
+    'label_build',  # empilhamento dos mapas de segmentação em rótulos
+    'reduction',  # cor representativa de cada bloco
+    'color_conversion',  # cores dos blocos sRGB -> Lab
+    'matching',  # cor mais próxima da paleta de cada bloco
+    'dithering',  # pontilhado dos assuntos que o pedem
+    'parallel_render',  # redução + casamento nos processos worker
+    'assembly',  # montagem da imagem de saída
+)
+
+STAGE_NAMES = {
+    'palette_prep': "Preparação das paletas",
+    'decode': "Decodificação da imagem",
+    'label_build': "Mapa de rótulos",
+    'reduction': "Redução dos blocos",
+    'color_conversion': "Conversão para Lab",
+    'matching': "Casamento de cores",
+    'dithering': "Pontilhado",
+    'parallel_render': "Renderização paralela",
+    'assembly': "Montagem da saída",
+}
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class GenerationObserver:
+    """Interface dos observers; as implementações padrão não fazem nada."""
+
+    def stage_begin(self, stage):
+        pass
+
+    def stage_end(self, stage, seconds, items=None):
+        pass
+
+
+class _ObservedStage:
+    __slots__ = ('observer', 'name', 'items', 'start')
+
+    def __init__(self, observer, name, items):
+        self.observer = observer
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.observer.stage_begin(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.observer.stage_end(self.name, time.perf_counter() - self.start, self.items)
+        return False
+
+
+def stage(observer, name, items=None):
+    """Contexto que reporta a etapa `name` ao observer (nulo se observer for None)."""
+    if observer is None:
+        return _NULL_STAGE
+    return _ObservedStage(observer, name, items)
+
+
+class StageRecorder(GenerationObserver):
+    """Acumula tempo, itens e chamadas de cada etapa.
+
+    Args:
+        trace_memory: bool - Mede o pico de memória de cada etapa com tracemalloc
+            (tem custo; inicia o tracemalloc se ainda não estiver ativo).
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}  # etapa -> {'seconds', 'items', 'calls', 'peak_bytes'}
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stage_begin(self, stage):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def stage_end(self, stage, seconds, items=None):
+        entry = self.stages.setdefault(stage, {'seconds': 0.0, 'items': 0, 'calls': 0, 'peak_bytes': None})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+        if items:
+            entry['items'] += int(items)
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            entry['peak_bytes'] = max(entry['peak_bytes'] or 0, peak)
+
+    def close(self):
+        """Encerra o tracemalloc se foi iniciado por este recorder."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @property
+    def total_seconds(self):
+        return sum(entry['seconds'] for entry in self.stages.values())
+
+    def summary(self):
+        """Resumo serializável em JSON, na ordem de STAGES."""
+        ordered = sorted(self.stages, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))
+        result = {}
+        for name in ordered:
+            entry = self.stages[name]
+            record = {'seconds': round(entry['seconds'], 6), 'calls': entry['calls']}
+            if entry['items']:
+                record['items'] = entry['items']
+            if entry['peak_bytes'] is not None:
+                record['peak_bytes'] = entry['peak_bytes']
+            result[name] = record
+        return result
+
+    def format_summary(self):
+        """Texto de uma linha por etapa (ex: para a interface ou logs)."""
+        lines = []
+        for name, record in self.summary().items():
+            line = f"{STAGE_NAMES.get(name, name)}: {record['seconds'] * 1000:.1f} ms"
+            if 'items' in record:
+                line += f" ({record['items']} itens)"
+            if 'peak_bytes' in record:
+                line += f", pico {record['peak_bytes'] / (1024 * 1024):.1f} MB"
+            lines.append(line)
+        lines.append(f"Total: {self.total_seconds * 1000:.1f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,68 @@
+"""Subject label map helpers (pure NumPy, no PyQt imports).
+
+Empilha os mapas de segmentação uma única vez em um array de rótulos
+(out_h, out_w), em vez de percorrer o dicionário de mapas a cada pixel.
+O rótulo 0 é reservado para "nenhum assunto" (paleta combinada) e o
+assunto de índice i recebe o rótulo i + 1.
+"""
+
+import numpy as np
+
+FALLBACK_LABEL = 0
+ALPHA_THRESHOLD = 128
+
+
+def map_alpha(segmentation_map):
+    """Extrai o canal alfa (H, W) uint8 de um mapa (PIL.Image ou array)."""
+    if hasattr(segmentation_map, 'getchannel'):
+        if segmentation_map.mode != 'RGBA':
+            segmentation_map = segmentation_map.convert('RGBA')
+        return np.asarray(segmentation_map.getchannel('A'))
+    arr = np.asarray(segmentation_map)
+    if arr.ndim == 3:
+        return arr[:, :, 3]
+    return arr
+
+
+def label_dtype(n_subjects):
+    """Menor dtype inteiro que comporta os rótulos de `n_subjects` assuntos."""
+    return np.uint8 if n_subjects < 256 else np.uint16
+
+
+def build_label_map(segmentation_maps, out_size, threshold=ALPHA_THRESHOLD):
+    """Empilha os mapas de segmentação em um único array de rótulos.
+
+    Mantém a prioridade original: quando mapas se sobrepõem, vence o
+    primeiro mapa carregado (ordem de inserção do dicionário).
+
+    Args:
+        segmentation_maps: dict[str, PIL.Image | np.ndarray] - {assunto: mapa}.
+        out_size: tuple[int, int] - (out_w, out_h) esperado para os mapas.
+        threshold: int - Alfa mínimo (exclusivo) para o pixel pertencer ao assunto.
+
+    Returns:
+        tuple[np.ndarray, list[str]]: (rótulos (out_h, out_w), assuntos na ordem dos rótulos).
+    """
+    out_w, out_h = out_size
+    subjects = list(segmentation_maps.keys())
+    labels = np.full((out_h, out_w), FALLBACK_LABEL, dtype=label_dtype(len(subjects)))
+    for index, subject in enumerate(subjects):
+        alpha = map_alpha(segmentation_maps[subject])
+        map_h, map_w = alpha.shape[:2]
+        if (map_w, map_h) != (out_w, out_h):
+            raise ValueError(f"Mapa '{subject}' tem dimensões erradas ({map_w}x{map_h}). Esperado ({out_w}x{out_h})")
+        labels[(alpha > threshold) & (labels == FALLBACK_LABEL)] = index + 1
+    return labels, subjects
+
+
+def group_by_label(labels, n_labels):
+    """Agrupa as posições (achatadas) de cada rótulo com uma única ordenação.
+
+    Returns:
+        list[np.ndarray]: Para cada rótulo 0..n_labels-1, os índices planos dos seus blocos.
+    """
+    flat = np.asarray(labels).ravel()
+    order = np.argsort(flat, kind='stable')
+    counts = np.bincount(flat, minlength=n_labels)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_labels)]
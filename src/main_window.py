@@ -4,9 +4,7 @@ Moved into `src` package to improve project structure.
 This module exposes `PixelMakerWindow` class only (no top-level execution).
 """
 
-import os
 from PyQt5.QtWidgets import (
-    QApplication,
     QMainWindow,
     QWidget,
     QHBoxLayout,
@@ -14,10 +12,9 @@ from PyQt5.QtWidgets import (
     QLabel,
     QFileDialog,
     QMessageBox,
+    QApplication,
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QImage
-from PIL import Image
 
 from src.palette_processor import parse_palette_line
 from src.ui import (
@@ -27,32 +24,21 @@ from src.ui import (
     create_controls_group,
     create_image_display_group,
 )
-from src.art_processor import generate_pixel_art
-
-
-def pil_to_qpixmap(pil):
-    try:
-        img = pil.convert('RGBA') if hasattr(pil, 'convert') else pil
-    except Exception:
-        return QPixmap()
-    try:
-        from PIL.ImageQt import ImageQt as _ImageQt
-        qim = _ImageQt(img)
-        return QPixmap.fromImage(qim)
-    except Exception:
-        pass
-    try:
-        w, h = img.size
-        data = img.tobytes('raw', 'RGBA')
-        qimg = QImage(data, w, h, QImage.Format_RGBA8888)
-        return QPixmap.fromImage(qimg)
-    except Exception:
-        try:
-            data = img.convert('BGRA').tobytes('raw', 'BGRA')
-            qimg = QImage(data, w, h, QImage.Format_ARGB32)
-            return QPixmap.fromImage(qimg)
-        except Exception:
-            return QPixmap()
+from src.art_processor import RenderSession
+from src.block_cache import default_block_cache
+from src.palette_lut import default_lut_cache
+from src.color_matching import DEFAULT_METRIC
+from src.dithering import DEFAULT_DITHER
+from src.instrumentation import StageRecorder
+from src.ui.generation_worker import GenerationWorker, start_generation, STAGE_LABELS
+from src.ui.image_preview import scaled_pixmap
+from src.ui.map_loading_worker import start_map_loading
+from src.map_loading import validate_map_files
+from src.project_file import PROJECT_EXTENSION, save_project, load_project, project_session
+from src.image_strips import open_image, read_thumbnail, unloaded_file_path
+
+# Maior lado da miniatura da imagem original exibida na janela.
+ORIGINAL_PREVIEW_SIDE = 1024
 
 
 class PixelMakerWindow(QMainWindow):
@@ -64,12 +50,22 @@ class PixelMakerWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
-        self.original_image = None  # PIL.Image
-        self.segmentation_maps = {}  # {subject_name: PIL.Image}
+        self.original_image = None  # PIL.Image aberta e não carregada (ver image_strips.open_image)
+        self.original_image_path = None
+        self._original_preview = None  # miniatura RGBA exibida em lbl_img_original
+        self.segmentation_maps = {}  # {subject_name: alfa (H, W) uint8} (ver map_loading)
         self.palette_inputs = {}  # {subject_name: QLineEdit}
         self.color_palettes = {}  # {subject_name: ["#RRGGBB", ...]}
+        self.subject_dither = {}  # {subject_name: modo de pontilhado} (ausente = sem pontilhado)
         self.generated_pixel_art = None
+        self.generated_indexed_art = None  # indexed_output.IndexedPixelArt da última geração
         self.required_map_dims = None  # (w, h) in pixels
+        self._generation_worker = None  # GenerationWorker em execução
+        self._generation_thread = None
+        self._render_session = None  # RenderSession reutilizada entre edições de paleta
+        self._generation_timings = None  # StageRecorder da geração atual/última
+        self._map_loading_job = None  # MapLoadingJob em execução
+        self._map_loading_request = 0  # resultados de pedidos anteriores são descartados
 
         self.initUI()
 
@@ -115,19 +111,26 @@ class PixelMakerWindow(QMainWindow):
         self.palette_inputs.clear()
 
     def _clear_generated_art(self):
+        self._cancel_generation()
         self.generated_pixel_art = None
+        self.generated_indexed_art = None
         try:
             self.lbl_img_pixel_art.setText("Aguardando geração...")
         except Exception:
             pass
         try:
             self.btn_save.setEnabled(False)
+            self.btn_export_sprites.setEnabled(False)
+            self.lbl_generation_timings.setVisible(False)
         except Exception:
             pass
 
     def _clear_loaded_images(self):
-        self.original_image = None
+        self._render_session = None
+        self._set_original_image(None, None)
         self.segmentation_maps.clear()
+        self._map_loading_request += 1
+        self._map_loading_job = None
         self._clear_palette_widgets()
         try:
             self.lbl_original_path.setText("Nenhum arquivo carregado.")
@@ -145,6 +148,7 @@ class PixelMakerWindow(QMainWindow):
         self._clear_generated_art()
         try:
             self.btn_clear.setEnabled(False)
+            self.btn_save_project.setEnabled(False)
         except Exception:
             pass
 
@@ -154,8 +158,11 @@ class PixelMakerWindow(QMainWindow):
         if not file_path:
             return None
         try:
-            img = Image.open(file_path).convert('RGBA')
-            return file_path, img
+            # Só o cabeçalho: a imagem é decodificada por faixas (miniatura, geração,
+            # extração de paletas) e nunca fica inteira na memória da janela.
+            img = open_image(file_path)
+            preview = read_thumbnail(img, ORIGINAL_PREVIEW_SIDE)
+            return file_path, img, preview
         except Exception as e:
             QMessageBox.critical(self, "Erro ao Carregar Imagem",
                                  f"Não foi possível carregar o arquivo:\n{file_path}\n\nErro: {e}")
@@ -166,22 +173,35 @@ class PixelMakerWindow(QMainWindow):
         res = self._load_original_image_file()
         if not res:
             return
-        file_path, img = res
+        file_path, img, preview = res
         width, height = img.size
-        self.original_image = img
+        self._set_original_image(img, file_path, preview)
         self.lbl_original_path.setText(f"Carregado: {file_path}")
         self.lbl_original_dims.setText(f"Dimensões: {width} x {height} px")
 
-        pixmap = QPixmap(file_path)
         self.lbl_img_original.setPixmap(
-            pixmap.scaled(self.lbl_img_original.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            scaled_pixmap(preview, self.lbl_img_original.size(), Qt.SmoothTransformation)
         )
 
         self.spin_scale_factor.setEnabled(True)
         self.required_map_dims = None
         self.btn_clear.setEnabled(True)
+        self.btn_save_project.setEnabled(True)
         self._clear_generated_art()
 
+    def _set_original_image(self, image, path, preview=None):
+        """Troca a imagem original, fechando o arquivo da anterior.
+
+        Leitores em andamento (geração, pré-visualização) abrem o próprio arquivo
+        (ver `image_strips.ImageStripReader`), então fechar a imagem não os afeta.
+        """
+        previous = self.original_image
+        self.original_image = image
+        self.original_image_path = path
+        self._original_preview = preview
+        if previous is not None and previous is not image and unloaded_file_path(previous):
+            previous.close()
+
     def _load_segmentation_maps(self):
         print("Abrindo diálogo para múltiplos mapas de segmentação...")
         if not self.required_map_dims:
@@ -194,24 +214,27 @@ class PixelMakerWindow(QMainWindow):
         if not file_paths:
             return
 
-        errors = []
-        loaded = {}
-        req_w, req_h = self.required_map_dims
-
-        for file_path in file_paths:
-            try:
-                img = Image.open(file_path).convert('RGBA')
-                w, h = img.size
-                if (w, h) != (req_w, req_h):
-                    errors.append(f"{os.path.basename(file_path)}: Dimensões erradas (Esperado {req_w}x{req_h}, Encontrado {w}x{h})")
-                    continue
-                subject_name = os.path.splitext(os.path.basename(file_path))[0]
-                if subject_name in self.segmentation_maps or subject_name in loaded:
-                    errors.append(f"{os.path.basename(file_path)}: Nome duplicado ('{subject_name}'). Renomeie o arquivo ou remova o já existente.")
-                    continue
-                loaded[subject_name] = img
-            except Exception as e:
-                errors.append(f"{os.path.basename(file_path)}: Erro ao ler ({e})")
+        # Nomes e dimensões vêm do cabeçalho; só os válidos são decodificados (em paralelo).
+        paths, errors = validate_map_files(file_paths, self.required_map_dims, self.segmentation_maps)
+        if not paths:
+            self._on_maps_loaded(self._map_loading_request, {}, errors)
+            return
+        self._map_loading_request += 1
+        request = self._map_loading_request
+        self.btn_add_maps.setEnabled(False)
+        self.lbl_maps_loaded.setText(f"Carregando {len(paths)} mapas...")
+        self._map_loading_job = start_map_loading(
+            paths, lambda maps, load_errors: self._on_maps_loaded(request, maps, errors + load_errors))
+
+    def _on_maps_loaded(self, request, loaded, errors):
+        if request != self._map_loading_request:
+            return  # a imagem foi trocada ou limpa durante o carregamento
+        self._map_loading_job = None
+        self.btn_add_maps.setEnabled(self.required_map_dims is not None)
+        for subject in [s for s in loaded if s in self.segmentation_maps]:
+            # carregado por outro pedido enquanto este decodificava
+            errors.append(f"{subject}: Nome duplicado ('{subject}'). Renomeie o arquivo ou remova o já existente.")
+            del loaded[subject]
 
         if errors:
             QMessageBox.warning(self, "Erros ao Carregar Mapas",
@@ -271,10 +294,11 @@ class PixelMakerWindow(QMainWindow):
         dlg = PaletteEditorDialog(self, subject_name, img, initial_text=initial)
         dlg.exec_()
 
-    def _save_palette_for_subject(self, subject_name, text):
+    def _save_palette_for_subject(self, subject_name, text, dither=None):
         """Save palette text for a subject, update inputs and parsed palettes.
 
-        Raises Exception on invalid palette format.
+        `dither` (a mode from `dithering.DITHER_MODES`) replaces the subject's
+        dithering when given. Raises Exception on invalid palette format.
         """
         try:
             colors = parse_palette_line(text)
@@ -285,6 +309,11 @@ class PixelMakerWindow(QMainWindow):
             raise Exception("A paleta está vazia ou em formato inválido.")
 
         self.color_palettes[subject_name] = colors
+        if dither is not None:
+            if dither == DEFAULT_DITHER:
+                self.subject_dither.pop(subject_name, None)
+            else:
+                self.subject_dither[subject_name] = dither
         le = self.palette_inputs.get(subject_name)
         if le:
             le.setText(", ".join(colors))
@@ -341,6 +370,11 @@ class PixelMakerWindow(QMainWindow):
             pass
 
     def _on_scale_changed(self, value):
+        if self._map_loading_job is not None:
+            # mapas em carregamento foram validados para as dimensões anteriores
+            self._map_loading_request += 1
+            self._map_loading_job = None
+            self.lbl_maps_loaded.setText(f"{len(self.segmentation_maps)} mapas carregados." if self.segmentation_maps else "Nenhum mapa carregado.")
         if not self.original_image:
             import re
             txt = self.lbl_original_dims.text() if hasattr(self, 'lbl_original_dims') else ''
@@ -392,6 +426,7 @@ class PixelMakerWindow(QMainWindow):
                 self.segmentation_maps.pop(name, None)
                 self.palette_inputs.pop(name, None)
                 self.color_palettes.pop(name, None)
+                self.subject_dither.pop(name, None)
                 removed.append(name)
 
         self._update_palette_widgets()
@@ -429,6 +464,8 @@ class PixelMakerWindow(QMainWindow):
 
     def _generate_pixel_art(self):
         print("Iniciando geração de pixel art (UI)...")
+        if self._generation_worker is not None:
+            return
         if not self._check_generate_ready():
             QMessageBox.critical(self, "Erro", "Não é possível gerar. Verifique se a imagem original, os mapas e as paletas estão carregados e processados.")
             return
@@ -438,48 +475,262 @@ class PixelMakerWindow(QMainWindow):
         except Exception:
             pass
 
+        self._generation_timings = StageRecorder()
+        worker = GenerationWorker(self._get_render_session(), self.color_palettes,
+                                  observer=self._generation_timings, dither=dict(self.subject_dither),
+                                  indexed=True, **self._matching_options())
+        worker.progress.connect(self._on_generation_progress)
+        worker.stage.connect(self._on_generation_stage)
+        worker.finished.connect(self._on_generation_finished)
+        worker.failed.connect(self._on_generation_failed)
+        worker.cancelled.connect(self._on_generation_cancelled)
+        self._generation_worker = worker
+        self._set_generation_running(True)
+        self._generation_thread = start_generation(self, worker)
+
+    def _selected_metric(self):
+        """Métrica de distância de cor escolhida na interface."""
+        return self.combo_metric.currentData() or DEFAULT_METRIC
+
+    def _selected_lut_cache(self):
+        """Cache de LUTs se o casamento por LUT estiver marcado, senão None (casamento exato)."""
+        return default_lut_cache() if self.chk_lut.isChecked() else None
+
+    def _matching_options(self):
+        """Opções de casamento da interface (métrica, poda, LUT), as mesmas na geração e na pré-visualização."""
+        return {
+            'metric': self._selected_metric(),
+            'prune': self.chk_prune.isChecked(),
+            'lut_cache': self._selected_lut_cache(),
+        }
+
+    def _get_render_session(self):
+        """Reaproveita a sessão incremental enquanto imagem, mapas e escala não mudam."""
+        block_size = self.spin_scale_factor.value()
+        session = self._render_session
+        if session is None or not session.is_valid_for(self.original_image, self.segmentation_maps, block_size):
+            session = RenderSession(self.original_image, self.segmentation_maps, block_size,
+                                    block_cache=default_block_cache())
+            self._render_session = session
+        return session
+
+    def _set_generation_running(self, running):
+        """Alterna os controles entre o estado "gerando" e o estado normal."""
         try:
-            QApplication.processEvents()
+            self.progress_generation.setValue(0)
+            self.progress_generation.setVisible(running)
+            self.lbl_generation_stage.setText("")
+            self.lbl_generation_stage.setVisible(running)
+            self.btn_cancel_generate.setEnabled(running)
+            self.btn_cancel_generate.setVisible(running)
+            self.btn_generate.setEnabled(not running)
+            self.btn_clear.setEnabled(not running and bool(self.original_image or self.segmentation_maps))
         except Exception:
             pass
 
+    def _finish_generation(self):
+        self._generation_worker = None
+        self._generation_thread = None
+        self._set_generation_running(False)
+        self._check_generate_ready()
+
+    def _cancel_generation(self):
+        """Pede ao worker em execução que pare na próxima faixa de linhas."""
+        worker = self._generation_worker
+        if worker is None:
+            return
+        worker.cancel()
         try:
-            self.generated_pixel_art = generate_pixel_art(
-                self.original_image,
-                self.segmentation_maps,
-                self.color_palettes,
-                self.spin_scale_factor.value(),
-            )
+            self.btn_cancel_generate.setEnabled(False)
+            self.lbl_generation_stage.setText("Cancelando...")
+        except Exception:
+            pass
+
+    def _on_generation_progress(self, percent):
+        try:
+            self.progress_generation.setValue(percent)
+        except Exception:
+            pass
 
-            if not self.generated_pixel_art:
-                raise Exception("Algoritmo não retornou imagem.")
+    def _on_generation_stage(self, stage):
+        try:
+            self.lbl_generation_stage.setText(STAGE_LABELS.get(stage, stage))
+        except Exception:
+            pass
 
-            pixmap = pil_to_qpixmap(self.generated_pixel_art)
-            self.lbl_img_pixel_art.setPixmap(
-                pixmap.scaled(self.lbl_img_pixel_art.size(), Qt.KeepAspectRatio, Qt.FastTransformation)
-            )
-            self.btn_save.setEnabled(True)
+    def _on_generation_finished(self, image):
+        self._finish_generation()
+        if not image:
+            self._on_generation_failed("Algoritmo não retornou imagem.")
+            return
+        self.generated_indexed_art = image
+        self.generated_pixel_art = image.to_image()
+        self._show_generation_timings()
+        self.lbl_img_pixel_art.setPixmap(
+            scaled_pixmap(self.generated_pixel_art, self.lbl_img_pixel_art.size(), Qt.FastTransformation)
+        )
+        self.btn_save.setEnabled(True)
+        self.btn_export_sprites.setEnabled(True)
 
-        except Exception as e:
-            print(f"ERRO na geração: {e}")
-            self._clear_generated_art()
-            QMessageBox.critical(self, "Erro na Geração", f"Ocorreu um erro durante o processamento:\n\n{e}")
+    def _show_generation_timings(self):
+        recorder = self._generation_timings
+        if recorder is None:
+            return
+        text = recorder.format_summary()
+        print(f"Tempos da geração:\n{text}")
+        try:
+            self.lbl_generation_timings.setText(text)
+            self.lbl_generation_timings.setVisible(True)
+        except Exception:
+            pass
+
+    def _on_generation_failed(self, message):
+        print(f"ERRO na geração: {message}")
+        self._finish_generation()
+        self._clear_generated_art()
+        QMessageBox.critical(self, "Erro na Geração", f"Ocorreu um erro durante o processamento:\n\n{message}")
+
+    def _on_generation_cancelled(self):
+        print("Geração cancelada.")
+        self._finish_generation()
+        self._clear_generated_art()
+        try:
+            self.lbl_img_pixel_art.setText("Geração cancelada.")
+        except Exception:
+            pass
+
+    def closeEvent(self, event):
+        thread = self._generation_thread
+        self._cancel_generation()
+        if thread is not None:
+            try:
+                thread.quit()
+                thread.wait()
+            except RuntimeError:
+                # a thread já foi destruída pelo Qt
+                pass
+        super().closeEvent(event)
 
     def _save_pixel_art(self):
         if not self.generated_pixel_art:
             QMessageBox.warning(self, "Nada para Salvar", "Gere uma imagem de pixel art primeiro.")
             return
 
-        file_filter = "Imagem PNG (*.png)"
-        file_path, _ = QFileDialog.getSaveFileName(self, "Salvar Pixel Art", "", file_filter)
+        indexed_filter = "PNG indexado (*.png)"
+        file_filter = f"{indexed_filter};;PNG RGBA (*.png)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "Salvar Pixel Art", "", file_filter,
+                                                                 indexed_filter)
 
         if file_path:
             try:
                 # Ensure extension
                 if not file_path.lower().endswith('.png'):
                     file_path += '.png'
-                # Save PIL image
-                self.generated_pixel_art.save(file_path, 'PNG')
+                if self.generated_indexed_art is not None:
+                    # PNG indexado sai direto dos índices do motor (RGBA se passar de 256 cores).
+                    self.generated_indexed_art.save_png(file_path, indexed=selected_filter == indexed_filter)
+                else:
+                    self.generated_pixel_art.save(file_path, 'PNG')
                 QMessageBox.information(self, "Sucesso", f"Imagem salva em:\n{file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Erro ao Salvar", f"Não foi possível salvar o arquivo:\n{e}")
+
+    def _export_sprites(self):
+        """Abre o diálogo de fatiamento e exportação de sprites da pixel art gerada."""
+        art = self.generated_indexed_art if self.generated_indexed_art is not None else self.generated_pixel_art
+        if art is None:
+            QMessageBox.warning(self, "Nada para Exportar", "Gere uma imagem de pixel art primeiro.")
+            return
+
+        from src.ui.sprite_export_dialog import SpriteExportDialog
+        dlg = SpriteExportDialog(self, art)
+        dlg.exec_()
+
+    def _project_file_filter(self):
+        return f"Projeto PixelMaker (*{PROJECT_EXTENSION})"
+
+    def _save_project(self):
+        """Grava imagem, mapas, paletas, escala, sessão incremental e último resultado num projeto."""
+        if self.original_image is None:
+            QMessageBox.warning(self, "Nada para Salvar", "Carregue a imagem original primeiro.")
+            return
+        if self._generation_worker is not None or self._map_loading_job is not None:
+            QMessageBox.warning(self, "Aguarde", "Espere a geração ou o carregamento dos mapas terminar.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Salvar Projeto", "", self._project_file_filter())
+        if not file_path:
+            return
+        if not file_path.lower().endswith(PROJECT_EXTENSION):
+            file_path += PROJECT_EXTENSION
+
+        block_size = self.spin_scale_factor.value()
+        session = self._render_session
+        if session is not None and not session.is_valid_for(self.original_image, self.segmentation_maps, block_size):
+            session = None
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            save_project(file_path, self.original_image, self.segmentation_maps, block_size, self.color_palettes,
+                         metric=self._selected_metric(), dither=self.subject_dither, session=session,
+                         pixel_art=self.generated_indexed_art, source_path=self.original_image_path)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Erro ao Salvar", f"Não foi possível salvar o projeto:\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "Sucesso", f"Projeto salvo em:\n{file_path}")
+
+    def _open_project(self):
+        """Restaura um projeto salvo, inclusive o último resultado, sem recalcular nada."""
+        if self._generation_worker is not None:
+            QMessageBox.warning(self, "Aguarde", "Espere a geração terminar.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Abrir Projeto", "", self._project_file_filter())
+        if not file_path:
+            return
+        try:
+            project = load_project(file_path)
+            session = project_session(project, block_cache=default_block_cache())
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao Abrir Projeto",
+                                 f"Não foi possível abrir o projeto:\n{file_path}\n\nErro: {e}")
+            return
+
+        self._clear_loaded_images()
+        img = project['original_image']
+        width, height = img.size
+        preview = read_thumbnail(img, ORIGINAL_PREVIEW_SIDE)
+        self._set_original_image(img, project['source_path'], preview)
+        self.lbl_original_path.setText(f"Projeto: {file_path}")
+        self.lbl_original_dims.setText(f"Dimensões: {width} x {height} px")
+        self.lbl_img_original.setPixmap(
+            scaled_pixmap(preview, self.lbl_img_original.size(), Qt.SmoothTransformation)
+        )
+        self.spin_scale_factor.setEnabled(True)
+        self.spin_scale_factor.blockSignals(True)
+        self.spin_scale_factor.setValue(project['block_size'])
+        self.spin_scale_factor.blockSignals(False)
+        self._on_scale_changed(self.spin_scale_factor.value())
+        metric_index = self.combo_metric.findData(project['metric'])
+        if metric_index >= 0:
+            self.combo_metric.setCurrentIndex(metric_index)
+
+        self.segmentation_maps.update(project['segmentation_maps'])
+        self.color_palettes = {subject: list(colors) for subject, colors in project['palettes'].items()}
+        self.subject_dither = dict(project['dither'])
+        self.lbl_maps_loaded.setText(f"{len(self.segmentation_maps)} mapas carregados." if self.segmentation_maps else "Nenhum mapa carregado.")
+        self.btn_clear.setEnabled(True)
+        self.btn_save_project.setEnabled(True)
+        self.btn_process_palettes.setEnabled(bool(self.segmentation_maps))
+        self._update_palette_widgets()
+        self._render_session = session
+
+        art = project['pixel_art']
+        if art is not None:
+            self.generated_indexed_art = art
+            self.generated_pixel_art = art.to_image()
+            self.lbl_img_pixel_art.setPixmap(
+                scaled_pixmap(self.generated_pixel_art, self.lbl_img_pixel_art.size(), Qt.FastTransformation)
+            )
+            self.btn_save.setEnabled(True)
+            self.btn_export_sprites.setEnabled(True)
+        self._check_generate_ready()
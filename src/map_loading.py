@@ -0,0 +1,109 @@
+"""Segmentation-map loading: header-only validation and parallel alpha decoding (no PyQt imports).
+
+O motor só lê o canal alfa dos mapas. Os arquivos são validados (nome e
+dimensões) pelo cabeçalho, sem decodificar os pixels; em seguida, os
+válidos são decodificados em paralelo num ThreadPoolExecutor (a
+decodificação do Pillow libera o GIL) e de cada um fica só o alfa
+(H, W) uint8, um quarto da memória do RGBA. `label_map.map_alpha` aceita
+esses arrays diretamente. Como as cores do mapa não são guardadas, as
+miniaturas e pré-visualizações dos mapas na interface mostram o alfa
+como máscara em tons de cinza (branco = assunto).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+
+def map_subject(path):
+    """Nome do assunto de um mapa: o nome do arquivo sem extensão."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def read_image_size(path):
+    """(largura, altura) lidas só do cabeçalho do arquivo."""
+    with Image.open(path) as img:
+        return img.size
+
+
+def load_map_alpha(path):
+    """Decodifica um mapa e devolve só o canal alfa.
+
+    Modos sem alfa e sem cor transparente viram alfa 255 sem conversão
+    (o mesmo resultado de `convert('RGBA')`).
+
+    Returns:
+        np.ndarray: Alfa (H, W) uint8.
+    """
+    with Image.open(path) as img:
+        if 'A' in img.getbands():
+            return np.array(img.getchannel('A'))
+        if 'transparency' in img.info:
+            return np.array(img.convert('RGBA').getchannel('A'))
+        width, height = img.size
+        img.load()  # confere se o arquivo decodifica (ex: truncado)
+        return np.full((height, width), 255, dtype=np.uint8)
+
+
+def validate_map_files(paths, required_size, existing=()):
+    """Valida nomes e dimensões dos mapas pelo cabeçalho, sem decodificar.
+
+    Args:
+        paths: list[str] - Arquivos selecionados (a ordem define a prioridade).
+        required_size: tuple[int, int] - (largura, altura) esperadas.
+        existing: Iterable[str] - Assuntos já carregados (nomes repetidos são recusados).
+
+    Returns:
+        tuple[dict[str, str], list[str]]: ({assunto: caminho} válidos, mensagens de erro).
+    """
+    req_w, req_h = required_size
+    taken = set(existing)
+    valid = {}
+    errors = []
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            w, h = read_image_size(path)
+        except Exception as e:
+            errors.append(f"{name}: Erro ao ler ({e})")
+            continue
+        if (w, h) != (req_w, req_h):
+            errors.append(f"{name}: Dimensões erradas (Esperado {req_w}x{req_h}, Encontrado {w}x{h})")
+            continue
+        subject = map_subject(path)
+        if subject in taken or subject in valid:
+            errors.append(f"{name}: Nome duplicado ('{subject}'). Renomeie o arquivo ou remova o já existente.")
+            continue
+        valid[subject] = path
+    return valid, errors
+
+
+def load_map_alphas(paths, workers=None):
+    """Decodifica os mapas em paralelo, guardando só o alfa de cada um.
+
+    Args:
+        paths: dict[str, str] - {assunto: caminho} (ver `validate_map_files`).
+        workers: int | None - Threads usadas; None usa todos os núcleos.
+
+    Returns:
+        tuple[dict[str, np.ndarray], list[str]]: ({assunto: alfa (H, W) uint8} na ordem
+            de `paths`, mensagens de erro dos arquivos que não decodificaram).
+    """
+    subjects = list(paths)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(subjects) or 1))
+
+    def load(subject):
+        try:
+            return load_map_alpha(paths[subject]), None
+        except Exception as e:
+            return None, f"{os.path.basename(paths[subject])}: Erro ao ler ({e})"
+
+    if workers == 1:
+        results = [load(subject) for subject in subjects]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(load, subjects))
+    maps = {subject: alpha for subject, (alpha, _) in zip(subjects, results) if alpha is not None}
+    return maps, [error for _, error in results if error]
@@ -0,0 +1,236 @@
+"""Automatic palette suggestion from the source image (no PyQt imports).
+
+Amostra os pixels da imagem original cobertos pelo mapa de segmentação de
+um assunto e agrupa as amostras com k-means em mini-lotes (Sculley) no
+espaço Lab. A amostragem limita o custo em imagens de vários megapixels e
+a atribuição de cada lote aos centros é vetorizada (produto de matrizes);
+`extract_palettes` processa vários assuntos em paralelo, lendo a imagem
+uma única vez. Uma imagem aberta com `image_strips.open_image` (ainda não
+carregada) não é decodificada inteira: as posições sorteadas são lidas
+faixa por faixa.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.color_space import srgb_to_lab, lab_to_srgb, rgb_array_to_hex_list
+from src.image_strips import ImageStripReader, unloaded_file_path
+from src.label_map import map_alpha, ALPHA_THRESHOLD
+
+DEFAULT_COLORS = 8
+# Pixels amostrados por assunto; bastam para estabilizar os centros.
+DEFAULT_SAMPLES = 20000
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_ITERATIONS = 100
+# Maior deslocamento de um centro (ΔE76) abaixo do qual o k-means para.
+DEFAULT_TOLERANCE = 0.05
+
+
+def image_pixels(image):
+    """Pixels (H, W, 3 | 4) uint8 da imagem; só converte modos que não são RGB/RGBA."""
+    if hasattr(image, 'convert'):
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        return np.asarray(image)
+    pixels = np.asarray(image)
+    if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+        raise ValueError(f"Esperada imagem (H, W, 3|4), recebido {pixels.shape}")
+    return pixels
+
+
+def sample_positions(size, segmentation_map=None, max_samples=DEFAULT_SAMPLES, seed=0, threshold=ALPHA_THRESHOLD):
+    """Sorteia as posições (ys, xs) amostradas por `sample_masked_pixels` numa imagem de `size` (W, H)."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    if segmentation_map is None:
+        ys = rng.integers(0, height, max_samples)
+        xs = rng.integers(0, width, max_samples)
+    else:
+        alpha = map_alpha(segmentation_map)
+        map_h, map_w = alpha.shape[:2]
+        block_size = width // map_w if map_w else 0
+        if block_size < 1 or height // map_h != block_size:
+            raise ValueError(f"Mapa de {map_w}x{map_h} incompatível com a imagem de {width}x{height}.")
+        blocks = np.flatnonzero(alpha.reshape(-1) > threshold)
+        if len(blocks) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        count = min(int(max_samples), len(blocks) * block_size * block_size)
+        block_y, block_x = np.divmod(blocks[rng.integers(0, len(blocks), count)], map_w)
+        ys = block_y * block_size + rng.integers(0, block_size, count)
+        xs = block_x * block_size + rng.integers(0, block_size, count)
+    return ys, xs
+
+
+def _opaque_rgb(samples, threshold=ALPHA_THRESHOLD):
+    if samples.shape[1] == 4:
+        samples = samples[samples[:, 3] > threshold]
+    return np.ascontiguousarray(samples[:, :3])
+
+
+def sample_masked_pixels(pixels, segmentation_map=None, max_samples=DEFAULT_SAMPLES, seed=0,
+                         threshold=ALPHA_THRESHOLD):
+    """Sorteia pixels opacos da imagem dentro do mapa de um assunto.
+
+    O mapa tem a resolução de saída (um pixel por bloco): sorteia-se um
+    bloco do assunto e, dentro dele, um pixel da imagem original.
+
+    Args:
+        pixels: np.ndarray (H, W, 3 | 4) uint8 - Ver `image_pixels`.
+        segmentation_map: PIL.Image | np.ndarray | None - Mapa do assunto
+            (W // block_size x H // block_size); None amostra a imagem inteira.
+        max_samples: int - Número de sorteios (com reposição).
+        threshold: int - Alfa mínimo (exclusivo) do mapa e da imagem.
+
+    Returns:
+        np.ndarray: Amostras RGB (n, 3) uint8 (vazio se o assunto não tiver pixels opacos).
+    """
+    height, width = pixels.shape[:2]
+    ys, xs = sample_positions((width, height), segmentation_map, max_samples, seed, threshold)
+    if len(ys) == 0:
+        return np.empty((0, 3), dtype=np.uint8)
+    return _opaque_rgb(pixels[ys, xs], threshold)
+
+
+def read_pixels_at(image, ys, xs, band_rows=256):
+    """Pixels RGBA (n, 4) das posições (ys, xs), lidos por faixas (ver `image_strips.ImageStripReader`)."""
+    samples = np.empty((len(ys), 4), dtype=np.uint8)
+    order = np.argsort(ys, kind='stable')
+    sorted_ys = ys[order]
+    with ImageStripReader(image) as reader:
+        height = reader.size[1]
+        for y0 in range(0, height, band_rows):
+            start, stop = np.searchsorted(sorted_ys, [y0, y0 + band_rows])
+            if start == stop:
+                continue
+            strip = reader.read_rows(y0, y0 + band_rows)
+            picked = order[start:stop]
+            samples[picked] = strip[ys[picked] - y0, xs[picked]]
+    return samples
+
+
+def _assign(points, centers):
+    """Índice do centro mais próximo (euclidiano) de cada ponto: argmin |c|²/2 - p·c."""
+    half_norms = 0.5 * np.einsum('kc,kc->k', centers, centers)
+    return np.argmin(half_norms[None, :] - points @ centers.T, axis=1)
+
+
+def _kmeans_plusplus(points, n_clusters, rng):
+    """Centros iniciais pelo k-means++ (sorteio proporcional à distância² ao centro mais próximo)."""
+    centers = np.empty((n_clusters, points.shape[1]), dtype=np.float64)
+    centers[0] = points[rng.integers(len(points))]
+    diff = points - centers[0]
+    closest = np.einsum('nc,nc->n', diff, diff)
+    for index in range(1, n_clusters):
+        total = closest.sum()
+        if total <= 0:
+            centers[index:] = centers[0]
+            break
+        centers[index] = points[rng.choice(len(points), p=closest / total)]
+        diff = points - centers[index]
+        np.minimum(closest, np.einsum('nc,nc->n', diff, diff), out=closest)
+    return centers
+
+
+def minibatch_kmeans(points, n_clusters, batch_size=DEFAULT_BATCH_SIZE, max_iter=DEFAULT_ITERATIONS,
+                     tolerance=DEFAULT_TOLERANCE, seed=0):
+    """K-means em mini-lotes: cada lote move os centros com passo 1 / (pontos já vistos).
+
+    Args:
+        points: array (N, 3) - Pontos a agrupar (ex: cores Lab).
+        n_clusters: int - Número de grupos (limitado ao número de pontos distintos).
+        batch_size: int - Pontos sorteados por iteração.
+        max_iter: int - Limite de iterações.
+        tolerance: float - Para quando nenhum centro se move mais que isso numa iteração.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (centros (k, 3), quantidade de pontos de cada centro).
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if len(points) == 0:
+        raise ValueError("Nenhum ponto para agrupar.")
+    n_clusters = max(1, min(int(n_clusters), len(np.unique(points, axis=0))))
+    rng = np.random.default_rng(seed)
+    centers = _kmeans_plusplus(points, n_clusters, rng)
+    seen = np.zeros(n_clusters, dtype=np.float64)
+    for _ in range(max_iter):
+        batch = points[rng.integers(0, len(points), min(batch_size, len(points)))]
+        labels = _assign(batch, centers)
+        counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+        moved = counts > 0
+        seen += counts
+        sums = np.stack([np.bincount(labels, weights=batch[:, c], minlength=n_clusters) for c in range(3)], axis=1)
+        step = (counts[moved] / seen[moved])[:, None]
+        delta = step * (sums[moved] / counts[moved][:, None] - centers[moved])
+        centers[moved] += delta
+        if np.sqrt(np.einsum('kc,kc->k', delta, delta)).max() < tolerance:
+            break
+    sizes = np.bincount(_assign(points, centers), minlength=n_clusters)
+    return centers, sizes
+
+
+def extract_palette(image, segmentation_map=None, n_colors=DEFAULT_COLORS, max_samples=DEFAULT_SAMPLES, seed=0):
+    """Sugere uma paleta de até `n_colors` cores para um assunto.
+
+    Args:
+        image: PIL.Image | np.ndarray - Imagem original (ou pixels de `image_pixels`).
+        segmentation_map: PIL.Image | np.ndarray | None - Mapa do assunto; None usa a imagem inteira.
+        n_colors: int - Cores desejadas (pode sair menos se o assunto tiver poucas cores).
+        max_samples: int - Pixels amostrados.
+
+    Returns:
+        list[str]: ["#RRGGBB", ...] da cor mais frequente para a menos frequente
+            (vazia se o assunto não tiver pixels opacos).
+    """
+    samples = sample_masked_pixels(image_pixels(image), segmentation_map, max_samples=max_samples, seed=seed)
+    return palette_from_samples(samples, n_colors, seed)
+
+
+def palette_from_samples(samples, n_colors=DEFAULT_COLORS, seed=0):
+    """Paleta (como em `extract_palette`) de amostras RGB (n, 3) uint8 já sorteadas."""
+    if n_colors < 1:
+        raise ValueError(f"O número de cores deve ser positivo, recebido {n_colors}.")
+    if len(samples) == 0:
+        return []
+    centers, sizes = minibatch_kmeans(srgb_to_lab(samples), n_colors, seed=seed)
+    order = np.argsort(-sizes, kind='stable')
+    order = order[sizes[order] > 0]
+    colors = rgb_array_to_hex_list(lab_to_srgb(centers[order]))
+    # Centros diferentes podem arredondar para o mesmo hex.
+    return list(dict.fromkeys(colors))
+
+
+def extract_palettes(image, segmentation_maps, n_colors=DEFAULT_COLORS, max_samples=DEFAULT_SAMPLES, seed=0,
+                     workers=None):
+    """Sugere paletas para vários assuntos em paralelo (threads).
+
+    Args:
+        segmentation_maps: dict[str, PIL.Image | np.ndarray] - {assunto: mapa}.
+        workers: int | None - Threads usadas; None usa todos os núcleos.
+
+    Returns:
+        dict[str, list[str]]: {assunto: ["#RRGGBB", ...]} na ordem de `segmentation_maps`.
+    """
+    subjects = list(segmentation_maps)
+    if not subjects:
+        return {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(subjects)))
+    if unloaded_file_path(image):
+        # Imagem ainda não carregada: uma única passada por faixas para todos os assuntos.
+        positions = [sample_positions(image.size, segmentation_maps[subject], max_samples, seed)
+                     for subject in subjects]
+        ys = np.concatenate([p[0] for p in positions])
+        xs = np.concatenate([p[1] for p in positions])
+        pixels = read_pixels_at(image, ys, xs)
+        bounds = np.cumsum([0] + [len(p[0]) for p in positions])
+        samples = {subject: _opaque_rgb(pixels[bounds[i]:bounds[i + 1]]) for i, subject in enumerate(subjects)}
+        extract = lambda subject: palette_from_samples(samples[subject], n_colors, seed)
+    else:
+        pixels = image_pixels(image)
+        extract = lambda subject: extract_palette(pixels, segmentation_maps[subject], n_colors=n_colors,
+                                                  max_samples=max_samples, seed=seed)
+    if workers == 1:
+        return {subject: extract(subject) for subject in subjects}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(subjects, executor.map(extract, subjects)))
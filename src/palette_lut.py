@@ -0,0 +1,175 @@
+"""RGB -> palette-index lookup tables (pure NumPy, no PyQt imports).
+
+Para paletas reutilizadas em muitas imagens, pré-calcula um cubo RGB
+quantizado (ex: 32³ ou 64³) em que cada célula guarda o índice da cor
+mais próxima da paleta. O casamento passa a ser uma única indexação.
+As tabelas são identificadas por um hash da paleta, da métrica e da
+resolução, e podem ser persistidas em disco com limite de tamanho.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.color_matching import nearest_palette_indices, metric_coordinates, METRICS, DEFAULT_CHUNK_SIZE
+from src.disk_cache import default_cache_root, write_atomic, evict_lru_files, remove_quietly
+
+DEFAULT_LUT_BITS = 5  # 32³ células
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+LUT_METRICS = METRICS
+
+
+def default_cache_dir():
+    """Diretório padrão das LUTs em disco (ver `disk_cache.default_cache_root`)."""
+    return os.path.join(default_cache_root(), 'luts')
+
+
+def palette_key(palette_rgb, metric='ciede2000', bits=DEFAULT_LUT_BITS):
+    """Hash estável que identifica a LUT de uma paleta."""
+    palette_rgb = np.ascontiguousarray(palette_rgb, dtype=np.uint8)
+    digest = hashlib.sha1()
+    digest.update(f"{metric}:{bits}:".encode('ascii'))
+    digest.update(palette_rgb.tobytes())
+    return digest.hexdigest()
+
+
+def _cell_centers(bits):
+    step = 1 << (8 - bits)
+    return (np.arange(1 << bits) * step + step // 2).astype(np.uint8)
+
+
+def build_palette_lut(palette_rgb, bits=DEFAULT_LUT_BITS, metric='ciede2000', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Constrói o cubo (2^bits)³ de índices da cor mais próxima da paleta.
+
+    Cada célula é representada pela cor do seu centro.
+
+    Args:
+        palette_rgb: array (K, 3) uint8 - A paleta.
+        bits: int - Bits por canal do cubo (1-8).
+        metric: str - Métrica de distância (ver LUT_METRICS).
+
+    Returns:
+        np.ndarray: Array (n, n, n) uint8/uint16, n = 2^bits.
+    """
+    if not 1 <= bits <= 8:
+        raise ValueError(f"bits deve estar entre 1 e 8, recebido {bits}")
+    if metric not in LUT_METRICS:
+        raise ValueError(f"Métrica desconhecida para LUT: '{metric}'. Use uma de {LUT_METRICS}.")
+    palette_rgb = np.asarray(palette_rgb, dtype=np.uint8).reshape(-1, 3)
+    centers = _cell_centers(bits)
+    n = len(centers)
+    r, g, b = np.meshgrid(centers, centers, centers, indexing='ij')
+    grid_rgb = np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+    indices = nearest_palette_indices(metric_coordinates(grid_rgb, metric), metric_coordinates(palette_rgb, metric),
+                                      chunk_size=chunk_size, metric=metric)
+    dtype = np.uint8 if len(palette_rgb) <= 256 else np.uint16
+    return indices.astype(dtype).reshape(n, n, n)
+
+
+def apply_palette_lut(lut, rgb):
+    """Casa cores RGB (..., 3) uint8 com a paleta usando a LUT.
+
+    Returns:
+        np.ndarray: Índices na paleta com o formato (...,).
+    """
+    shift = 8 - int(round(np.log2(lut.shape[0])))
+    rgb = np.asarray(rgb, dtype=np.uint8)
+    return lut[rgb[..., 0] >> shift, rgb[..., 1] >> shift, rgb[..., 2] >> shift]
+
+
+class PaletteLUTCache:
+    """Cache de LUTs em memória com persistência opcional em disco.
+
+    Em disco, cada LUT é um arquivo `<hash>.npy`. Quando o total passa de
+    `max_bytes`, os arquivos usados há mais tempo (mtime) são removidos.
+    """
+
+    def __init__(self, cache_dir=None, bits=DEFAULT_LUT_BITS, max_bytes=DEFAULT_CACHE_BYTES, max_memory_entries=16):
+        self.cache_dir = cache_dir
+        self.bits = bits
+        self.max_bytes = max_bytes
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key, lut):
+        with self._lock:
+            self._memory[key] = lut
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            lut = np.load(path)
+            os.utime(path, None)
+            return lut
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Aviso: LUT corrompida em cache ('{path}'): {e}")
+            remove_quietly(path)
+            return None
+
+    def _store(self, key, lut):
+        if not self.cache_dir:
+            return
+        try:
+            write_atomic(self.cache_dir, f"{key}.npy", lambda f: np.save(f, lut))
+        except Exception as e:
+            print(f"Aviso: não foi possível salvar a LUT em cache: {e}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove as LUTs mais antigas do disco até caber em `max_bytes`."""
+        if self.cache_dir:
+            evict_lru_files(self.cache_dir, self.max_bytes, '.npy')
+
+    def get(self, palette_rgb, metric='ciede2000'):
+        """Retorna a LUT da paleta, construindo e persistindo se necessário.
+
+        Seguro entre threads (o cache é compartilhado pela GUI e pelos workers); duas
+        threads pedindo a mesma LUT nova podem construí-la em paralelo.
+        """
+        key = palette_key(palette_rgb, metric, self.bits)
+        with self._lock:
+            lut = self._memory.get(key)
+        if lut is None:
+            lut = self._load(key)
+            if lut is None:
+                lut = build_palette_lut(palette_rgb, bits=self.bits, metric=metric)
+                self._store(key, lut)
+        self._remember(key, lut)
+        return lut
+
+    def lookup(self, palette_rgb, rgb, metric='ciede2000'):
+        """Casa cores RGB (..., 3) com a paleta via LUT; retorna os índices."""
+        return apply_palette_lut(self.get(palette_rgb, metric), rgb)
+
+
+_default_caches = {}
+_default_lock = threading.Lock()
+
+
+def default_lut_cache(bits=DEFAULT_LUT_BITS):
+    """Cache de LUTs compartilhado do processo (GUI e CLI), persistido em `default_cache_dir()`."""
+    with _default_lock:
+        cache = _default_caches.get(bits)
+        if cache is None:
+            if not 1 <= bits <= 8:
+                raise ValueError(f"bits deve estar entre 1 e 8, recebido {bits}")
+            cache = PaletteLUTCache(cache_dir=default_cache_dir(), bits=bits)
+            _default_caches[bits] = cache
+        return cache
@@ -0,0 +1,228 @@
+"""Project files: a single zip container with memory-mapped arrays (no PyQt imports).
+
+Um projeto guarda tudo o que a janela precisa para reabrir o trabalho sem
+recalcular: a imagem original, os mapas de segmentação (alfa empilhado
+(S, H, W) uint8), as paletas, o pontilhado, a escala e a métrica, o
+estado calculado da `RenderSession` (estatísticas dos blocos, mapa de
+rótulos, índices do último casamento) e a última pixel art gerada
+(índices + paleta global).
+
+O arquivo é um zip sem compressão: `project.json` com os metadados e um
+`.npy` por array. Como os membros ficam gravados como estão, `load_project`
+mapeia cada array direto do arquivo (`np.memmap` em cópia-na-escrita):
+abrir um projeto grande não lê os pixels até eles serem usados, e
+alterações no lugar (ex: a próxima geração) não tocam o arquivo. As
+LUTs do casamento rápido (opção "Casamento rápido por LUT" / `--lut`)
+não são repetidas no projeto: ficam no cache em disco de `palette_lut`,
+indexadas pelo conteúdo da paleta, e são reaproveitadas ao gerar de novo
+com as mesmas paletas.
+
+A imagem original é gravada em 'L' ou 'RGBA' (os demais modos são
+convertidos para RGBA), os modos que o Pillow usa sem cópia sobre o
+array mapeado. Ela é lida e gravada por faixas (`ImageStripReader`):
+salvar a imagem aberta pela interface com `image_strips.open_image` não
+a decodifica inteira.
+"""
+
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from src.art_processor import RenderSession
+from src.color_matching import DEFAULT_METRIC
+from src.disk_cache import write_atomic
+from src.image_strips import ImageStripReader
+from src.indexed_output import IndexedPixelArt
+from src.label_map import map_alpha
+
+# Extensão dos arquivos de projeto.
+PROJECT_EXTENSION = '.pixproj'
+# Versão do formato; projetos de versões mais novas são recusados.
+FORMAT_VERSION = 1
+
+_MANIFEST = 'project.json'
+_IMAGE_MODES = ('L', 'RGBA')
+# Linhas da imagem original gravadas por vez.
+_IMAGE_STRIP_ROWS = 256
+# Arrays de `RenderSession.state()` (o restante vai para o JSON).
+_SESSION_ARRAYS = ('block_rgb', 'block_lab', 'labels', 'local_indices')
+_LOCAL_HEADER = struct.Struct('<4s5H3I2H')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+
+
+def _write_array(archive, name, array):
+    with archive.open(f'{name}.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+
+def _write_image(archive, image, mode):
+    """Grava a imagem como `image.npy` (H, W[, 4]) uint8 no `mode`, faixa por faixa."""
+    width, height = image.size
+    shape = (height, width) if mode == 'L' else (height, width, 4)
+    with archive.open('image.npy', 'w', force_zip64=True) as f, ImageStripReader(image) as reader:
+        np.lib.format.write_array_header_1_0(f, {'descr': np.dtype(np.uint8).str, 'fortran_order': False,
+                                                 'shape': shape})
+        for y0 in range(0, height, _IMAGE_STRIP_ROWS):
+            f.write(memoryview(np.ascontiguousarray(reader.read_rows(y0, y0 + _IMAGE_STRIP_ROWS, mode))).cast('B'))
+
+
+def save_project(path, original_image, segmentation_maps, block_size, palettes, metric=DEFAULT_METRIC,
+                 dither=None, session=None, pixel_art=None, source_path=None):
+    """Grava o projeto num único arquivo (via temporário + `os.replace`).
+
+    Args:
+        path: str - Arquivo de saída (ver PROJECT_EXTENSION).
+        original_image: PIL.Image - Imagem original (pode ser uma imagem de
+            `image_strips.open_image` ainda não carregada).
+        segmentation_maps: dict[str, PIL.Image | np.ndarray] - {assunto: mapa}, na ordem de prioridade.
+        block_size: int - Fator de escala.
+        palettes: dict[str, list[str]] - {assunto: ["#RRGGBB", ...]}.
+        metric: str - Métrica de cor escolhida.
+        dither: dict[str, str] | None - {assunto: modo de pontilhado}.
+        session: art_processor.RenderSession | None - Sessão das mesmas entradas; o estado
+            calculado é gravado se os blocos já estiverem prontos.
+        pixel_art: indexed_output.IndexedPixelArt | None - Última pixel art gerada.
+        source_path: str | None - Caminho de origem da imagem (só informativo).
+
+    Raises:
+        ValueError: Se a sessão não corresponder às entradas.
+    """
+    if session is not None and not session.is_valid_for(original_image, segmentation_maps, block_size,
+                                                        session.reduction):
+        raise ValueError("A sessão de geração não corresponde à imagem, aos mapas ou à escala do projeto.")
+    mode = original_image.mode if original_image.mode in _IMAGE_MODES else 'RGBA'
+    subjects = list(segmentation_maps)
+    arrays = {}
+    if subjects:
+        arrays['maps'] = np.stack([map_alpha(segmentation_maps[subject]) for subject in subjects])
+    manifest = {
+        'version': FORMAT_VERSION,
+        'image_mode': mode,
+        'source_path': source_path,
+        'block_size': int(block_size),
+        'metric': metric,
+        'subjects': subjects,
+        'palettes': {subject: list(colors) for subject, colors in palettes.items()},
+        'dither': dict(dither or {}),
+    }
+    state = session.state() if session is not None else None
+    if state is not None:
+        arrays.update((f'session_{key}', state[key]) for key in _SESSION_ARRAYS)
+        manifest['session'] = {key: value for key, value in state.items() if key not in _SESSION_ARRAYS}
+        manifest['session']['reduction'] = session.reduction
+    if pixel_art is not None:
+        arrays['art_indices'] = pixel_art.indices
+        arrays['art_palette'] = pixel_art.palette
+
+    def write(f):
+        with zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as archive:
+            archive.writestr(_MANIFEST, json.dumps(manifest, indent=2))
+            _write_image(archive, original_image, mode)
+            for name, array in arrays.items():
+                _write_array(archive, name, array)
+
+    directory, filename = os.path.split(os.path.abspath(path))
+    write_atomic(directory, filename, write)
+
+
+def _map_member(path, archive, info):
+    """Array de um membro `.npy`: mapeado do arquivo se gravado sem compressão, senão lido."""
+    if info.compress_type != zipfile.ZIP_STORED:
+        with archive.open(info) as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+        if header[0] != _LOCAL_SIGNATURE:
+            raise ValueError(f"Membro '{info.filename}' corrompido no projeto.")
+        f.seek(info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1])
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            raise ValueError(f"Versão de .npy não suportada em '{info.filename}': {version}")
+        offset = f.tell()
+    if dtype.hasobject:
+        raise ValueError(f"Array '{info.filename}' com objetos Python não é aceito.")
+    if not np.prod(shape, dtype=np.int64):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape, order='F' if fortran else 'C')
+
+
+def load_project(path):
+    """Abre um projeto com os arrays mapeados em memória.
+
+    Returns:
+        dict: 'original_image' (PIL.Image sobre o array mapeado), 'source_path',
+            'segmentation_maps' ({assunto: alfa (H, W) uint8}), 'block_size', 'metric',
+            'palettes', 'dither', 'pixel_art' (IndexedPixelArt | None) e 'session_state'
+            (estado para `RenderSession.from_state` | None).
+
+    Raises:
+        ValueError: Se o arquivo não for um projeto válido ou for de uma versão mais nova.
+    """
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"'{os.path.basename(path)}' não é um projeto do PixelMaker ({e}).")
+    with archive:
+        try:
+            manifest = json.loads(archive.read(_MANIFEST))
+        except KeyError:
+            raise ValueError(f"'{os.path.basename(path)}' não é um projeto do PixelMaker (sem {_MANIFEST}).")
+        if manifest.get('version', 0) > FORMAT_VERSION:
+            raise ValueError(f"Projeto da versão {manifest['version']}; esta versão do PixelMaker lê até a "
+                             f"{FORMAT_VERSION}.")
+        members = {info.filename: info for info in archive.infolist()}
+
+        def array(name):
+            info = members.get(f'{name}.npy')
+            return None if info is None else _map_member(path, archive, info)
+
+        image = array('image')
+        if image is None:
+            raise ValueError("Projeto sem a imagem original.")
+        mode = manifest['image_mode']
+        height, width = image.shape[:2]
+        subjects = manifest['subjects']
+        maps = array('maps') if subjects else None
+        if maps is not None and len(maps) != len(subjects):
+            raise ValueError(f"Projeto com {len(maps)} mapas para {len(subjects)} assuntos.")
+        indices, palette = array('art_indices'), array('art_palette')
+        session = manifest.get('session')
+        if session is not None:
+            session = dict(session, **{key: array(f'session_{key}') for key in _SESSION_ARRAYS})
+            if any(session[key] is None for key in _SESSION_ARRAYS):
+                session = None
+
+    return {
+        'original_image': Image.frombuffer(mode, (width, height), image, 'raw', mode, 0, 1),
+        'source_path': manifest.get('source_path'),
+        'segmentation_maps': {subject: maps[i] for i, subject in enumerate(subjects)},
+        'block_size': manifest['block_size'],
+        'metric': manifest.get('metric', DEFAULT_METRIC),
+        'palettes': manifest.get('palettes', {}),
+        'dither': manifest.get('dither', {}),
+        'pixel_art': IndexedPixelArt(indices, palette) if indices is not None and palette is not None else None,
+        'session_state': session,
+    }
+
+
+def project_session(project, block_cache=None):
+    """RenderSession restaurada do projeto, ou None se o projeto não tiver o estado.
+
+    Usa os mesmos objetos de `project['original_image']` e `project['segmentation_maps']`,
+    então `RenderSession.is_valid_for` continua valendo enquanto a janela não os trocar.
+    """
+    state = project['session_state']
+    if state is None:
+        return None
+    return RenderSession.from_state(project['original_image'], project['segmentation_maps'],
+                                    project['block_size'], state, reduction=state.get('reduction', 'mean'),
+                                    block_cache=block_cache)
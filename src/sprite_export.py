@@ -0,0 +1,293 @@
+"""Sprite slicing, sprite-sheet packing and export (no PyQt imports).
+
+Os sprites da pixel art são encontrados por componentes conexos ou por
+uma grade definida pelo usuário. A rotulação trabalha sobre os trechos
+contínuos de cada linha: os trechos que se tocam entre linhas vizinhas
+são achados com `searchsorted` e unidos por union-find vetorizado
+(ligação das raízes + compressão de caminhos), sem laço por pixel.
+
+Os recortes são empacotados numa sprite sheet por prateleiras (do mais
+alto para o mais baixo), e os PNGs individuais e a sheet são gravados em
+paralelo num ThreadPoolExecutor. As posições vão para um JSON ao lado da
+sheet.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from src.color_space import hex_list_to_rgb_array
+
+SLICE_MODES = ('components', 'grid')
+DEFAULT_PADDING = 1
+
+
+def sprite_pixels(image):
+    """Pixels RGBA (H, W, 4) uint8 de uma imagem PIL, array ou `indexed_output.IndexedPixelArt`."""
+    if hasattr(image, 'to_rgba'):
+        return image.to_rgba()
+    if hasattr(image, 'convert'):
+        return np.asarray(image if image.mode == 'RGBA' else image.convert('RGBA'))
+    pixels = np.asarray(image)
+    if pixels.ndim != 3 or pixels.shape[2] != 4:
+        raise ValueError(f"Esperada imagem RGBA (H, W, 4), recebido {pixels.shape}")
+    return pixels
+
+
+def foreground_mask(pixels, background=None):
+    """Máscara (H, W) dos pixels que pertencem a sprites.
+
+    Args:
+        pixels: np.ndarray (H, W, 4) uint8 - Ver `sprite_pixels`.
+        background: str | tuple | None - Cor de fundo ("#RRGGBB" ou (R, G, B)). None usa
+            a transparência, se houver pixels transparentes, ou a cor do canto superior esquerdo.
+    """
+    alpha = pixels[..., 3]
+    if background is None:
+        if (alpha == 0).any():
+            return alpha > 0
+        background = pixels[0, 0, :3]
+    elif isinstance(background, str):
+        background = hex_list_to_rgb_array([background])[0]
+    rgb = np.asarray(background, dtype=np.uint8).reshape(3)
+    return (alpha > 0) & (pixels[..., :3] != rgb).any(axis=-1)
+
+
+def _row_runs(mask):
+    """Trechos contínuos de cada linha: (linha, início, fim exclusivo), em ordem de leitura."""
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def _union(parent, a, b):
+    """Une os pares (a[i], b[i]); devolve `parent` com cada nó apontando para a raiz (o menor índice)."""
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            return parent
+        root_a, root_b = root_a[differ], root_b[differ]
+        # Liga a raiz maior à menor: parent[i] <= i sempre, então não há ciclos.
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+def label_runs(mask, connectivity=8):
+    """Componentes conexos de `mask`, representados pelos trechos de cada linha.
+
+    Args:
+        mask: np.ndarray (H, W) bool - Pixels de primeiro plano.
+        connectivity: int - 4 (só vizinhos ortogonais) ou 8 (inclui diagonais).
+
+    Returns:
+        tuple: (linhas, inícios, fins exclusivos, rótulo de cada trecho (0..n-1), n).
+    """
+    if connectivity not in (4, 8):
+        raise ValueError(f"Conectividade deve ser 4 ou 8, recebido {connectivity}.")
+    mask = np.asarray(mask, dtype=bool)
+    rows, starts, ends = _row_runs(mask)
+    if len(rows) == 0:
+        return rows, starts, ends, np.empty(0, dtype=np.intp), 0
+    reach = 1 if connectivity == 8 else 0
+    # Chaves globais ordenadas: uma linha ocupa `stride` posições, sem sobreposição.
+    stride = mask.shape[1] + 2
+    key_start = rows * stride + starts
+    key_end = rows * stride + ends
+    above = (rows - 1) * stride
+    # Trechos da linha de cima que tocam cada trecho: fim > início - reach e início < fim + reach.
+    lo = np.searchsorted(key_end, above + starts - reach, side='right')
+    hi = np.searchsorted(key_start, above + ends + reach, side='left')
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    run_ids = np.arange(len(rows))
+    parent = run_ids.copy()
+    if total:
+        lower = np.repeat(run_ids, counts)
+        first = np.repeat(lo, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        parent = _union(parent, lower, first + offsets)
+    _, labels = np.unique(parent, return_inverse=True)
+    labels = labels.reshape(-1)
+    return rows, starts, ends, labels, int(labels.max()) + 1
+
+
+def find_sprites(pixels, background=None, connectivity=8, min_pixels=1):
+    """Caixas dos sprites (componentes conexos do primeiro plano).
+
+    Args:
+        pixels: np.ndarray (H, W, 4) uint8 - Ver `sprite_pixels`.
+        background: str | tuple | None - Ver `foreground_mask`.
+        connectivity: int - 4 ou 8.
+        min_pixels: int - Componentes com menos pixels são descartados (ruído).
+
+    Returns:
+        list[tuple[int, int, int, int]]: (x0, y0, x1, y1) com fim exclusivo, em ordem de leitura.
+    """
+    rows, starts, ends, labels, count = label_runs(foreground_mask(pixels, background), connectivity)
+    if count == 0:
+        return []
+    order = np.argsort(labels, kind='stable')
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(labels[order])) + 1])
+    y0 = rows[order][bounds]  # trechos em ordem de leitura: o primeiro de cada rótulo é o mais alto
+    y1 = np.maximum.reduceat(rows[order], bounds) + 1
+    x0 = np.minimum.reduceat(starts[order], bounds)
+    x1 = np.maximum.reduceat(ends[order], bounds)
+    sizes = np.add.reduceat((ends - starts)[order], bounds)
+    keep = np.flatnonzero(sizes >= min_pixels)
+    keep = keep[np.lexsort((x0[keep], y0[keep]))]
+    return [(int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i])) for i in keep]
+
+
+def grid_boxes(size, cell_size, offset=(0, 0), spacing=(0, 0)):
+    """Células inteiras de uma grade, em ordem de leitura.
+
+    Args:
+        size: tuple[int, int] - (largura, altura) da imagem.
+        cell_size: tuple[int, int] - (largura, altura) de cada célula.
+        offset: tuple[int, int] - Posição (x, y) da primeira célula.
+        spacing: tuple[int, int] - Espaço (x, y) entre células.
+
+    Returns:
+        list[tuple[int, int, int, int]]: (x0, y0, x1, y1) com fim exclusivo.
+    """
+    width, height = size
+    cell_w, cell_h = cell_size
+    if cell_w < 1 or cell_h < 1:
+        raise ValueError(f"Tamanho de célula inválido: {cell_w}x{cell_h}.")
+    return [(x, y, x + cell_w, y + cell_h)
+            for y in range(offset[1], height - cell_h + 1, cell_h + spacing[1])
+            for x in range(offset[0], width - cell_w + 1, cell_w + spacing[0])]
+
+
+def pack_rectangles(sizes, padding=DEFAULT_PADDING, max_width=None):
+    """Empacota retângulos em prateleiras, do mais alto para o mais baixo.
+
+    Args:
+        sizes: list[tuple[int, int]] - (largura, altura) de cada retângulo.
+        padding: int - Espaço entre retângulos.
+        max_width: int | None - Largura máxima da sheet; None busca uma sheet
+            aproximadamente quadrada.
+
+    Returns:
+        tuple[list[tuple[int, int]], tuple[int, int]]: (posição (x, y) de cada retângulo,
+            na ordem de `sizes`, e (largura, altura) da sheet).
+    """
+    if len(sizes) == 0:
+        return [], (0, 0)
+    sizes = np.asarray(sizes, dtype=np.int64).reshape(-1, 2)
+    padded = sizes + padding
+    if max_width is None:
+        max_width = max(int(sizes[:, 0].max()), int(np.ceil(np.sqrt((padded[:, 0] * padded[:, 1]).sum()))))
+    elif max_width < sizes[:, 0].max():
+        raise ValueError(f"Largura máxima {max_width} menor que o sprite mais largo ({sizes[:, 0].max()}).")
+    positions = [None] * len(sizes)
+    x = y = shelf_h = sheet_w = 0
+    for index in np.lexsort((-sizes[:, 0], -sizes[:, 1])).tolist():
+        w, h = sizes[index].tolist()
+        if x > 0 and x + w > max_width:
+            y += shelf_h
+            x = shelf_h = 0
+        positions[index] = (x, y)
+        sheet_w = max(sheet_w, x + w)
+        shelf_h = max(shelf_h, h + padding)
+        x += w + padding
+    return positions, (sheet_w, y + shelf_h - padding)
+
+
+def _write_png(path, array):
+    Image.fromarray(array, 'RGBA').save(path, 'PNG')
+    return path
+
+
+def export_sprites(image, output_dir, mode='components', cell_size=None, background=None, connectivity=8,
+                   min_pixels=1, padding=DEFAULT_PADDING, name='sprite', individual=True, sheet=True,
+                   workers=None):
+    """Fatia a pixel art em sprites e grava os PNGs, a sprite sheet e o JSON de metadados.
+
+    Args:
+        image: PIL.Image | np.ndarray | IndexedPixelArt - A pixel art.
+        output_dir: str - Pasta de saída (criada se preciso).
+        mode: str - 'components' (componentes conexos) ou 'grid' (grade de `cell_size`).
+        cell_size: tuple[int, int] | None - (largura, altura) das células no modo 'grid'.
+        background: str | tuple | None - Cor de fundo (ver `foreground_mask`); fica
+            transparente nos recortes.
+        connectivity, min_pixels: Ver `find_sprites`. No modo 'grid', células com
+            menos de `min_pixels` pixels de primeiro plano são ignoradas.
+        padding: int - Espaço entre sprites na sheet.
+        name: str - Prefixo dos arquivos (`name_0000.png`, `name_sheet.png`, `name.json`).
+        individual: bool - Grava um PNG por sprite.
+        sheet: bool - Grava a sprite sheet.
+        workers: int | None - Threads de gravação; None usa todos os núcleos.
+
+    Returns:
+        dict: Os metadados gravados em `name.json`.
+    """
+    if mode not in SLICE_MODES:
+        raise ValueError(f"Modo de fatiamento desconhecido: '{mode}'. Use um de {SLICE_MODES}.")
+    pixels = sprite_pixels(image)
+    height, width = pixels.shape[:2]
+    mask = foreground_mask(pixels, background)
+    if mode == 'grid':
+        if not cell_size:
+            raise ValueError("O modo 'grid' precisa de cell_size (largura, altura).")
+        boxes = [box for box in grid_boxes((width, height), cell_size)
+                 if np.count_nonzero(mask[box[1]:box[3], box[0]:box[2]]) >= max(1, min_pixels)]
+    else:
+        boxes = find_sprites(pixels, background, connectivity=connectivity, min_pixels=min_pixels)
+    if not boxes:
+        raise ValueError("Nenhum sprite encontrado na imagem.")
+
+    crops = []
+    for x0, y0, x1, y1 in boxes:
+        crop = pixels[y0:y1, x0:x1].copy()
+        crop[~mask[y0:y1, x0:x1], 3] = 0
+        crops.append(crop)
+    positions, sheet_size = pack_rectangles([(x1 - x0, y1 - y0) for x0, y0, x1, y1 in boxes], padding=padding)
+
+    os.makedirs(output_dir, exist_ok=True)
+    digits = max(4, len(str(len(boxes) - 1)))
+    frame_names = [f"{name}_{index:0{digits}d}" for index in range(len(boxes))]
+    writes = []
+    if individual:
+        writes += [(os.path.join(output_dir, f"{frame}.png"), crop) for frame, crop in zip(frame_names, crops)]
+    sheet_file = None
+    if sheet:
+        sheet_w, sheet_h = sheet_size
+        sheet_pixels = np.zeros((sheet_h, sheet_w, 4), dtype=np.uint8)
+        for (x, y), crop in zip(positions, crops):
+            sheet_pixels[y:y + crop.shape[0], x:x + crop.shape[1]] = crop
+        sheet_file = f"{name}_sheet.png"
+        writes.append((os.path.join(output_dir, sheet_file), sheet_pixels))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(writes) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda item: _write_png(*item), writes))
+
+    metadata = {
+        'image': sheet_file,
+        'size': list(sheet_size) if sheet else None,
+        'source_size': [width, height],
+        'mode': mode,
+        'padding': padding,
+        'frames': [{
+            'name': frame,
+            'file': f"{frame}.png" if individual else None,
+            'x': x, 'y': y, 'w': x1 - x0, 'h': y1 - y0,
+            'source': {'x': x0, 'y': y0},
+        } for frame, (x, y), (x0, y0, x1, y1) in zip(frame_names, positions, boxes)],
+    }
+    with open(os.path.join(output_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
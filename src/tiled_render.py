@@ -0,0 +1,212 @@
+"""Band rendering and multi-process tiled rendering (no PyQt imports).
+
+`render_band` reduz e casa uma faixa de linhas de saída, gravando o
+índice de cada bloco na paleta global (ver `indexed_output`). Para imagens
+grandes, `render_bands_parallel` distribui as faixas entre processos de
+um `ProcessPoolExecutor`; a imagem RGBA, o mapa de rótulos e a saída
+ficam em `multiprocessing.shared_memory`, então nada disso é serializado
+para os workers. O resultado é idêntico ao do caminho de um processo.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.block_reduction import reduce_blocks
+from src.cancellation import check_cancelled
+from src.color_matching import (
+    nearest_palette_indices, block_coordinates, METRIC_SPACES, DEFAULT_CHUNK_SIZE, DEFAULT_METRIC,
+)
+from src.palette_lut import apply_palette_lut
+from src.label_map import group_by_label
+from src.instrumentation import stage
+
+
+def render_band(rgba_band, labels_band, block_size, label_palettes, palette_maps, reduction='mean',
+                chunk_size=DEFAULT_CHUNK_SIZE, label_luts=None, block_stats=None, observer=None,
+                metric=DEFAULT_METRIC, prune=False):
+    """Reduz e casa uma faixa de linhas de saída.
+
+    Args:
+        rgba_band: np.ndarray (rows * block_size, W, 4) - Faixa da imagem original.
+        labels_band: np.ndarray (rows, out_w) - Rótulos já remapeados da faixa.
+        label_palettes: list[tuple] - Paleta (rgb, coordenadas de `metric`) de cada rótulo;
+            None deixa os blocos do rótulo sem cor (ex: preenchidos depois pelo pontilhado).
+        palette_maps: list[np.ndarray] - Tabela índice local -> índice global de cada
+            rótulo (ver `indexed_output.build_global_palette`).
+        label_luts: list[np.ndarray] | None - LUT RGB -> índice de cada rótulo (modo LUT).
+        block_stats: tuple | None - (rgb, lab) já reduzidos da faixa (ex: vindos do
+            `block_cache`); nesse caso `rgba_band` é ignorado.
+        observer: instrumentation.GenerationObserver | None - Recebe as etapas da faixa.
+        metric: str - Métrica de distância (ver `color_matching.METRICS`).
+        prune: bool - Poda aproximada no casamento (ver `color_matching.PaletteIndex`).
+
+    Returns:
+        np.ndarray: Índices (rows, out_w) na paleta global, no dtype de `palette_maps`.
+    """
+    rows, out_w = labels_band.shape
+    n_blocks = rows * out_w
+    block_lab = None
+    if block_stats is not None:
+        block_rgb = block_stats[0].reshape(-1, 3)
+        block_lab = block_stats[1].reshape(-1, 3)
+    else:
+        with stage(observer, 'reduction', n_blocks):
+            block_rgb = reduce_blocks(rgba_band, block_size, mode=reduction).reshape(-1, 3)
+    block_coords = None
+    if label_luts is None:
+        if block_lab is not None and METRIC_SPACES[metric] == 'lab':
+            block_coords = block_lab  # já convertido (block_stats): nada a medir
+        else:
+            with stage(observer, 'color_conversion', n_blocks):
+                block_coords = block_coordinates(block_rgb, block_lab, metric)
+
+    output = np.zeros(n_blocks, dtype=palette_maps[0].dtype)
+    with stage(observer, 'matching', n_blocks):
+        for label, block_indices in enumerate(group_by_label(labels_band, len(label_palettes))):
+            if len(block_indices) == 0 or label_palettes[label] is None:
+                continue
+            palette_rgb, palette_coords = label_palettes[label]
+            if label_luts is not None:
+                indices = apply_palette_lut(label_luts[label], block_rgb[block_indices])
+            else:
+                indices = nearest_palette_indices(block_coords[block_indices], palette_coords,
+                                                  chunk_size=chunk_size, metric=metric, prune=prune)
+            output[block_indices] = palette_maps[label][indices]
+    return output.reshape(rows, out_w)
+
+
+def default_workers():
+    """Número padrão de processos (todos os núcleos disponíveis)."""
+    return os.cpu_count() or 1
+
+
+def _to_shared(array):
+    """Copia `array` para um novo bloco de memória compartilhada."""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    try:
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        view[...] = array
+        del view
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# Estado de cada processo worker, preenchido uma vez por `_init_worker`.
+_worker_state = {}
+
+
+def _init_worker(rgba_spec, labels_spec, output_spec, block_size, label_palettes, palette_maps, reduction,
+                 chunk_size, label_luts, metric, prune):
+    handles = []
+    arrays = []
+    for spec in (rgba_spec, labels_spec, output_spec):
+        shm, arr = _attach(spec)
+        handles.append(shm)
+        arrays.append(arr)
+    _worker_state.update(
+        handles=handles,
+        rgba=arrays[0],
+        labels=arrays[1],
+        output=arrays[2],
+        block_size=block_size,
+        label_palettes=label_palettes,
+        palette_maps=palette_maps,
+        reduction=reduction,
+        chunk_size=chunk_size,
+        label_luts=label_luts,
+        metric=metric,
+        prune=prune,
+    )
+
+
+def _render_shared_band(y0, y1):
+    state = _worker_state
+    bs = state['block_size']
+    state['output'][y0:y1] = render_band(
+        state['rgba'][y0 * bs:y1 * bs], state['labels'][y0:y1], bs, state['label_palettes'],
+        state['palette_maps'], reduction=state['reduction'], chunk_size=state['chunk_size'], label_luts=state['label_luts'],
+        metric=state['metric'], prune=state['prune'],
+    )
+    return y1 - y0
+
+
+def render_bands_parallel(rgba_array, labels, block_size, label_palettes, palette_maps, reduction='mean',
+                          chunk_size=DEFAULT_CHUNK_SIZE, label_luts=None, band_rows=32,
+                          workers=None, progress=None, cancel_token=None, metric=DEFAULT_METRIC,
+                          prune=False):
+    """Renderiza todas as faixas em paralelo usando memória compartilhada.
+
+    Args:
+        rgba_array: np.ndarray (H, W, 4) uint8 - A imagem original.
+        labels: np.ndarray (out_h, out_w) - Rótulos já remapeados.
+        workers: int | None - Número de processos (padrão: `default_workers()`).
+        progress: callable(float, str) | None - Chamado a cada faixa concluída; se
+            levantar uma exceção, as faixas pendentes são canceladas.
+        cancel_token: cancellation.CancellationToken | None - Verificado a cada faixa
+            concluída; se cancelado, as faixas pendentes são descartadas.
+
+    Returns:
+        np.ndarray: Índices (out_h, out_w) na paleta global (ver `render_band`).
+    """
+    out_h, out_w = labels.shape
+    workers = max(1, int(workers or default_workers()))
+    band_rows = max(1, int(band_rows))
+    rgba_array = np.ascontiguousarray(rgba_array[:out_h * block_size, :out_w * block_size])
+    labels = np.ascontiguousarray(labels)
+
+    dtype = palette_maps[0].dtype
+    # Cada bloco entra na lista assim que é criado: se o seguinte falhar (ex: /dev/shm
+    # cheio), o `finally` libera os que já existem.
+    segments = []
+    output = None
+    try:
+        shm_rgba = _to_shared(rgba_array)
+        segments.append(shm_rgba)
+        shm_labels = _to_shared(labels)
+        segments.append(shm_labels)
+        shm_output = shared_memory.SharedMemory(create=True, size=max(1, out_h * out_w * dtype.itemsize))
+        segments.append(shm_output)
+        output = np.ndarray((out_h, out_w), dtype=dtype, buffer=shm_output.buf)
+        specs = (
+            (shm_rgba.name, rgba_array.shape, rgba_array.dtype.str),
+            (shm_labels.name, labels.shape, labels.dtype.str),
+            (shm_output.name, output.shape, output.dtype.str),
+        )
+        bands = [(y0, min(out_h, y0 + band_rows)) for y0 in range(0, out_h, band_rows)]
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, max(1, len(bands))),
+            initializer=_init_worker,
+            initargs=specs + (block_size, label_palettes, palette_maps, reduction, chunk_size, label_luts, metric,
+                      prune),
+        )
+        try:
+            futures = [executor.submit(_render_shared_band, y0, y1) for y0, y1 in bands]
+            done_rows = 0
+            for future in as_completed(futures):
+                check_cancelled(cancel_token)
+                done_rows += future.result()
+                if progress is not None:
+                    progress(done_rows / out_h, 'matching')
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+        return output.copy()
+    finally:
+        # A view precisa ser liberada antes de fechar o bloco compartilhado.
+        output = None
+        for shm in segments:
+            shm.close()
+            shm.unlink()
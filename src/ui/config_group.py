@@ -1,4 +1,17 @@
-from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QFormLayout, QSpinBox, QPushButton, QLabel, QListWidget
+from PyQt5.QtWidgets import (
+    QGroupBox, QVBoxLayout, QFormLayout, QSpinBox, QPushButton, QLabel, QListWidget, QComboBox, QCheckBox,
+)
+
+from src.color_matching import METRICS, DEFAULT_METRIC
+
+# Nomes exibidos para as métricas de distância de cor.
+METRIC_LABELS = {
+    'ciede2000': "CIEDE2000 (mais preciso)",
+    'cie94': "CIE94",
+    'cie76': "CIE76 (Lab euclidiano)",
+    'oklab': "OKLab euclidiano",
+    'redmean': "Redmean (RGB, mais rápido)",
+}
 
 
 def create_config_group(window):
@@ -13,6 +26,19 @@ def create_config_group(window):
     window.spin_scale_factor.setEnabled(False)
     window.spin_scale_factor.valueChanged.connect(window._on_scale_changed)
     form_layout.addRow("Fator de Escala:", window.spin_scale_factor)
+
+    window.combo_metric = QComboBox()
+    for metric in METRICS:
+        window.combo_metric.addItem(METRIC_LABELS.get(metric, metric), metric)
+    window.combo_metric.setCurrentIndex(METRICS.index(DEFAULT_METRIC))
+    form_layout.addRow("Métrica de Cor:", window.combo_metric)
+
+    # LUTs RGB -> paleta em cache no disco (ver palette_lut): rápido, porém aproximado
+    window.chk_lut = QCheckBox("Casamento rápido por LUT (aproximado)")
+    form_layout.addRow(window.chk_lut)
+    # Poda por vizinhos euclidianos em paletas grandes (ver color_matching.PaletteIndex)
+    window.chk_prune = QCheckBox("Casamento podado em paletas grandes (aproximado)")
+    form_layout.addRow(window.chk_prune)
     layout.addLayout(form_layout)
 
     window.lbl_required_map_dims = QLabel("Dimensões Requeridas do Mapa: N/A")
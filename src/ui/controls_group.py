@@ -1,4 +1,4 @@
-from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QPushButton
+from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QPushButton, QProgressBar, QLabel
 
 
 def create_controls_group(window):
@@ -10,10 +10,36 @@ def create_controls_group(window):
     window.btn_generate.setEnabled(False)
     layout.addWidget(window.btn_generate)
 
+    window.progress_generation = QProgressBar()
+    window.progress_generation.setRange(0, 100)
+    window.progress_generation.setValue(0)
+    window.progress_generation.setVisible(False)
+    layout.addWidget(window.progress_generation)
+
+    window.lbl_generation_stage = QLabel("")
+    window.lbl_generation_stage.setVisible(False)
+    layout.addWidget(window.lbl_generation_stage)
+
+    # Tempos por etapa da última geração (ver instrumentation.StageRecorder)
+    window.lbl_generation_timings = QLabel("")
+    window.lbl_generation_timings.setWordWrap(True)
+    window.lbl_generation_timings.setVisible(False)
+    layout.addWidget(window.lbl_generation_timings)
+
+    window.btn_cancel_generate = QPushButton("Cancelar Geração")
+    window.btn_cancel_generate.clicked.connect(window._cancel_generation)
+    window.btn_cancel_generate.setVisible(False)
+    layout.addWidget(window.btn_cancel_generate)
+
     window.btn_save = QPushButton("Salvar Pixel Art")
     window.btn_save.clicked.connect(window._save_pixel_art)
     window.btn_save.setEnabled(False)
     layout.addWidget(window.btn_save)
 
+    window.btn_export_sprites = QPushButton("Exportar Sprites")
+    window.btn_export_sprites.clicked.connect(window._export_sprites)
+    window.btn_export_sprites.setEnabled(False)
+    layout.addWidget(window.btn_export_sprites)
+
     group_box.setLayout(layout)
     return group_box
@@ -0,0 +1,42 @@
+"""Background palette extraction for the palette editors (QThreadPool).
+
+Roda `palette_extraction.extract_palettes` fora da thread da interface;
+com vários assuntos, a extração se divide entre threads (uma por assunto).
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from src.palette_extraction import extract_palettes
+
+
+class _ExtractionSignals(QObject):
+    done = pyqtSignal(object, str)  # ({assunto: ["#RRGGBB", ...]}, erro)
+
+
+class PaletteExtractionJob(QRunnable):
+    def __init__(self, image, segmentation_maps, n_colors):
+        super().__init__()
+        self.signals = _ExtractionSignals()
+        self.image = image
+        self.segmentation_maps = dict(segmentation_maps)
+        self.n_colors = n_colors
+
+    def run(self):
+        try:
+            palettes = extract_palettes(self.image, self.segmentation_maps, n_colors=self.n_colors)
+        except Exception as e:
+            self.signals.done.emit({}, str(e))
+        else:
+            self.signals.done.emit(palettes, "")
+
+
+def start_extraction(image, segmentation_maps, n_colors, on_done):
+    """Inicia a extração no QThreadPool global e conecta `on_done(paletas, erro)`.
+
+    Returns:
+        PaletteExtractionJob: O job iniciado (mantenha a referência enquanto espera o resultado).
+    """
+    job = PaletteExtractionJob(image, segmentation_maps, n_colors)
+    job.signals.done.connect(on_done)
+    QThreadPool.globalInstance().start(job)
+    return job
@@ -1,4 +1,4 @@
-from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QPushButton, QLabel, QFileDialog
+from PyQt5.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QFileDialog
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
 from PIL import Image
@@ -18,10 +18,21 @@ def create_file_loader_group(window):
     window.btn_clear.clicked.connect(window._clear_loaded_images)
     window.btn_clear.setEnabled(False)
 
+    # Projeto: imagem, mapas, paletas, escala e último resultado num único arquivo
+    window.btn_open_project = QPushButton("Abrir Projeto...")
+    window.btn_open_project.clicked.connect(window._open_project)
+    window.btn_save_project = QPushButton("Salvar Projeto...")
+    window.btn_save_project.clicked.connect(window._save_project)
+    window.btn_save_project.setEnabled(False)
+    project_row = QHBoxLayout()
+    project_row.addWidget(window.btn_open_project)
+    project_row.addWidget(window.btn_save_project)
+
     layout.addWidget(window.btn_load_original)
     layout.addWidget(window.lbl_original_path)
     layout.addWidget(window.lbl_original_dims)
     layout.addWidget(window.btn_clear)
+    layout.addLayout(project_row)
 
     group_box.setLayout(layout)
     return group_box
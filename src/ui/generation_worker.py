@@ -0,0 +1,75 @@
+"""Background pixel art generation (QThread worker).
+
+Executa `RenderSession.render` fora da thread da interface e repassa o
+progresso por sinais. O cancelamento usa um `CancellationToken`, que o
+motor verifica entre as faixas de linhas / lotes de blocos.
+"""
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from src.cancellation import CancellationToken, GenerationCancelled
+
+# Rótulos exibidos na interface para cada etapa reportada pelo motor.
+STAGE_LABELS = {
+    'start': "Iniciando...",
+    'reduction': "Reduzindo blocos...",
+    'matching': "Casando cores com as paletas...",
+    'dithering': "Aplicando pontilhado...",
+}
+
+
+class GenerationWorker(QObject):
+    """Roda uma geração; use `start_generation` para criar a thread."""
+
+    progress = pyqtSignal(int)  # 0-100
+    stage = pyqtSignal(str)
+    finished = pyqtSignal(object)  # PIL.Image ou indexed_output.IndexedPixelArt (opção indexed)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, session, palettes, **options):
+        super().__init__()
+        self.session = session  # art_processor.RenderSession
+        # Cópia: a interface pode alterar as paletas durante a geração.
+        self.palettes = {k: list(v) for k, v in palettes.items()}
+        self.options = options
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+    def _on_progress(self, fraction, stage):
+        self.progress.emit(int(fraction * 100))
+        self.stage.emit(stage)
+
+    def run(self):
+        try:
+            self.stage.emit('start')
+            image = self.session.render(self.palettes, progress=self._on_progress,
+                                        cancel_token=self.cancel_token, **self.options)
+            self.cancel_token.raise_if_cancelled()
+        except GenerationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(image)
+
+
+def start_generation(parent, worker):
+    """Move o worker para uma nova QThread e a inicia.
+
+    A thread e o worker são descartados automaticamente ao terminar.
+
+    Returns:
+        QThread: A thread iniciada.
+    """
+    thread = QThread(parent)
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    for signal in (worker.finished, worker.failed, worker.cancelled):
+        signal.connect(thread.quit)
+    thread.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return thread
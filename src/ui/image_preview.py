@@ -0,0 +1,245 @@
+"""Shared image -> QPixmap preview path with an LRU cache of scaled pixmaps.
+
+Usado por todos os widgets que exibem imagens. Arrays NumPy uint8
+C-contíguos (RGBA, RGB ou cinza) viram um `QImage` que aponta para o
+próprio buffer, sem cópia; imagens PIL em RGBA/RGB/L são lidas sem
+conversão de modo (o Pillow não expõe o buffer interno, então há uma
+única cópia) e só os demais modos são convertidos para RGBA.
+
+Os pixmaps escalados ficam num cache LRU com chave (imagem, tamanho,
+transformação, proporção), e o pixmap em tamanho original de cada imagem
+num cache limitado em bytes: redimensionar a janela ou reabrir um
+diálogo não reconverte imagens de vários megapixels. A imagem entra na
+chave pela identidade, então as imagens exibidas não devem ser alteradas
+no lugar; quando uma imagem é liberada, um `weakref.finalize` descarta
+todos os pixmaps dela (o id não é reaproveitado por outra imagem).
+
+`request_scaled_pixmap` escala a imagem numa thread do QThreadPool (só
+QImage, que pode ser usado fora da thread da interface) e guarda o
+pixmap no mesmo cache ao terminar (ex: miniaturas sob demanda).
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtCore import Qt, QSize, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+# Pixmaps escalados guardados (miniaturas, rótulos da janela, diálogos).
+SCALED_CACHE_ENTRIES = 256
+# Memória dos pixmaps em tamanho original guardados (podem ter vários megapixels).
+SOURCE_CACHE_BYTES = 256 * 1024 * 1024
+
+_QIMAGE_FORMATS = {
+    'RGBA': QImage.Format_RGBA8888,
+    'RGB': QImage.Format_RGB888,
+    'L': QImage.Format_Grayscale8,
+}
+_CHANNEL_MODES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+def _pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * 4
+
+
+# Reentrante: o coletor de lixo pode chamar `_forget` com o lock já tomado.
+_lock = threading.RLock()
+
+
+class _PixmapCache:
+    """LRU de pixmaps limitado em entradas e/ou bytes; o primeiro item da chave é o id da imagem."""
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+
+    def _over_limit(self):
+        if self.max_entries is not None and len(self.entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.nbytes > self.max_bytes
+
+    def get(self, key):
+        with _lock:
+            pixmap = self.entries.get(key)
+            if pixmap is not None:
+                self.entries.move_to_end(key)
+            return pixmap
+
+    def put(self, key, image, pixmap):
+        with _lock:
+            _watch(image)
+            self.discard(key)
+            self.entries[key] = pixmap
+            self.nbytes += _pixmap_bytes(pixmap)
+            # A entrada mais nova fica mesmo acima do limite (ex: uma imagem enorme).
+            while len(self.entries) > 1 and self._over_limit():
+                self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        with _lock:
+            pixmap = self.entries.pop(key, None)
+            if pixmap is not None:
+                self.nbytes -= _pixmap_bytes(pixmap)
+
+    def forget(self, image_id):
+        """Descarta todos os pixmaps da imagem `image_id`."""
+        with _lock:
+            for key in [key for key in self.entries if key[0] == image_id]:
+                self.discard(key)
+
+    def clear(self):
+        with _lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+_scaled_cache = _PixmapCache(max_entries=SCALED_CACHE_ENTRIES)
+_source_cache = _PixmapCache(max_bytes=SOURCE_CACHE_BYTES)
+_finalizers = {}  # id da imagem -> weakref.finalize
+
+
+def _forget(image_id):
+    with _lock:
+        _finalizers.pop(image_id, None)
+        _scaled_cache.forget(image_id)
+        _source_cache.forget(image_id)
+
+
+def _watch(image):
+    """Registra (uma vez por imagem viva) a limpeza dos pixmaps quando `image` for liberada."""
+    if id(image) not in _finalizers:
+        _finalizers[id(image)] = weakref.finalize(image, _forget, id(image))
+
+
+def _pixels(image):
+    """Pixels (H, W[, C]) uint8 C-contíguos e o modo; arrays já nesse formato não são copiados."""
+    if hasattr(image, 'to_rgba'):
+        image = image.to_rgba()
+    if hasattr(image, 'convert'):
+        if image.mode not in _QIMAGE_FORMATS:
+            image = image.convert('RGBA')
+        return np.asarray(image), image.mode
+    pixels = np.ascontiguousarray(image)
+    channels = 1 if pixels.ndim == 2 else (pixels.shape[2] if pixels.ndim == 3 else 0)
+    if pixels.dtype != np.uint8 or channels not in _CHANNEL_MODES:
+        raise ValueError(f"Esperado array uint8 (H, W[, 1|3|4]), recebido {pixels.dtype} {pixels.shape}")
+    return pixels, _CHANNEL_MODES[channels]
+
+
+def to_qimage(image):
+    """QImage que compartilha o buffer dos pixels (mantido vivo pelo próprio QImage).
+
+    Args:
+        image: PIL.Image | np.ndarray | indexed_output.IndexedPixelArt - A imagem.
+
+    Returns:
+        QImage: Válido enquanto o array de origem não for alterado.
+    """
+    pixels, mode = _pixels(image)
+    height, width = pixels.shape[:2]
+    qimage = QImage(pixels.data, width, height, pixels.strides[0], _QIMAGE_FORMATS[mode])
+    # O QImage não é dono dos dados: a referência impede que o array seja liberado.
+    qimage._pixels = pixels
+    return qimage
+
+
+def to_qpixmap(image, cache=True):
+    """Pixmap em tamanho original (reaproveitado para a mesma imagem se `cache`)."""
+    key = (id(image),)
+    pixmap = _source_cache.get(key) if cache else None
+    if pixmap is None:
+        pixmap = QPixmap.fromImage(to_qimage(image))
+        if cache:
+            _source_cache.put(key, image, pixmap)
+    return pixmap
+
+
+def _scaled_key(image, size, transform, aspect):
+    if isinstance(size, QSize):
+        size = (size.width(), size.height())
+    return (id(image), tuple(size), int(transform), int(aspect)), tuple(size)
+
+
+def cached_pixmap(image, size, transform=Qt.FastTransformation, aspect=Qt.KeepAspectRatio):
+    """Pixmap escalado já guardado no cache, ou None (não converte nada)."""
+    key, _ = _scaled_key(image, size, transform, aspect)
+    return _scaled_cache.get(key)
+
+
+def scaled_pixmap(image, size, transform=Qt.FastTransformation, aspect=Qt.KeepAspectRatio, cache=True):
+    """Pixmap da imagem escalado para caber em `size`.
+
+    Args:
+        image: PIL.Image | np.ndarray | indexed_output.IndexedPixelArt - A imagem.
+        size: QSize | tuple[int, int] - Tamanho alvo.
+        transform: Qt.TransformationMode - FastTransformation (vizinho mais próximo,
+            ideal para pixel art) ou SmoothTransformation.
+        aspect: Qt.AspectRatioMode - Como em `QPixmap.scaled`.
+        cache: bool - False para imagens exibidas uma única vez (ex: pré-visualizações
+            ao vivo), que só ocupariam o cache.
+
+    Returns:
+        QPixmap: O pixmap escalado.
+    """
+    key, size = _scaled_key(image, size, transform, aspect)
+    pixmap = _scaled_cache.get(key) if cache else None
+    if pixmap is None:
+        pixmap = to_qpixmap(image, cache=cache).scaled(size[0], size[1], aspect, transform)
+        if cache:
+            _scaled_cache.put(key, image, pixmap)
+    return pixmap
+
+
+def clear_cache():
+    """Descarta todos os pixmaps guardados."""
+    _scaled_cache.clear()
+    _source_cache.clear()
+
+
+class _ScaleSignals(QObject):
+    done = pyqtSignal(object, str)  # (QImage | None, erro)
+
+
+class _ScaleJob(QRunnable):
+    def __init__(self, image, size, transform, aspect):
+        super().__init__()
+        self.signals = _ScaleSignals()
+        self.image = image
+        self.size = size
+        self.transform = transform
+        self.aspect = aspect
+
+    def run(self):
+        try:
+            qimage = to_qimage(self.image).scaled(self.size[0], self.size[1], self.aspect, self.transform)
+        except Exception as e:
+            self.signals.done.emit(None, str(e))
+        else:
+            self.signals.done.emit(qimage, "")
+
+
+def request_scaled_pixmap(image, size, on_done, transform=Qt.SmoothTransformation, aspect=Qt.KeepAspectRatio):
+    """Escala a imagem no QThreadPool global e chama `on_done(pixmap | None, erro)` na thread da interface.
+
+    O pixmap entra no cache de `scaled_pixmap` / `cached_pixmap` com a mesma chave.
+
+    Returns:
+        QRunnable: O job iniciado (mantenha a referência enquanto espera o resultado).
+    """
+    key, size = _scaled_key(image, size, transform, aspect)
+    job = _ScaleJob(image, size, transform, aspect)
+
+    def finished(qimage, error):
+        pixmap = None
+        if qimage is not None:
+            pixmap = QPixmap.fromImage(qimage)
+            _scaled_cache.put(key, image, pixmap)
+        on_done(pixmap, error)
+
+    job.signals.done.connect(finished)
+    QThreadPool.globalInstance().start(job)
+    return job
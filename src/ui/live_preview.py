@@ -0,0 +1,168 @@
+"""Live palette preview shared by the palette editor dialogs.
+
+A cada edição do texto da paleta, espera um intervalo curto (debounce) e
+renderiza o assunto afetado: primeiro uma passada rápida numa grade
+amostrada (`RenderSession.preview_subject` com `PREVIEW_MAX_SIDE`) e, em
+seguida, a versão em resolução completa numa thread do QThreadPool.
+As opções de casamento (métrica, poda, LUT) são as da janela, as mesmas
+da geração. Com LUT, a passada rápida também vai para o QThreadPool: a
+LUT de uma paleta nova leva alguns segundos para ser construída.
+Cada pedido tem seu `CancellationToken`; um pedido novo cancela o
+anterior, e resultados de edições antigas são descartados.
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from src.art_processor import PREVIEW_MAX_SIDE
+from src.cancellation import CancellationToken, GenerationCancelled
+from src.color_matching import DEFAULT_METRIC
+from src.dithering import DEFAULT_DITHER
+from src.palette_processor import parse_palette_line
+
+DEBOUNCE_MS = 150
+
+
+class _PreviewSignals(QObject):
+    done = pyqtSignal(int, object, str, bool)  # (request_id, RGBA np.ndarray | None, erro, completa)
+
+
+class _PreviewJob(QRunnable):
+    def __init__(self, request_id, cancel_token, session, subject, colors, dither, max_side, options):
+        super().__init__()
+        self.signals = _PreviewSignals()
+        self.request_id = request_id
+        self.cancel_token = cancel_token
+        self.session = session
+        self.subject = subject
+        self.colors = colors
+        self.dither = dither
+        self.max_side = max_side
+        self.options = options
+
+    def run(self):
+        try:
+            arr = self.session.preview_subject(self.subject, self.colors, max_side=self.max_side,
+                                               cancel_token=self.cancel_token, dither=self.dither,
+                                               **self.options)
+            self.signals.done.emit(self.request_id, arr, "", self.max_side is None)
+        except GenerationCancelled:
+            pass
+        except Exception as e:
+            self.signals.done.emit(self.request_id, None, str(e), self.max_side is None)
+
+
+class LivePreviewController(QObject):
+    """Agenda e exibe pré-visualizações de paleta para um editor.
+
+    Args:
+        window: PixelMakerWindow - Fornece a `RenderSession` via `_get_render_session`.
+        show: callable(np.ndarray | None, str) - Exibe a imagem RGBA (H, W, 4) uint8 (ou a
+            mensagem); ver `image_preview.scaled_pixmap`.
+    """
+
+    def __init__(self, window, show, debounce_ms=DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.show = show
+        self.current_request = 0
+        self._cancel_token = CancellationToken()
+        self._pending = None  # (assunto, texto, pontilhado)
+        self._last = None  # (sessão, assunto, cores, pontilhado) do último pedido executado
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._run)
+
+    def schedule(self, subject, text, dither=None):
+        """Pede uma nova pré-visualização após o intervalo de debounce.
+
+        Sem `dither`, usa o pontilhado já salvo para o assunto na janela.
+        """
+        self._pending = (subject, text, dither)
+        self._next_request()
+        self._timer.start()
+
+    def stop(self):
+        """Descarta pedidos pendentes e resultados ainda em cálculo."""
+        self._timer.stop()
+        self._pending = None
+        self._next_request()
+
+    def _next_request(self):
+        # Cancela o trabalho do pedido anterior ainda em andamento.
+        self._cancel_token.cancel()
+        self._cancel_token = CancellationToken()
+        self.current_request += 1
+
+    def _session(self):
+        if not getattr(self.window, 'original_image', None):
+            return None
+        try:
+            return self.window._get_render_session()
+        except Exception:
+            return None
+
+    def _options(self):
+        selected = getattr(self.window, '_matching_options', None)
+        return selected() if selected is not None else {'metric': DEFAULT_METRIC}
+
+    def _dither(self, subject):
+        return getattr(self.window, 'subject_dither', {}).get(subject, DEFAULT_DITHER)
+
+    def _start_job(self, session, subject, colors, dither, max_side, options):
+        job = _PreviewJob(self.current_request, self._cancel_token, session, subject, colors, dither, max_side,
+                          options)
+        job.signals.done.connect(self._on_job_done)
+        QThreadPool.globalInstance().start(job)
+
+    def _run(self):
+        if self._pending is None:
+            return
+        subject, text, dither = self._pending
+        if dither is None:
+            dither = self._dither(subject)
+        colors = parse_palette_line(text)
+        if not colors:
+            self.show(None, "Paleta vazia ou inválida.")
+            return
+        session = self._session()
+        if session is None:
+            self.show(None, "Carregue a imagem original para pré-visualizar.")
+            return
+
+        options = self._options()
+        self._last = (session, subject, colors, dither)
+        if not session.blocks_ready or options.get('lut_cache') is not None:
+            # Blocos ainda não calculados (primeira vez) ou LUT possivelmente nova: fora da
+            # thread da interface.
+            if not session.blocks_ready:
+                self.show(None, "Preparando pré-visualização...")
+            self._start_job(session, subject, colors, dither, PREVIEW_MAX_SIDE, options)
+            return
+        try:
+            arr = session.preview_subject(subject, colors, max_side=PREVIEW_MAX_SIDE, dither=dither, **options)
+        except Exception as e:
+            self.show(None, f"Pré-visualização indisponível: {e}")
+            return
+        self._show_array(arr)
+        self._start_job(session, subject, colors, dither, None, options)
+
+    def _show_array(self, arr):
+        if arr is None:
+            self.show(None, "O assunto não tem blocos visíveis.")
+        else:
+            self.show(arr, "")
+
+    def _on_job_done(self, request_id, image, error, full):
+        if request_id != self.current_request:
+            return
+        if error:
+            self.show(None, f"Pré-visualização indisponível: {error}")
+            return
+        if image is None:
+            self.show(None, "O assunto não tem blocos visíveis.")
+            return
+        self.show(image, "")
+        if not full:
+            # Era a passada rápida (blocos recém-calculados): agora a completa.
+            self._start_job(*self._last, None, self._options())
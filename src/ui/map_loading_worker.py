@@ -0,0 +1,39 @@
+"""Background segmentation-map decoding for the main window (QThreadPool).
+
+Roda `map_loading.load_map_alphas` fora da thread da interface; os
+arquivos já foram validados pelo cabeçalho (`validate_map_files`).
+"""
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from src.map_loading import load_map_alphas
+
+
+class _MapLoadingSignals(QObject):
+    done = pyqtSignal(object, object)  # ({assunto: alfa (H, W) uint8}, [erros])
+
+
+class MapLoadingJob(QRunnable):
+    def __init__(self, paths):
+        super().__init__()
+        self.signals = _MapLoadingSignals()
+        self.paths = dict(paths)
+
+    def run(self):
+        try:
+            maps, errors = load_map_alphas(self.paths)
+        except Exception as e:
+            maps, errors = {}, [str(e)]
+        self.signals.done.emit(maps, errors)
+
+
+def start_map_loading(paths, on_done):
+    """Inicia a decodificação no QThreadPool global e conecta `on_done(mapas, erros)`.
+
+    Returns:
+        MapLoadingJob: O job iniciado (mantenha a referência enquanto espera o resultado).
+    """
+    job = MapLoadingJob(paths)
+    job.signals.done.connect(on_done)
+    QThreadPool.globalInstance().start(job)
+    return job
@@ -1,42 +1,126 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QSizePolicy, QScrollArea, QWidget
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
-
-# Robust PIL -> QPixmap converter with multiple fallbacks
-def pil_to_qpixmap(pil):
-    """Convert a PIL Image to QPixmap reliably.
-
-    Tries PIL.ImageQt first; if not available, falls back to raw bytes -> QImage.
-    """
-    # ensure PIL image
-    try:
-        img = pil.convert('RGBA') if hasattr(pil, 'convert') else pil
-    except Exception:
-        return QPixmap()
-
-    # try ImageQt if available
-    try:
-        from PIL.ImageQt import ImageQt as _ImageQt
-        qim = _ImageQt(img)
-        return QPixmap.fromImage(qim)
-    except Exception:
-        pass
-
-    # fallback: create QImage from raw RGBA / BGRA bytes
-    try:
-        w, h = img.size
-        # try using RGBA8888 format
-        data = img.tobytes('raw', 'RGBA')
+"""Bulk palette editor: one row per segmentation map (model/view).
+
+As linhas ficam num `QTableView` com um modelo próprio, então só as
+linhas visíveis são desenhadas. A miniatura de cada mapa é pedida quando
+a linha aparece pela primeira vez e gerada no QThreadPool
+(`image_preview.request_scaled_pixmap`); o cache de pixmaps é global, e
+reabrir o editor reaproveita as miniaturas já geradas.
+"""
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QSpinBox, QTableView,
+    QHeaderView, QAbstractItemView, QStyledItemDelegate,
+)
+from PyQt5.QtCore import Qt, QSize, QAbstractTableModel, QModelIndex
+
+from src.palette_extraction import DEFAULT_COLORS
+from src.ui.extraction_worker import start_extraction
+from src.ui.image_preview import scaled_pixmap, cached_pixmap, request_scaled_pixmap
+from src.ui.live_preview import LivePreviewController
+
+THUMBNAIL_SIZE = QSize(200, 150)
+THUMBNAIL_COLUMN, SUBJECT_COLUMN, PALETTE_COLUMN = range(3)
+
+
+class PaletteTableModel(QAbstractTableModel):
+    """Linhas (miniatura do mapa, assunto, texto da paleta), em ordem alfabética de assunto."""
+
+    HEADERS = ("Mapa", "Assunto", "Paleta")
+
+    def __init__(self, segmentation_maps, initial_texts=None, parent=None):
+        super().__init__(parent)
+        self.segmentation_maps = segmentation_maps
+        self.subjects = sorted(segmentation_maps.keys())
+        initial_texts = initial_texts or {}
+        self.texts = {subject: initial_texts.get(subject, "") for subject in self.subjects}
+        self._jobs = {}  # assunto -> job de miniatura em andamento
+        self._failed = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.subjects)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == PALETTE_COLUMN:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        subject = self.subjects[index.row()]
+        column = index.column()
+        if column == THUMBNAIL_COLUMN:
+            if role == Qt.DecorationRole:
+                return self._thumbnail(subject)
+            if role == Qt.DisplayRole and cached_pixmap(self.segmentation_maps.get(subject), THUMBNAIL_SIZE,
+                                                        Qt.SmoothTransformation) is None:
+                return "(preview não disponível)" if subject in self._failed else "Carregando..."
+            if role == Qt.TextAlignmentRole:
+                return Qt.AlignCenter
+        elif column == SUBJECT_COLUMN and role == Qt.DisplayRole:
+            return subject
+        elif column == PALETTE_COLUMN and role in (Qt.DisplayRole, Qt.EditRole):
+            return self.texts[subject]
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or index.column() != PALETTE_COLUMN or role != Qt.EditRole:
+            return False
+        self.set_text(self.subjects[index.row()], value)
+        return True
+
+    def set_text(self, subject, text):
+        self.texts[subject] = text
+        index = self.index(self.subjects.index(subject), PALETTE_COLUMN)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+
+    def _thumbnail(self, subject):
+        """Miniatura em cache, ou None (e pede a geração em segundo plano na primeira vez)."""
+        image = self.segmentation_maps.get(subject)
+        if image is None or subject in self._failed:
+            return None
+        pixmap = cached_pixmap(image, THUMBNAIL_SIZE, Qt.SmoothTransformation)
+        if pixmap is None and subject not in self._jobs:
+            self._jobs[subject] = request_scaled_pixmap(
+                image, THUMBNAIL_SIZE, lambda pix, error, s=subject: self._on_thumbnail(s, pix, error))
+        return pixmap
+
+    def _on_thumbnail(self, subject, pixmap, error):
+        self._jobs.pop(subject, None)
+        if pixmap is None or pixmap.isNull():
+            print(f"Warning: não foi possível gerar preview para '{subject}': {error or 'pixmap vazio'}")
+            self._failed.add(subject)
         try:
-            qimg = QImage(data, w, h, QImage.Format_RGBA8888)
-            return QPixmap.fromImage(qimg)
-        except Exception:
-            # convert to BGRA and use ARGB32
-            data = img.convert('BGRA').tobytes('raw', 'BGRA')
-            qimg = QImage(data, w, h, QImage.Format_ARGB32)
-            return QPixmap.fromImage(qimg)
-    except Exception:
-        return QPixmap()
+            index = self.index(self.subjects.index(subject), THUMBNAIL_COLUMN)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole, Qt.DisplayRole])
+        except RuntimeError:
+            # o diálogo já foi fechado; a miniatura continua no cache
+            pass
+
+
+class _PaletteDelegate(QStyledItemDelegate):
+    """Editor de texto da paleta que avisa o diálogo a cada tecla (pré-visualização ao vivo)."""
+
+    def __init__(self, dialog):
+        super().__init__(dialog)
+        self.dialog = dialog
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setPlaceholderText("#RRGGBB, #RRGGBB, ...")
+        subject = self.dialog.model.subjects[index.row()]
+        editor.textEdited.connect(lambda text, s=subject: self.dialog._on_text_edited(s, text))
+        return editor
+
 
 class PaletteBulkEditorDialog(QDialog):
     def __init__(self, parent, segmentation_maps, initial_texts=None):
@@ -49,66 +133,53 @@ class PaletteBulkEditorDialog(QDialog):
 
         layout = QVBoxLayout()
 
-        # Scroll area to hold multiple map editors
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        container = QWidget()
-        self.vbox = QVBoxLayout(container)
-
-        # For each subject, create a preview + input
-        self.edit_fields = {}  # subject -> QLineEdit
-
-        for subject in sorted(self.segmentation_maps.keys()):
-            row = QWidget()
-            row_layout = QHBoxLayout(row)
-
-            lbl = QLabel()
-            lbl.setFixedSize(200, 150)
-            lbl.setAlignment(Qt.AlignCenter)
-            try:
-                pil = self.segmentation_maps[subject]
-                if pil is None:
-                    raise ValueError("imagem ausente")
-                # force RGBA to avoid ImageQt mode issues
-                if hasattr(pil, 'convert'):
-                    img = pil.convert('RGBA')
-                else:
-                    img = pil
-                pix = pil_to_qpixmap(img)
-                if not pix.isNull():
-                    pix = pix.scaled(lbl.width(), lbl.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    lbl.setPixmap(pix)
-                else:
-                    raise RuntimeError("pixmap vazio")
-            except Exception as e:
-                # keep readable fallback text and log to console for debugging
-                print(f"Warning: não foi possível gerar preview para '{subject}': {e}")
-                lbl.setText("(preview não disponível)")
-
-            # input
-            le = QLineEdit()
-            le.setPlaceholderText("#RRGGBB, #RRGGBB, ...")
-            initial = self.initial_texts.get(subject, "")
-            le.setText(initial)
-            le.setMinimumWidth(400)
-
-            # subject label
-            subject_lbl = QLabel(f"{subject}")
-            subject_lbl.setFixedWidth(140)
-
-            row_layout.addWidget(lbl)
-            row_layout.addWidget(subject_lbl)
-            row_layout.addWidget(le)
-
-            self.edit_fields[subject] = le
-            self.vbox.addWidget(row)
-
-        self.vbox.addStretch()
-        scroll.setWidget(container)
-        layout.addWidget(scroll)
+        # Uma linha por mapa; só as linhas visíveis são desenhadas e pedem miniatura.
+        self.model = PaletteTableModel(self.segmentation_maps, self.initial_texts, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(PALETTE_COLUMN, _PaletteDelegate(self))
+        self.table.setIconSize(THUMBNAIL_SIZE)
+        self.table.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(THUMBNAIL_SIZE.height() + 6)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(THUMBNAIL_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(THUMBNAIL_COLUMN, THUMBNAIL_SIZE.width() + 6)
+        header.resizeSection(SUBJECT_COLUMN, 140)
+        header.setStretchLastSection(True)
+
+        # Pré-visualização ao vivo do último assunto editado
+        preview_panel = QVBoxLayout()
+        self.lbl_live_subject = QLabel("Pré-visualização ao vivo:")
+        preview_panel.addWidget(self.lbl_live_subject)
+        self.lbl_live_preview = QLabel("Edite uma paleta para pré-visualizar.")
+        self.lbl_live_preview.setAlignment(Qt.AlignCenter)
+        self.lbl_live_preview.setMinimumSize(320, 240)
+        self.lbl_live_preview.setWordWrap(True)
+        self.lbl_live_preview.setObjectName("ImageLabel")
+        preview_panel.addWidget(self.lbl_live_preview, 1)
+        self.live_preview = LivePreviewController(parent, self._show_live_preview, parent=self)
+
+        content_layout = QHBoxLayout()
+        content_layout.addWidget(self.table, 2)
+        content_layout.addLayout(preview_panel, 1)
+        layout.addLayout(content_layout)
 
         # Buttons
         btn_layout = QHBoxLayout()
+        self.spin_extract_colors = QSpinBox()
+        self.spin_extract_colors.setRange(2, 64)
+        self.spin_extract_colors.setValue(DEFAULT_COLORS)
+        self.spin_extract_colors.setSuffix(" cores")
+        self.btn_extract_all = QPushButton("Extrair Todas da Imagem")
+        self.btn_extract_all.clicked.connect(self._extract_all_palettes)
+        self._extraction_job = None
+        btn_layout.addWidget(QLabel("Sugerir paletas:"))
+        btn_layout.addWidget(self.spin_extract_colors)
+        btn_layout.addWidget(self.btn_extract_all)
         self.btn_save = QPushButton("Salvar")
         self.btn_cancel = QPushButton("Cancelar")
         self.btn_save.clicked.connect(self._on_save)
@@ -120,9 +191,59 @@ class PaletteBulkEditorDialog(QDialog):
         layout.addLayout(btn_layout)
         self.setLayout(layout)
 
+    def _extract_all_palettes(self):
+        image = getattr(self.parent, 'original_image', None)
+        if image is None or not self.segmentation_maps:
+            QMessageBox.information(self, "Extrair Paletas", "Carregue a imagem original e os mapas.")
+            return
+        self.btn_extract_all.setEnabled(False)
+        self.btn_extract_all.setText("Extraindo...")
+        self._extraction_job = start_extraction(image, self.segmentation_maps, self.spin_extract_colors.value(),
+                                                self._on_palettes_extracted)
+
+    def _on_palettes_extracted(self, palettes, error):
+        self._extraction_job = None
+        self.btn_extract_all.setEnabled(True)
+        self.btn_extract_all.setText("Extrair Todas da Imagem")
+        if error:
+            QMessageBox.warning(self, "Erro na Extração", error)
+            return
+        empty = []
+        for subject in self.model.subjects:
+            colors = palettes.get(subject)
+            if colors:
+                self.model.set_text(subject, ", ".join(colors))
+            else:
+                empty.append(subject)
+        if empty:
+            QMessageBox.information(self, "Extrair Paletas",
+                                    "Sem pixels visíveis na imagem original para: " + ", ".join(empty))
+
+    def _on_text_edited(self, subject, text):
+        # Atualiza o modelo a cada tecla: salvar não depende de o editor ter sido fechado.
+        self.model.texts[subject] = text
+        self._schedule_preview(subject, text)
+
+    def _schedule_preview(self, subject, text):
+        self.lbl_live_subject.setText(f"Pré-visualização ao vivo: {subject}")
+        self.live_preview.schedule(subject, text)
+
+    def _show_live_preview(self, image, message):
+        if image is None:
+            self.lbl_live_preview.clear()
+            self.lbl_live_preview.setText(message)
+            return
+        self.lbl_live_preview.setPixmap(
+            scaled_pixmap(image, self.lbl_live_preview.size(), Qt.FastTransformation, cache=False)
+        )
+
+    def done(self, result):
+        self.live_preview.stop()
+        super().done(result)
+
     def _on_save(self):
         # Collect texts and call parent to validate/save
-        updates = {s: le.text().strip() for s, le in self.edit_fields.items()}
+        updates = {s: text.strip() for s, text in self.model.texts.items()}
         try:
             # parent will raise Exception on validation error
             self.parent._save_palettes_bulk(updates)
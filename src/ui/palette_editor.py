@@ -1,36 +1,21 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QSizePolicy, QScrollArea, QWidget
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QSizePolicy, QScrollArea, QWidget, QComboBox, QSpinBox
 from PyQt5.QtCore import Qt
 
-def pil_to_qpixmap(pil):
-    """Convert a PIL Image to QPixmap reliably.
-
-    Tries PIL.ImageQt first; if not available, falls back to raw bytes -> QImage.
-    """
-    try:
-        img = pil.convert('RGBA') if hasattr(pil, 'convert') else pil
-    except Exception:
-        return QPixmap()
-
-    try:
-        from PIL.ImageQt import ImageQt as _ImageQt
-        qim = _ImageQt(img)
-        return QPixmap.fromImage(qim)
-    except Exception:
-        pass
-
-    try:
-        w, h = img.size
-        data = img.tobytes('raw', 'RGBA')
-        try:
-            qimg = QImage(data, w, h, QImage.Format_RGBA8888)
-            return QPixmap.fromImage(qimg)
-        except Exception:
-            data = img.convert('BGRA').tobytes('raw', 'BGRA')
-            qimg = QImage(data, w, h, QImage.Format_ARGB32)
-            return QPixmap.fromImage(qimg)
-    except Exception:
-        return QPixmap()
+from src.dithering import DITHER_MODES, DEFAULT_DITHER
+from src.palette_extraction import DEFAULT_COLORS
+from src.ui.extraction_worker import start_extraction
+from src.ui.image_preview import scaled_pixmap
+from src.ui.live_preview import LivePreviewController
+
+# Nomes exibidos para os modos de pontilhado.
+DITHER_LABELS = {
+    'none': "Nenhum",
+    'bayer2': "Ordenado (Bayer 2x2)",
+    'bayer4': "Ordenado (Bayer 4x4)",
+    'bayer8': "Ordenado (Bayer 8x8)",
+    'floyd_steinberg': "Difusão de erro (Floyd-Steinberg)",
+    'atkinson': "Difusão de erro (Atkinson)",
+}
 
 
 class PaletteEditorDialog(QDialog):
@@ -43,17 +28,14 @@ class PaletteEditorDialog(QDialog):
 
         layout = QVBoxLayout()
 
+        self.lbl_preview = QLabel()
         self.lbl_preview.setAlignment(Qt.AlignCenter)
         self.lbl_preview.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         if pil_image is not None:
             try:
-                if hasattr(pil_image, 'convert'):
-                    img = pil_image.convert('RGBA')
-                else:
-                    img = pil_image
-                pix = pil_to_qpixmap(img)
+                pix = scaled_pixmap(pil_image, (400, 300), Qt.SmoothTransformation)
                 if not pix.isNull():
-                    self.lbl_preview.setPixmap(pix.scaled(400, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                    self.lbl_preview.setPixmap(pix)
             except Exception as e:
                 print(f"Warning: não foi possível gerar preview no editor simples para '{subject_name}': {e}")
                 # fallback: no pixmap
@@ -68,12 +50,46 @@ class PaletteEditorDialog(QDialog):
 
         layout.addWidget(scroll)
 
+        layout.addWidget(QLabel("Pré-visualização ao vivo:"))
+        self.lbl_live_preview = QLabel("Digite uma paleta para pré-visualizar.")
+        self.lbl_live_preview.setAlignment(Qt.AlignCenter)
+        self.lbl_live_preview.setMinimumSize(300, 200)
+        self.lbl_live_preview.setObjectName("ImageLabel")
+        layout.addWidget(self.lbl_live_preview, 1)
+        self.live_preview = LivePreviewController(parent, self._show_live_preview, parent=self)
+
         self.input_palette = QLineEdit()
         self.input_palette.setPlaceholderText("Ex: #FFDAB9, #E0B088, #C18866")
         self.input_palette.setText(initial_text)
+        self.input_palette.textChanged.connect(self._schedule_preview)
         layout.addWidget(QLabel("Paleta (separar por vírgula):"))
         layout.addWidget(self.input_palette)
 
+        extract_layout = QHBoxLayout()
+        self.spin_extract_colors = QSpinBox()
+        self.spin_extract_colors.setRange(2, 64)
+        self.spin_extract_colors.setValue(DEFAULT_COLORS)
+        self.spin_extract_colors.setSuffix(" cores")
+        self.btn_extract = QPushButton("Extrair da Imagem")
+        self.btn_extract.clicked.connect(self._extract_palette)
+        self._extraction_job = None
+        extract_layout.addWidget(QLabel("Sugerir paleta:"))
+        extract_layout.addWidget(self.spin_extract_colors)
+        extract_layout.addWidget(self.btn_extract)
+        extract_layout.addStretch()
+        layout.addLayout(extract_layout)
+
+        self.combo_dither = QComboBox()
+        for mode in DITHER_MODES:
+            self.combo_dither.addItem(DITHER_LABELS.get(mode, mode), mode)
+        current = getattr(parent, 'subject_dither', {}).get(subject_name, DEFAULT_DITHER)
+        self.combo_dither.setCurrentIndex(DITHER_MODES.index(current))
+        self.combo_dither.currentIndexChanged.connect(lambda _: self._schedule_preview())
+        dither_layout = QHBoxLayout()
+        dither_layout.addWidget(QLabel("Pontilhado:"))
+        dither_layout.addWidget(self.combo_dither, 1)
+        layout.addLayout(dither_layout)
+
         btn_layout = QHBoxLayout()
         self.btn_save = QPushButton("Salvar")
         self.btn_cancel = QPushButton("Cancelar")
@@ -87,10 +103,53 @@ class PaletteEditorDialog(QDialog):
 
         self.setLayout(layout)
 
+        if initial_text:
+            self._schedule_preview()
+
+    def _schedule_preview(self, *_):
+        self.live_preview.schedule(self.subject_name, self.input_palette.text(), self.combo_dither.currentData())
+
+    def _extract_palette(self):
+        image = getattr(self.parent, 'original_image', None)
+        seg_map = getattr(self.parent, 'segmentation_maps', {}).get(self.subject_name)
+        if image is None or seg_map is None:
+            QMessageBox.information(self, "Extrair Paleta", "Carregue a imagem original e o mapa do assunto.")
+            return
+        self.btn_extract.setEnabled(False)
+        self.btn_extract.setText("Extraindo...")
+        self._extraction_job = start_extraction(image, {self.subject_name: seg_map},
+                                                self.spin_extract_colors.value(), self._on_palette_extracted)
+
+    def _on_palette_extracted(self, palettes, error):
+        self._extraction_job = None
+        self.btn_extract.setEnabled(True)
+        self.btn_extract.setText("Extrair da Imagem")
+        if error:
+            QMessageBox.warning(self, "Erro na Extração", error)
+            return
+        colors = palettes.get(self.subject_name)
+        if not colors:
+            QMessageBox.information(self, "Extrair Paleta", "O assunto não tem pixels visíveis na imagem original.")
+            return
+        self.input_palette.setText(", ".join(colors))
+
+    def _show_live_preview(self, image, message):
+        if image is None:
+            self.lbl_live_preview.clear()
+            self.lbl_live_preview.setText(message)
+            return
+        self.lbl_live_preview.setPixmap(
+            scaled_pixmap(image, self.lbl_live_preview.size(), Qt.FastTransformation, cache=False)
+        )
+
+    def done(self, result):
+        self.live_preview.stop()
+        super().done(result)
+
     def _on_save(self):
         text = self.input_palette.text().strip()
         try:
-            self.parent._save_palette_for_subject(self.subject_name, text)
+            self.parent._save_palette_for_subject(self.subject_name, text, dither=self.combo_dither.currentData())
             self.accept()
         except Exception as e:
             QMessageBox.warning(self, "Erro ao Salvar", str(e))
@@ -0,0 +1,104 @@
+"""Sprite slicing and sprite-sheet export dialog.
+
+Fatia a pixel art gerada por componentes conexos ou por uma grade e grava
+os PNGs individuais, a sprite sheet e o JSON de posições
+(`sprite_export.export_sprites`) numa pasta escolhida pelo usuário.
+"""
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QSpinBox, QCheckBox, QLineEdit,
+    QPushButton, QFileDialog, QMessageBox, QApplication,
+)
+from PyQt5.QtCore import Qt
+
+from src.sprite_export import export_sprites, DEFAULT_PADDING
+
+# Nomes exibidos para os modos de fatiamento.
+SLICE_LABELS = {
+    'components': "Componentes conexos",
+    'grid': "Grade",
+}
+
+
+class SpriteExportDialog(QDialog):
+    def __init__(self, parent, pixel_art):
+        super().__init__(parent)
+        self.setWindowTitle("Exportar Sprites")
+        self.pixel_art = pixel_art  # PIL.Image | indexed_output.IndexedPixelArt
+
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.combo_mode = QComboBox()
+        for mode, label in SLICE_LABELS.items():
+            self.combo_mode.addItem(label, mode)
+        self.combo_mode.currentIndexChanged.connect(self._update_grid_enabled)
+        form.addRow("Fatiar por:", self.combo_mode)
+
+        grid_row = QHBoxLayout()
+        self.spin_cell_w = QSpinBox()
+        self.spin_cell_h = QSpinBox()
+        for spin in (self.spin_cell_w, self.spin_cell_h):
+            spin.setRange(1, 4096)
+            spin.setValue(16)
+            grid_row.addWidget(spin)
+        form.addRow("Célula (L x A):", grid_row)
+
+        self.spin_padding = QSpinBox()
+        self.spin_padding.setRange(0, 64)
+        self.spin_padding.setValue(DEFAULT_PADDING)
+        form.addRow("Espaço na sheet:", self.spin_padding)
+
+        self.edit_name = QLineEdit("sprite")
+        form.addRow("Prefixo dos arquivos:", self.edit_name)
+
+        self.chk_individual = QCheckBox("PNG individual de cada sprite")
+        self.chk_individual.setChecked(True)
+        self.chk_sheet = QCheckBox("Sprite sheet (+ JSON com as posições)")
+        self.chk_sheet.setChecked(True)
+        form.addRow(self.chk_individual)
+        form.addRow(self.chk_sheet)
+        layout.addLayout(form)
+
+        btn_row = QHBoxLayout()
+        btn_export = QPushButton("Exportar...")
+        btn_export.clicked.connect(self._export)
+        btn_cancel = QPushButton("Cancelar")
+        btn_cancel.clicked.connect(self.reject)
+        btn_row.addWidget(btn_export)
+        btn_row.addWidget(btn_cancel)
+        layout.addLayout(btn_row)
+
+        self.setLayout(layout)
+        self._update_grid_enabled()
+
+    def _mode(self):
+        return self.combo_mode.currentData()
+
+    def _update_grid_enabled(self):
+        grid = self._mode() == 'grid'
+        self.spin_cell_w.setEnabled(grid)
+        self.spin_cell_h.setEnabled(grid)
+
+    def _export(self):
+        if not (self.chk_individual.isChecked() or self.chk_sheet.isChecked()):
+            QMessageBox.warning(self, "Nada para Exportar", "Marque os PNGs individuais e/ou a sprite sheet.")
+            return
+        output_dir = QFileDialog.getExistingDirectory(self, "Pasta de Saída dos Sprites")
+        if not output_dir:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            metadata = export_sprites(
+                self.pixel_art, output_dir, mode=self._mode(),
+                cell_size=(self.spin_cell_w.value(), self.spin_cell_h.value()),
+                padding=self.spin_padding.value(), name=self.edit_name.text().strip() or "sprite",
+                individual=self.chk_individual.isChecked(), sheet=self.chk_sheet.isChecked(),
+            )
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Erro ao Exportar", f"Não foi possível exportar os sprites:\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "Sucesso", f"{len(metadata['frames'])} sprites exportados em:\n{output_dir}")
+        self.accept()